@@ -2,12 +2,38 @@ import os
 import json
 import base64
 import asyncio
+import time
+import logging
+import weakref
+import hmac
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qsl
 import websockets
-from fastapi import FastAPI, WebSocket, Request
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.websockets import WebSocketDisconnect
+from datetime import datetime
+from fastapi import FastAPI, WebSocket, Request, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.websockets import WebSocketDisconnect, WebSocketState
 from twilio.twiml.voice_response import VoiceResponse, Connect, Say, Stream
 from dotenv import load_dotenv
+from relay import InboundAudioBatcher, MediaFrameTemplate, PlaybackTracker, RelayChannel
+from upstream_pool import UpstreamPool
+from upstream_session import RECONNECTED, ResilientUpstream, conversation_items
+from conversation_store import STATUSES, ConversationStore, TranscriptBuffer
+from search_index import SearchIndex
+from rollups import RESOLUTIONS, CallRollups
+from event_hub import EventHub
+from shared_state import SharedState
+from call_journal import CallJournal
+from call_recorder import CallRecorder
+from session_manager import SessionManager
+from twiml_cache import PLACEHOLDER, TwimlCache
+from call_profiles import ProfileRegistry
+from appointment_parser import AppointmentParser
+from silence_gate import SilenceGate
+from call_logging import CallLogger, EventLogPolicy, parse_level, parse_overrides, setup_logging
+from call_metrics import (REGISTRY, CALLS_STARTED, INBOUND_DROPPED, INBOUND_SUPPRESSED, TWILIO_QUEUE_WAIT,
+                          UPSTREAM_OUTAGE, UPSTREAM_QUEUE_WAIT, UPSTREAM_RECONNECT_FAILURES, UPSTREAM_RECONNECTS,
+                          CallMetrics)
 
 load_dotenv()
 
@@ -35,129 +61,782 @@ LOG_EVENT_TYPES = [
     'input_audio_buffer.speech_stopped', 'input_audio_buffer.speech_started',
     'session.created'
 ]
+# Realtime events recorded in the call journal.
+JOURNAL_EVENT_TYPES = ('response.done', 'rate_limits.updated', 'error')
 SHOW_TIMING_MATH = False
+# Forward response.audio.delta payloads to Twilio untouched (no base64 round trip).
+RELAY_PASSTHROUGH = os.getenv('RELAY_PASSTHROUGH', 'true').lower() == 'true'
+# Coalesce inbound 20 ms Twilio frames into one append per window (<= 20 disables).
+INBOUND_BATCH_MS = int(os.getenv('INBOUND_BATCH_MS', 60))
+INBOUND_BATCH_BYTES = int(os.getenv('INBOUND_BATCH_BYTES', 3200))
+# Hold back long silent runs of caller audio (off by default). Frames below
+# the threshold are dropped once the hangover after speech has run out; the
+# hangover never goes below server_vad's silence duration, so the VAD still
+# hears the end of every turn, and the pre-roll covers its prefix padding.
+SILENCE_GATE = os.getenv('SILENCE_GATE', 'false').lower() == 'true'
+SILENCE_GATE_THRESHOLD_DBFS = float(os.getenv('SILENCE_GATE_THRESHOLD_DBFS', -45))
+SILENCE_GATE_HANGOVER_MS = int(os.getenv('SILENCE_GATE_HANGOVER_MS', 800))
+SILENCE_GATE_PREROLL_MS = int(os.getenv('SILENCE_GATE_PREROLL_MS', 300))
+SILENCE_GATE_KEEPALIVE_MS = int(os.getenv('SILENCE_GATE_KEEPALIVE_MS', 1000))
+# server_vad settings the gate has to respect (the Realtime API defaults).
+VAD_SILENCE_DURATION_MS = int(os.getenv('VAD_SILENCE_DURATION_MS', 500))
+VAD_PREFIX_PADDING_MS = int(os.getenv('VAD_PREFIX_PADDING_MS', 300))
+# Playback is confirmed by a Twilio mark every this many ms of assistant audio.
+PLAYBACK_MARK_INTERVAL_MS = int(os.getenv('PLAYBACK_MARK_INTERVAL_MS', 200))
+# Per-call send queues. Caller audio either drops its oldest messages or pauses
+# reading from Twilio when the upstream queue is full; the Twilio leg always pauses.
+RELAY_UPSTREAM_QUEUE = int(os.getenv('RELAY_UPSTREAM_QUEUE', 50))
+RELAY_UPSTREAM_POLICY = os.getenv('RELAY_UPSTREAM_POLICY', 'drop_oldest')
+RELAY_TWILIO_QUEUE = int(os.getenv('RELAY_TWILIO_QUEUE', 200))
+# Pre-warmed Realtime connections (UPSTREAM_POOL_MAX=0 connects per call instead).
+UPSTREAM_POOL_MIN = int(os.getenv('UPSTREAM_POOL_MIN', 1))
+UPSTREAM_POOL_MAX = int(os.getenv('UPSTREAM_POOL_MAX', 4))
+UPSTREAM_POOL_MAX_IDLE = float(os.getenv('UPSTREAM_POOL_MAX_IDLE', 240))
+# Admission control (per worker; MAX_CONCURRENT_CALLS=0 means no limit). Sessions
+# with no Twilio message for SESSION_IDLE_SECONDS, or older than
+# SESSION_MAX_SECONDS, are ended.
+MAX_CONCURRENT_CALLS = int(os.getenv('MAX_CONCURRENT_CALLS', 0))
+SESSION_IDLE_SECONDS = float(os.getenv('SESSION_IDLE_SECONDS', 30))
+SESSION_MAX_SECONDS = float(os.getenv('SESSION_MAX_SECONDS', 3600))
+# POST/DELETE /drain need "Authorization: Bearer $DRAIN_TOKEN"; without a token they are
+# refused, since the port is public (and behind ngrok every request comes from localhost).
+DRAIN_TOKEN = os.getenv('DRAIN_TOKEN', '')
+OVERFLOW_MESSAGE = os.getenv(
+    'OVERFLOW_MESSAGE',
+    "Thank you for calling Medical Centre. All of our lines are busy right now. Please call back in a few minutes.")
+# Per-clinic profiles keyed by the dialled number, hot-reloaded from this JSON file
+# (see call_profiles.example.json); anything a profile leaves out comes from here.
+CALL_PROFILES_PATH = os.getenv('CALL_PROFILES_PATH', 'call_profiles.json')
+CALL_PROFILES_POLL_SECONDS = float(os.getenv('CALL_PROFILES_POLL_SECONDS', 5))
+DEFAULT_PROFILE = {
+    "name": "Medical Centre",
+    "instructions": SYSTEM_MESSAGE,
+    "voice": VOICE,
+    "temperature": 0.8,
+    "greeting": "Greet the user with 'Hello there! I am Jane from Medical Centre. How can I assist you today?'",
+    "hold_message": "Please wait while we connect your call to Medical Centre",
+}
+# Serialized TwiML per (host, profile); 0 disables the cache.
+TWIML_CACHE_SIZE = int(os.getenv('TWIML_CACHE_SIZE', 256))
+# When the Realtime socket drops mid-call, reconnect for up to UPSTREAM_RECONNECT_SECONDS
+# (0 ends the call instead), holding the newest UPSTREAM_OUTAGE_BUFFER_MS of caller
+# audio meanwhile, and rebuild the conversation from up to RESUME_HISTORY_CHARS of transcript.
+UPSTREAM_RECONNECT_SECONDS = float(os.getenv('UPSTREAM_RECONNECT_SECONDS', 10))
+UPSTREAM_OUTAGE_BUFFER_MS = int(os.getenv('UPSTREAM_OUTAGE_BUFFER_MS', 5000))
+RESUME_HISTORY_CHARS = int(os.getenv('RESUME_HISTORY_CHARS', 4000))
+# Retention for the in-memory conversation store behind /conversations.
+CONVERSATION_RETENTION = int(os.getenv('CONVERSATION_RETENTION', 20000))
+CONVERSATION_MAX_AGE_HOURS = float(os.getenv('CONVERSATION_MAX_AGE_HOURS', 168))
+# Per-minute and per-hour call analytics behind /stats, kept for this many buckets each.
+STATS_MINUTE_BUCKETS = int(os.getenv('STATS_MINUTE_BUCKETS', 1440))
+STATS_HOUR_BUCKETS = int(os.getenv('STATS_HOUR_BUCKETS', 720))
+# Push feed for dashboards: per-subscriber queue bound and what to do when it fills.
+UPDATES_QUEUE_SIZE = int(os.getenv('UPDATES_QUEUE_SIZE', 256))
+UPDATES_SLOW_POLICY = os.getenv('UPDATES_SLOW_POLICY', 'disconnect')
+UPDATES_KEEPALIVE_SECONDS = 15
+# WORKERS > 1 runs that many processes; they share conversations and metrics
+# through a SQLite (WAL) log at SHARED_STATE_PATH.
+WORKERS = int(os.getenv('WORKERS', 1))
+SHARED_STATE_PATH = os.getenv('SHARED_STATE_PATH', 'shared_state.db')
+SHARED_STATE_POLL_SECONDS = 0.25
+SHARED_METRICS_INTERVAL = 2
+# Append-only call event journal (off unless CALL_JOURNAL_DIR is set); conversations
+# are rebuilt from it on startup.
+CALL_JOURNAL_DIR = os.getenv('CALL_JOURNAL_DIR', '')
+CALL_JOURNAL_FSYNC_SECONDS = float(os.getenv('CALL_JOURNAL_FSYNC_SECONDS', 1.0))
+CALL_JOURNAL_SEGMENT_MB = int(os.getenv('CALL_JOURNAL_SEGMENT_MB', 64))
+# Stereo WAV recordings of both legs, one file per call (off unless RECORDINGS_DIR is set).
+RECORDINGS_DIR = os.getenv('RECORDINGS_DIR', '')
+RECORDING_MAX_SECONDS = int(os.getenv('RECORDING_MAX_SECONDS', 3600))
+# Logs are written by a background thread. Realtime events can get their own
+# level and sampling rate, e.g. LOG_EVENT_SAMPLING="rate_limits.updated=0.1".
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')  # or 'json'
+LOG_MAX_PAYLOAD = int(os.getenv('LOG_MAX_PAYLOAD', 2048))
+LOG_EVENT_LEVELS = parse_overrides(os.getenv('LOG_EVENT_LEVELS', 'error=ERROR'), parse_level)
+LOG_EVENT_SAMPLING = parse_overrides(os.getenv('LOG_EVENT_SAMPLING', ''), float)
 
-app = FastAPI()
+setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_MAX_PAYLOAD)
+logger = logging.getLogger('app')
+event_log_policy = EventLogPolicy(LOG_EVENT_LEVELS, LOG_EVENT_SAMPLING)
 
 if not OPENAI_API_KEY:
     raise ValueError('Missing the OpenAI API key. Please set it in the .env file.')
 
+async def connect_upstream():
+    return await websockets.connect(
+        OPENAI_API_ENDPOINT,
+        additional_headers={"api-key": OPENAI_API_KEY}
+    )
+
+upstream_pool = UpstreamPool(
+    connect_upstream,
+    lambda openai_ws: initialize_session(openai_ws),
+    min_size=UPSTREAM_POOL_MIN,
+    max_size=UPSTREAM_POOL_MAX,
+    max_idle=UPSTREAM_POOL_MAX_IDLE,
+)
+
+twiml_cache = TwimlCache(TWIML_CACHE_SIZE)
+
+# Cached TwiML embeds profile greetings, so a reload starts it afresh.
+profile_registry = ProfileRegistry(CALL_PROFILES_PATH, DEFAULT_PROFILE, CALL_PROFILES_POLL_SECONDS,
+                                   on_reload=twiml_cache.invalidate)
+# The profile whose session.update each upstream connection was last given.
+session_profiles = weakref.WeakKeyDictionary()
+
+# Calls relayed by this process.
+session_manager = SessionManager(MAX_CONCURRENT_CALLS, SESSION_IDLE_SECONDS, SESSION_MAX_SECONDS)
+
+event_hub = EventHub(queue_size=UPDATES_QUEUE_SIZE, slow_policy=UPDATES_SLOW_POLICY)
+
+shared_state = SharedState(SHARED_STATE_PATH) if WORKERS > 1 else None
+
+call_journal = CallJournal(
+    CALL_JOURNAL_DIR,
+    fsync_interval=CALL_JOURNAL_FSYNC_SECONDS,
+    segment_bytes=CALL_JOURNAL_SEGMENT_MB * 1024 * 1024,
+    max_age=CONVERSATION_MAX_AGE_HOURS * 3600,
+)
+
+call_recorder = CallRecorder(RECORDINGS_DIR, max_seconds=RECORDING_MAX_SECONDS)
+
+search_index = SearchIndex()
+
+call_rollups = CallRollups(STATS_MINUTE_BUCKETS, STATS_HOUR_BUCKETS)
+
+def publish_change(call_id, type, data):
+    """Fan a conversation change out to search, rollups, dashboards, the journal and, with workers, the other processes."""
+    search_index.observe(call_id, type, data)
+    call_rollups.observe(call_id, type, data)
+    event_hub.publish(call_id, type, data)
+    # Changes replayed from the journal or another worker are already recorded.
+    if call_journal.restoring or (shared_state is not None and shared_state.applying):
+        return
+    if type == 'transcript':
+        call_journal.append(call_id, 'transcript', data)
+        if shared_state is not None:
+            shared_state.transcript(call_id, data)
+    else:
+        state = conversation_store.get(call_id).state()
+        call_journal.append(call_id, 'record', state)
+        if shared_state is not None:
+            shared_state.record(call_id, state)
+
+conversation_store = ConversationStore(
+    max_records=CONVERSATION_RETENTION,
+    max_age=CONVERSATION_MAX_AGE_HOURS * 3600,
+    listener=publish_change,
+    on_remove=search_index.remove,
+)
+
+REGISTRY.gauge('calls_active', 'Calls currently in progress.', lambda: len(session_manager.sessions))
+REGISTRY.gauge('calls_rejected_total', 'Calls turned away because the node was full or draining.',
+               lambda: session_manager.rejected, 'counter')
+REGISTRY.gauge('calls_reaped_total', 'Calls ended for being idle or over the maximum duration.',
+               lambda: session_manager.reaped, 'counter')
+REGISTRY.gauge('twiml_cache_hits_total', 'Incoming-call responses served from cached TwiML.',
+               lambda: twiml_cache.hits, 'counter')
+REGISTRY.gauge('twiml_cache_misses_total', 'Incoming-call responses that had to build TwiML.',
+               lambda: twiml_cache.misses, 'counter')
+REGISTRY.gauge('upstream_pool_idle', 'Warm upstream connections waiting for a call.', lambda: upstream_pool.stats()['idle'])
+REGISTRY.gauge('upstream_pool_hits_total', 'Calls served from the upstream pool.', lambda: upstream_pool.hits, 'counter')
+REGISTRY.gauge('upstream_pool_misses_total', 'Calls that had to connect upstream themselves.', lambda: upstream_pool.misses, 'counter')
+REGISTRY.gauge('relay_queue_depth', 'Messages waiting in per-call relay queues.',
+               lambda: sum(channel.depth for session in session_manager.sessions.values() for channel in session.channels))
+REGISTRY.gauge('call_journal_pending', 'Journal entries queued for the writer thread.', lambda: call_journal.stats()['pending'])
+REGISTRY.gauge('call_recorder_pending', 'Recording audio queued for the writer thread.', lambda: call_recorder.stats()['pending'])
+REGISTRY.gauge('call_recorder_dropped_total', 'Recording audio dropped because the writer fell behind.',
+               lambda: call_recorder.dropped, 'counter')
+REGISTRY.gauge('search_index_calls', 'Conversations in the search index.', lambda: len(search_index))
+REGISTRY.gauge('updates_subscribers', 'Dashboard subscribers to /conversations/updates.', lambda: event_hub.stats()['subscribers'])
+
+async def sync_shared_state():
+    """Apply other workers' conversation changes locally and publish this worker's metrics."""
+    metrics_due = 0
+    while True:
+        if time.monotonic() >= metrics_due:
+            shared_state.publish_metrics(REGISTRY.snapshot())
+            metrics_due = time.monotonic() + SHARED_METRICS_INTERVAL
+        try:
+            changes = await asyncio.to_thread(shared_state.changes)
+        except Exception as e:
+            logger.warning("Shared state read failed: %s", e)
+            changes = []
+        shared_state.applying = True
+        try:
+            for call_id, kind, data in changes:
+                if kind == 'record':
+                    conversation_store.replicate(call_id, data)
+                elif kind == 'transcript':
+                    conversation_store.add_transcript(call_id, data['speaker'], data['message'],
+                                                      datetime.fromisoformat(data['timestamp']).timestamp())
+        finally:
+            shared_state.applying = False
+        if not changes:
+            await asyncio.sleep(SHARED_STATE_POLL_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app):
+    await asyncio.to_thread(profile_registry.load)
+    profile_registry.start()
+    upstream_pool.start()
+    session_manager.start()
+    # Read the journal a segment at a time off the loop, replaying each before the next is read.
+    segments, last_seen = call_journal.load(), {}
+    while (entries := await asyncio.to_thread(next, segments, None)) is not None:
+        call_journal.replay(conversation_store, entries, last_seen)
+    restored = call_journal.close_interrupted(conversation_store, last_seen)
+    if restored:
+        logger.info("Restored %d conversations from the call journal.", restored)
+    call_journal.start()
+    call_recorder.start()
+    sync_task = None
+    if shared_state is not None:
+        shared_state.start()
+        sync_task = asyncio.create_task(sync_shared_state())
+    yield
+    if sync_task is not None:
+        sync_task.cancel()
+        shared_state.close()
+    await asyncio.to_thread(call_journal.close)
+    await asyncio.to_thread(call_recorder.close)
+    await session_manager.close()
+    await profile_registry.close()
+    await upstream_pool.close()
+
+app = FastAPI(lifespan=lifespan)
+
+async def twilio_params(request: Request):
+    """Return the Twilio webhook parameters from the query string or form body."""
+    params = dict(request.query_params)
+    if request.method == "POST":
+        params.update(parse_qsl((await request.body()).decode()))
+    return params
+
 @app.get("/", response_class=JSONResponse)
 async def index_page():
     return {"message": "Application is running!"}
 
-@app.api_route("/incoming-call", methods=["GET", "POST"])
-async def handle_incoming_call(request: Request):
-    """Handle incoming call and return TwiML response to connect to Media Stream."""
+def incoming_call_twiml(host, profile):
+    """TwiML that greets the caller and connects the media stream; the caller number is left as PLACEHOLDER."""
     response = VoiceResponse()
     # <Say> punctuation to improve text-to-speech flow
-    response.say("Please wait while we connect your call to Medical Centre")
+    response.say(profile.hold_message)
     response.pause(length=1)
     response.say("O.K. you can start talking!")
-    host = request.url.hostname
     connect = Connect()
-    connect.stream(url=f'wss://{host}/media-stream')
+    stream = connect.stream(url=f'wss://{host}/media-stream')
+    # Twilio strips query strings from stream URLs; the caller travels as a parameter.
+    stream.parameter(name='profile', value=profile.key)
+    stream.parameter(name='caller', value=PLACEHOLDER)
     response.append(connect)
-    return HTMLResponse(content=str(response), media_type="application/xml")
+    return str(response)
+
+def overflow_twiml(message):
+    response = VoiceResponse()
+    response.say(message)
+    response.hangup()
+    return str(response)
+
+@app.api_route("/incoming-call", methods=["GET", "POST"])
+async def handle_incoming_call(request: Request):
+    """Handle incoming call and return TwiML response to connect to Media Stream."""
+    params = await twilio_params(request)
+    if not session_manager.admit(params.get('CallSid')):
+        logger.warning("Turning away call %s: %s", params.get('CallSid'), session_manager.stats())
+        template = twiml_cache.get(('overflow', OVERFLOW_MESSAGE), lambda: overflow_twiml(OVERFLOW_MESSAGE))
+        return Response(content=template.render(), media_type="application/xml")
+    # Warm up the upstream leg while Twilio plays the greeting.
+    upstream_pool.reserve(params.get('CallSid'))
+    host = request.url.hostname
+    profile = profile_registry.get(params.get('To'))
+    template = twiml_cache.get(('connect', host, profile.key), lambda: incoming_call_twiml(host, profile))
+    return Response(content=template.render(params.get('From', '')), media_type="application/xml")
+
+def parse_time(value):
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid timestamp: {value}")
+
+def parse_cursor(value):
+    if value is None:
+        return None
+    try:
+        cursor = int(value)
+    except ValueError:
+        cursor = -1
+    if cursor < 0:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {value}")
+    return cursor
+
+def conditional_json(request: Request, etag, build, headers=None):
+    """Answer 304 if the client already holds `etag`, else serialize `build()`.
+
+    Representations are a pure function of the store version they are
+    tagged with, so the ETags are strong and nothing is serialized on a hit.
+    """
+    headers = dict(headers or {}, ETag=etag)
+    if_none_match = request.headers.get('if-none-match', '')
+    if etag in (tag.strip() for tag in if_none_match.split(',')):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(build(), headers=headers)
+
+@app.get("/drain")
+async def drain_status():
+    return session_manager.stats()
+
+def require_drain_token(request: Request):
+    scheme, _, token = request.headers.get('authorization', '').partition(' ')
+    if not DRAIN_TOKEN or scheme.lower() != 'bearer' or not hmac.compare_digest(token.encode(), DRAIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Draining needs the DRAIN_TOKEN bearer token")
+
+@app.post("/drain")
+async def start_drain(request: Request, wait: float = 0):
+    """Stop admitting calls; with `wait`, return once in-flight calls finish or `wait` seconds pass."""
+    require_drain_token(request)
+    session_manager.drain()
+    logger.info("Draining: %d calls in flight", len(session_manager.sessions))
+    if wait > 0:
+        await session_manager.wait_idle(wait)
+    return session_manager.stats()
+
+@app.delete("/drain")
+async def stop_drain(request: Request):
+    require_drain_token(request)
+    session_manager.resume()
+    return session_manager.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of relay and call latency metrics."""
+    snapshots = await asyncio.to_thread(shared_state.worker_metrics) if shared_state is not None else ()
+    return PlainTextResponse(REGISTRY.render(snapshots), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats")
+async def call_stats(start: str = None, end: str = None, resolution: str = None, series: bool = False):
+    """Call counts, outcomes and latencies between `start` and `end` (default: the last 24 hours).
+
+    Read from the per-minute or per-hour rollups (`resolution`; by default
+    minutes for ranges up to 6 hours), so the cost is per bucket, not per
+    call. With `series` every bucket is listed too.
+    """
+    end_ts = parse_time(end) if end is not None else time.time()
+    start_ts = parse_time(start) if start is not None else end_ts - 24 * 3600
+    if start_ts > end_ts:
+        raise HTTPException(status_code=400, detail="start is after end")
+    if resolution is None:
+        resolution = 'minute' if end_ts - start_ts <= 6 * 3600 else 'hour'
+    elif resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of: {', '.join(RESOLUTIONS)}")
+    return {**call_rollups.query(start_ts, end_ts, resolution, series), "active": conversation_store.count('active')}
+
+@app.get("/conversations")
+async def list_conversations(request: Request, status: str = None, phone: str = None,
+                             started_after: str = None, started_before: str = None,
+                             cursor: str = None, limit: int = 50, since: int = None):
+    """List conversations newest first; the next page's cursor is in X-Next-Cursor.
+
+    With `since` (an X-Conversations-Version value) only records changed after
+    that version are returned, with removed ids in X-Removed. X-Full-Sync
+    marks a first page returned instead when that history is no longer kept.
+    """
+    version = conversation_store.version
+    headers = {"X-Conversations-Version": str(version)}
+    etag = f'"v{version}"'
+    if since is not None:
+        changed, removed = conversation_store.changed_since(since)
+        if changed is not None:
+            headers["X-Removed"] = ','.join(removed)
+            return conditional_json(request, etag, lambda: [record.to_dict() for record in changed], headers)
+        headers["X-Full-Sync"] = "1"
+    records, next_cursor = conversation_store.query(
+        status=status,
+        phone_prefix=phone,
+        started_after=parse_time(started_after),
+        started_before=parse_time(started_before),
+        cursor=parse_cursor(cursor),
+        limit=max(1, min(limit, 500)),
+    )
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return conditional_json(request, etag, lambda: [record.to_dict() for record in records], headers)
+
+@app.get("/conversations/updates")
+async def conversation_updates(request: Request, since: int = None):
+    """Conversation update feed: Server-Sent Events if requested, else a JSON poll after `since`."""
+    if 'text/event-stream' not in request.headers.get('accept', ''):
+        events = event_hub.since(since or 0)
+        return Response(content='[' + ','.join(text for _, text in events) + ']',
+                        media_type="application/json")
+
+    last_event_id = request.headers.get('last-event-id')
+    subscriber = event_hub.subscribe(int(last_event_id) if last_event_id else since)
+
+    async def stream():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.get(), UPDATES_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if event is None:
+                    return
+                yield f'id: {event[0]}\ndata: {event[1]}\n\n'
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.websocket("/conversations/updates")
+async def conversation_updates_ws(websocket: WebSocket, since: int = None):
+    """Push conversation updates to a dashboard; reconnect with `since` to resume."""
+    await websocket.accept()
+    subscriber = event_hub.subscribe(since)
+    try:
+        while True:
+            event = await subscriber.get()
+            if event is None:
+                # Too slow to keep up; the client resumes from its last seq.
+                await websocket.close(code=1013)
+                return
+            await websocket.send_text(event[1])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_hub.unsubscribe(subscriber)
+
+# Declared before /conversations/{conversation_id}, which would otherwise match "search".
+@app.get("/conversations/search")
+async def search_conversations(request: Request, q: str = '', status: str = None, phone: str = None,
+                               cursor: str = None, limit: int = 20, since: int = None):
+    """Conversations matching every term of `q`, best first; the next page's cursor is in X-Next-Cursor.
+
+    Words match what was said in the transcript and the patient and doctor
+    names; number fragments match the caller number, and `phone` filters on
+    digits anywhere in it. X-Total-Count is the number of matches, and
+    X-Conversations-Version the store version they were read at. With
+    `since`, only the records changed after that version that still match
+    `q` and `phone` are returned (whatever their status, so a client sees a
+    row leave a status filter), with removed ids in X-Removed, as for
+    /conversations.
+    """
+    if status is not None and status not in STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of: {', '.join(STATUSES)}")
+    version = conversation_store.version
+    headers = {"X-Conversations-Version": str(version)}
+    if since is not None:
+        changed, removed = conversation_store.changed_since(since)
+        if changed is not None:
+            headers["X-Removed"] = ','.join(removed)
+            matching = search_index.matching([record.id for record in changed], q, phone)
+            return conditional_json(request, f'"v{version}"', lambda: [
+                record.to_dict() for record in changed if record.id in matching], headers)
+        headers["X-Full-Sync"] = "1"
+    offset = parse_cursor(cursor) or 0
+    limit = max(1, min(limit, 500))
+    hits, total = search_index.search(q, offset, limit, status, phone)
+    headers["X-Total-Count"] = str(total)
+    if offset + limit < total:
+        headers["X-Next-Cursor"] = str(offset + limit)
+    results = []
+    for call_id, score in hits:
+        record = conversation_store.get(call_id)
+        if record is not None:
+            results.append({**record.to_dict(), "score": score})
+    return JSONResponse(results, headers=headers)
+
+@app.get("/conversations/{conversation_id}")
+async def get_conversation(request: Request, conversation_id: str):
+    record = conversation_store.get(conversation_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    transcript = conversation_store.transcript(conversation_id)
+    return conditional_json(request, f'"c{record.version}"', lambda: {
+        **record.to_dict(),
+        "transcript": [TranscriptBuffer.segment_dict(s) for s in transcript.after(0)],
+    })
+
+@app.get("/conversations/{conversation_id}/transcript")
+async def get_transcript(request: Request, conversation_id: str, after: int = 0):
+    """Return transcript segments with a sequence number greater than `after`."""
+    record = conversation_store.get(conversation_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    transcript = conversation_store.transcript(conversation_id)
+    return conditional_json(request, f'"t{record.version}"',
+                            lambda: [TranscriptBuffer.segment_dict(s) for s in transcript.after(after)])
 
 @app.websocket("/media-stream")
 async def handle_media_stream(websocket: WebSocket):
     """Handle WebSocket connections between Twilio and OpenAI."""
-    print("Client connected")
+    logger.info("Client connected")
     await websocket.accept()
 
-    async with websockets.connect(
-        OPENAI_API_ENDPOINT,
-        additional_headers={"api-key": OPENAI_API_KEY}
-    ) as openai_ws:
-        await initialize_session(openai_ws)
+    # Twilio sends `connected` then `start`; the start event names the call,
+    # which lets us pick up the upstream connection /incoming-call reserved.
+    early_messages = []
+    call_sid = None
+    caller = ''
+    profile_key = None
+    call_id = None
+    async for message in websocket.iter_text():
+        early_messages.append(message)
+        data = json.loads(message)
+        if data['event'] == 'start':
+            call_sid = data['start'].get('callSid')
+            caller = data['start'].get('customParameters', {}).get('caller', '')
+            profile_key = data['start'].get('customParameters', {}).get('profile')
+            call_id = call_sid or data['start']['streamSid']
+            break
+    if call_id is None:
+        return
+    session = session_manager.open(call_id, call_sid)
+    if session is None:
+        logger.warning("Refusing media stream for %s: %s", call_id, session_manager.stats())
+        await websocket.close(code=1013)  # try again later
+        return
+
+    log = CallLogger(logger, {"call_id": call_id})
+    profile = profile_registry.get(profile_key)
+    conversation_store.start_call(call_id, caller)
+    call_journal.append(call_id, 'twilio.start', data['start'])
+    call_recorder.start_call(call_id)
+    CALLS_STARTED.inc()
+    call_metrics = CallMetrics()
+    playback = PlaybackTracker(PLAYBACK_MARK_INTERVAL_MS)
+
+    async def send_upstream(message):
+        sent_at = time.perf_counter()
+        await openai_link.send(message)
+        call_metrics.upstream_send(sent_at)
+
+    async def resume_conversation(ws, responding):
+        """Bring a replacement upstream session up to where the call was."""
+        if session_profiles.get(ws) is not profile:
+            await initialize_session(ws, profile)
+        transcript = conversation_store.transcript(call_id)
+        for item in conversation_items(transcript.segments if transcript else (), RESUME_HISTORY_CHARS):
+            await ws.send(json.dumps(item))
+        if responding:
+            await ws.send(json.dumps({"type": "response.create"}))
+
+    async def send_twilio(text):
+        sent_at = time.perf_counter()
+        await websocket.send_text(text)
+        call_metrics.twilio_send(sent_at)
+
+    # Each direction gets its own queue and writer, so a slow socket on one
+    # side never stalls reading from the other.
+    upstream = RelayChannel(send_upstream, RELAY_UPSTREAM_QUEUE, RELAY_UPSTREAM_POLICY,
+                            UPSTREAM_QUEUE_WAIT, INBOUND_DROPPED)
+    downstream = RelayChannel(send_twilio, RELAY_TWILIO_QUEUE, 'pause', TWILIO_QUEUE_WAIT)
+    session.channels = (upstream, downstream)
+    silence_gate = SilenceGate(
+        SILENCE_GATE_THRESHOLD_DBFS,
+        hangover_ms=max(SILENCE_GATE_HANGOVER_MS, VAD_SILENCE_DURATION_MS + 200),
+        preroll_ms=max(SILENCE_GATE_PREROLL_MS, VAD_PREFIX_PADDING_MS),
+        keepalive_ms=SILENCE_GATE_KEEPALIVE_MS,
+    ) if SILENCE_GATE else None
+    openai_link = ResilientUpstream(
+        None, upstream_pool.reacquire, resume_conversation,
+        buffer_ms=UPSTREAM_OUTAGE_BUFFER_MS, reconnect_seconds=UPSTREAM_RECONNECT_SECONDS,
+        reconnect_counter=UPSTREAM_RECONNECTS, failure_counter=UPSTREAM_RECONNECT_FAILURES,
+        outage_histogram=UPSTREAM_OUTAGE, log=log,
+    )
+    call_status = 'completed'
+    twilio_done = False
+    try:
+        setup_started = time.monotonic()
+        openai_link.ws = await upstream_pool.acquire(call_sid)
+        # Pooled connections were set up with the default profile.
+        if session_profiles.get(openai_link.ws) is not profile:
+            await initialize_session(openai_link.ws, profile)
+        # Uncomment the next line to have the AI speak first
+        await send_initial_conversation_item(openai_link.ws, profile)
+        call_metrics.upstream_ready(setup_started)
+        upstream.start()
+        downstream.start()
 
         # Connection specific state
         stream_sid = None
+        media_frame = MediaFrameTemplate(stream_sid)
         latest_media_timestamp = 0
         last_assistant_item = None
-        mark_queue = []
-        response_start_timestamp_twilio = None
-        
+        inbound_batcher = InboundAudioBatcher(INBOUND_BATCH_MS, INBOUND_BATCH_BYTES)
+        appointment_parsers = {}  # (source, item_id) -> AppointmentParser
+
+        async def flush_inbound_audio():
+            audio_append = inbound_batcher.flush()
+            if audio_append:
+                await upstream.put(audio_append)
+
+        async def twilio_messages():
+            for message in early_messages:
+                yield message
+            async for message in websocket.iter_text():
+                yield message
+
         async def receive_from_twilio():
             """Receive audio data from Twilio and send it to the OpenAI Realtime API."""
-            nonlocal stream_sid, latest_media_timestamp
+            nonlocal stream_sid, media_frame, latest_media_timestamp, twilio_done
             try:
-                async for message in websocket.iter_text():
+                async for message in twilio_messages():
+                    session.touch()
                     data = json.loads(message)
                     if data['event'] == 'media':
                         latest_media_timestamp = int(data['media']['timestamp'])
-                        audio_append = {
-                            "type": "input_audio_buffer.append",
-                            "audio": data['media']['payload']
-                        }
-                        await openai_ws.send(json.dumps(audio_append))
+                        call_metrics.inbound_frame()
+                        call_recorder.inbound(call_id, latest_media_timestamp, data['media']['payload'])
+                        payloads = (silence_gate.process(data['media']['payload']) if silence_gate
+                                    else (data['media']['payload'],))
+                        if not payloads:
+                            # Gate closed: don't hold the tail of the turn in a partial batch.
+                            INBOUND_SUPPRESSED.inc()
+                            await flush_inbound_audio()
+                        for payload in payloads:
+                            audio_append = inbound_batcher.add(payload)
+                            if audio_append:
+                                await upstream.put(audio_append)
                     elif data['event'] == 'start':
                         stream_sid = data['start']['streamSid']
-                        print(f"Incoming stream has started {stream_sid}")
-                        response_start_timestamp_twilio = None
+                        media_frame = MediaFrameTemplate(stream_sid)
+                        log.bind(stream_sid=stream_sid)
+                        log.info("Incoming stream has started")
                         latest_media_timestamp = 0
-                        last_assistant_item = None
+                        playback.reset()
                     elif data['event'] == 'mark':
-                        if mark_queue:
-                            mark_queue.pop(0)
+                        await flush_inbound_audio()
+                        playback.acknowledge(data.get('mark', {}).get('name'))
+                        call_journal.append(call_id, 'twilio.mark', data.get('mark'))
+                    elif data['event'] == 'stop':
+                        twilio_done = True
+                        call_journal.append(call_id, 'twilio.stop', data.get('stop'))
+                        await flush_inbound_audio()
+                        log.info("Inbound batching: %s", inbound_batcher.stats())
             except WebSocketDisconnect:
-                print("Client disconnected.")
-                if openai_ws.open:
-                    await openai_ws.close()
+                pass
+            # iter_text() ends quietly on disconnect, so this runs either way.
+            log.info("Client disconnected.")
+            twilio_done = True
+            await openai_link.close()
 
         async def send_to_twilio():
             """Receive events from the OpenAI Realtime API, send audio back to Twilio."""
-            nonlocal stream_sid, last_assistant_item, response_start_timestamp_twilio
+            nonlocal stream_sid, last_assistant_item, call_status
             try:
-                async for openai_message in openai_ws:
-                    response = json.loads(openai_message)
+                async for response in openai_link.events():
+                    if response['type'] == RECONNECTED:
+                        # The new session has none of the old items, so there is nothing to truncate.
+                        last_assistant_item = None
+                        playback.reset()
+                        continue
                     if response['type'] in LOG_EVENT_TYPES:
-                        print(f"Received event: {response['type']}", response)
+                        log.event(event_log_policy, response)
+                    if response['type'] in JOURNAL_EVENT_TYPES:
+                        call_journal.append(call_id, response['type'], response)
 
                     if response.get('type') == 'response.audio.delta' and 'delta' in response:
-                        audio_payload = base64.b64encode(base64.b64decode(response['delta'])).decode('utf-8')
-                        audio_delta = {
-                            "event": "media",
-                            "streamSid": stream_sid,
-                            "media": {
-                                "payload": audio_payload
+                        call_metrics.outbound_frame()
+                        call_recorder.outbound(call_id, latest_media_timestamp, response['delta'])
+                        if RELAY_PASSTHROUGH:
+                            await downstream.put(media_frame.render(response['delta']))
+                        else:
+                            audio_payload = base64.b64encode(base64.b64decode(response['delta'])).decode('utf-8')
+                            audio_delta = {
+                                "event": "media",
+                                "streamSid": stream_sid,
+                                "media": {
+                                    "payload": audio_payload
+                                }
                             }
-                        }
-                        await websocket.send_json(audio_delta)
-
-                        if response_start_timestamp_twilio is None:
-                            response_start_timestamp_twilio = latest_media_timestamp
-                            if SHOW_TIMING_MATH:
-                                print(f"Setting start timestamp for new response: {response_start_timestamp_twilio}ms")
+                            await downstream.put(json.dumps(audio_delta))
 
-                        # Update last_assistant_item safely
-                        if response.get('item_id'):
+                        # Offsets are per item, so a new item starts playback tracking afresh.
+                        if response.get('item_id') and response['item_id'] != last_assistant_item:
                             last_assistant_item = response['item_id']
+                            playback.reset()
+
+                        await send_mark(playback.audio_sent(response['delta']))
+
+                    elif response.get('type') == 'response.audio.done':
+                        # Mark the tail of the response so its end is confirmed too.
+                        await send_mark(playback.flush())
+
+                    capture_transcript(response)
 
-                        await send_mark(websocket, stream_sid)
+                    # Don't hold back buffered caller audio across a turn boundary.
+                    if response.get('type') in ('input_audio_buffer.speech_started', 'input_audio_buffer.speech_stopped'):
+                        await flush_inbound_audio()
+                        if response['type'] == 'input_audio_buffer.speech_started':
+                            call_metrics.speech_started()
+                        else:
+                            call_metrics.speech_stopped()
 
                     # Trigger an interruption. Your use case might work better using input_audio_buffer.speech_stopped, or combining the two.
                     if response.get('type') == 'input_audio_buffer.speech_started':
-                        print("Speech started detected.")
+                        log.info("Speech started detected.")
                         if last_assistant_item:
-                            print(f"Interrupting response with id: {last_assistant_item}")
+                            log.info("Interrupting response with id: %s", last_assistant_item)
                             await handle_speech_started_event()
+                if not twilio_done:
+                    # Upstream is gone for good (reconnect disabled or out of budget).
+                    log.error("Upstream connection ended mid-call")
+                    call_status = 'error'
             except Exception as e:
-                print(f"Error in send_to_twilio: {e}")
+                log.error("Error in send_to_twilio: %s", e)
+                if not twilio_done:
+                    call_status = 'error'
+
+        def capture_transcript(response):
+            """Accumulate assistant and caller transcript events into the conversation record."""
+            event_type = response['type']
+            if event_type in ('response.audio_transcript.delta', 'response.text.delta',
+                              'conversation.item.input_audio_transcription.delta'):
+                conversation_store.transcript_delta(call_id, response.get('item_id'), response.get('delta', ''))
+                if event_type != 'conversation.item.input_audio_transcription.delta':
+                    extract_appointment(event_type, response)
+            elif event_type == 'response.audio_transcript.done':
+                appointment_parsers.pop(('response.audio_transcript.delta', response.get('item_id')), None)
+                conversation_store.finish_transcript(call_id, response.get('item_id'), 'ai', response.get('transcript'))
+            elif event_type == 'response.text.done':
+                appointment_parsers.pop(('response.text.delta', response.get('item_id')), None)
+                conversation_store.finish_transcript(call_id, response.get('item_id'), 'ai', response.get('text'))
+            elif event_type == 'conversation.item.input_audio_transcription.completed':
+                conversation_store.finish_transcript(call_id, response.get('item_id'), 'client', response.get('transcript'))
+
+        def extract_appointment(source, response):
+            """Feed assistant output to the appointment parser; attach the appointment as soon as its JSON closes."""
+            key = (source, response.get('item_id'))
+            parser = appointment_parsers.get(key)
+            if parser is None:
+                parser = appointment_parsers[key] = AppointmentParser()
+            appointment = parser.feed(response.get('delta', ''))
+            if appointment is None:
+                return
+            # Text and audio transcript carry the same JSON; only a new or changed appointment is an update.
+            if conversation_store.get(call_id).appointment_details != appointment:
+                log.info("Appointment captured: %s", appointment)
+                conversation_store.update(call_id, appointment_details=appointment)
 
         async def handle_speech_started_event():
             """Handle interruption when the caller's speech starts."""
-            nonlocal response_start_timestamp_twilio, last_assistant_item
-            print("Handling speech started event.")
-            if mark_queue and response_start_timestamp_twilio is not None:
-                elapsed_time = latest_media_timestamp - response_start_timestamp_twilio
+            nonlocal last_assistant_item
+            log.info("Handling speech started event.")
+            if playback.unplayed:
+                elapsed_time = playback.played_ms
                 if SHOW_TIMING_MATH:
-                    print(f"Calculating elapsed time for truncation: {latest_media_timestamp} - {response_start_timestamp_twilio} = {elapsed_time}ms")
+                    log.info("Twilio confirmed %d of %d bytes played = %dms",
+                             playback.played_bytes, playback.sent_bytes, elapsed_time)
 
                 if last_assistant_item:
                     if SHOW_TIMING_MATH:
-                        print(f"Truncating item with ID: {last_assistant_item}, Truncated at: {elapsed_time}ms")
+                        log.info("Truncating item with ID: %s, Truncated at: %dms", last_assistant_item, elapsed_time)
 
                     truncate_event = {
                         "type": "conversation.item.truncate",
@@ -165,68 +844,89 @@ async def handle_media_stream(websocket: WebSocket):
                         "content_index": 0,
                         "audio_end_ms": elapsed_time
                     }
-                    await openai_ws.send(json.dumps(truncate_event))
+                    await upstream.put(json.dumps(truncate_event), droppable=False)
 
-                await websocket.send_json({
+                # Audio still queued for Twilio is as stale as what the clear discards.
+                downstream.discard()
+                await downstream.put(json.dumps({
                     "event": "clear",
                     "streamSid": stream_sid
-                })
+                }), droppable=False)
+                call_metrics.cleared()
+                call_recorder.truncate(call_id, latest_media_timestamp)
 
-                mark_queue.clear()
+                playback.reset()
                 last_assistant_item = None
-                response_start_timestamp_twilio = None
 
-        async def send_mark(connection, stream_sid):
-            if stream_sid:
+        async def send_mark(name):
+            if name and stream_sid:
                 mark_event = {
                     "event": "mark",
                     "streamSid": stream_sid,
-                    "mark": {"name": "responsePart"}
+                    "mark": {"name": name}
                 }
-                await connection.send_json(mark_event)
-                mark_queue.append('responsePart')
+                await downstream.put(json.dumps(mark_event), droppable=False)
 
-        await asyncio.gather(receive_from_twilio(), send_to_twilio())
+        # When either side finishes, the other has nothing left to relay.
+        session.touch()
+        session.tasks = (asyncio.create_task(receive_from_twilio()), asyncio.create_task(send_to_twilio()))
+        done, pending = await asyncio.wait(session.tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            if not task.cancelled():
+                task.result()
+    except Exception:
+        call_status = 'error'
+        raise
+    finally:
+        for task in session.tasks:
+            task.cancel()
+        session_manager.close_session(session)
+        if session.reason == 'idle':
+            call_status, summary = 'error', "Call timed out waiting for audio."
+        elif session.reason == 'max_duration':
+            summary = "Call reached the maximum call length."
+        else:
+            summary = "Call completed." if call_status == 'completed' else "Call ended with an error."
+        call_recorder.end_call(call_id)
+        await upstream.close()
+        await downstream.close()
+        conversation_store.end_call(
+            call_id, call_status,
+            summary=summary,
+            metrics=dict(call_metrics.finish(), marks_sent=playback.marks_sent,
+                         upstream_queue=upstream.stats(), twilio_queue=downstream.stats(),
+                         upstream=openai_link.stats(),
+                         **({"silence_gate": silence_gate.stats()} if silence_gate else {})),
+        )
+        if openai_link.ws is not None:
+            await openai_link.close()
+        if websocket.client_state is WebSocketState.CONNECTED:
+            try:
+                await websocket.close()
+            except RuntimeError:
+                pass
 
-async def send_initial_conversation_item(openai_ws):
+async def send_initial_conversation_item(openai_ws, profile):
     """Send initial conversation item if AI talks first."""
-    initial_conversation_item = {
-        "type": "conversation.item.create",
-        "item": {
-            "type": "message",
-            "role": "user",
-            "content": [
-                {
-                    "type": "input_text",
-                    "text": "Greet the user with 'Hello there! I am Jane from Medical Centre. How can I assist you today?'"
-                }
-            ]
-        }
-    }
-    await openai_ws.send(json.dumps(initial_conversation_item))
-    await openai_ws.send(json.dumps({"type": "response.create"}))
+    await openai_ws.send(profile.greeting_item)
+    await openai_ws.send(profile.greeting_response)
 
 
-async def initialize_session(openai_ws):
+async def initialize_session(openai_ws, profile=None):
     """Control initial session with OpenAI."""
-    session_update = {
-        "type": "session.update",
-        "session": {
-            "turn_detection": {"type": "server_vad"},
-            "input_audio_format": "g711_ulaw",
-            "output_audio_format": "g711_ulaw",
-            "voice": VOICE,
-            "instructions": SYSTEM_MESSAGE,
-            "modalities": ["text", "audio"],
-            "temperature": 0.8,
-        }
-    }
-    print('Sending session update:', json.dumps(session_update))
-    await openai_ws.send(json.dumps(session_update))
-
-    # Uncomment the next line to have the AI speak first
-    await send_initial_conversation_item(openai_ws)
+    profile = profile or profile_registry.default
+    logger.debug("Sending session update for profile %s", profile.key, extra={"payload": profile.session_update})
+    await openai_ws.send(profile.session_update)
+    session_profiles[openai_ws] = profile
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=PORT)
+    if WORKERS > 1:
+        # Each worker imports app:app itself; they all start from an empty shared log.
+        SharedState.reset(SHARED_STATE_PATH)
+        uvicorn.run("app:app", host="0.0.0.0", port=PORT, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=PORT)
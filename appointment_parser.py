@@ -0,0 +1,151 @@
+import json
+import re
+
+APPOINTMENT_FIELDS = ('docname', 'name', 'phone', 'appointment_datetime')
+DOCTOR_TITLE = re.compile(r'^\s*(dr\.?|doctor)\s+', re.IGNORECASE)
+
+
+def validate_field(name, value):
+    """Return (cleaned value, error message or None) for one appointment field."""
+    if value is None:
+        return None, "missing"
+    if not isinstance(value, str):
+        value = str(value)
+    value = value.strip()
+    if not value:
+        return None, "empty"
+    if name == 'docname':
+        # The dashboard already prefixes "Dr.".
+        value = DOCTOR_TITLE.sub('', value) or value
+    elif name == 'phone':
+        digits = sum(ch.isdigit() for ch in value)
+        if not 7 <= digits <= 15:
+            return value, "not a phone number"
+    return value, None
+
+
+class AppointmentParser:
+    """Incremental scanner for the appointment JSON object in streamed model output.
+
+    `feed()` takes text or transcript deltas as they arrive. Text outside an
+    object is skipped with str.find; inside one, a small state machine tracks
+    strings, escapes and nesting, so each top-level field is validated the
+    moment its value completes (see `fields` and `errors`). When the
+    outermost object closes and carries every appointment field, `feed()`
+    returns the validated appointment; other JSON is ignored.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self.errors = {}
+        self._reset()
+
+    def _reset(self):
+        self._depth = 0
+        self._buf = []
+        self._in_string = False
+        self._escape = False
+        self._raw = []
+        self._expect = 'key'
+        self._key = None
+        self._scalar = []
+
+    def feed(self, delta):
+        """Consume a chunk of output; returns a completed appointment dict or None."""
+        result = None
+        i, n = 0, len(delta)
+        while i < n:
+            if self._depth == 0:
+                start = delta.find('{', i)
+                if start < 0:
+                    break
+                self._depth = 1
+                self._buf = ['{']
+                self.fields, self.errors = {}, {}
+                i = start + 1
+                continue
+            ch = delta[i]
+            i += 1
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._string_done(''.join(self._raw))
+                    continue
+                if self._depth == 1:
+                    self._raw.append(ch)
+            elif ch == '"':
+                self._in_string = True
+                self._raw = []
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                if self._depth == 1:
+                    self._scalar_done()
+                    appointment = self._close()
+                    if appointment is not None:
+                        result = appointment
+                else:
+                    self._depth -= 1
+            elif self._depth == 1:
+                if ch == ':':
+                    self._expect = 'value'
+                    self._scalar = []
+                elif ch == ',':
+                    self._scalar_done()
+                    self._expect = 'key'
+                elif self._expect == 'value' and not ch.isspace():
+                    self._scalar.append(ch)
+        return result
+
+    def _string_done(self, raw):
+        try:
+            text = json.loads('"' + raw + '"')
+        except ValueError:
+            text = raw
+        if self._expect == 'key':
+            self._key = text
+        else:
+            self._field(text)
+
+    def _scalar_done(self):
+        if self._expect == 'value' and self._scalar:
+            try:
+                value = json.loads(''.join(self._scalar))
+            except ValueError:
+                value = ''.join(self._scalar)
+            self._scalar = []
+            self._field(value)
+
+    def _field(self, value):
+        key, self._key = self._key, None
+        self._expect = 'done'
+        if key not in APPOINTMENT_FIELDS:
+            return
+        value, error = validate_field(key, value)
+        self.fields[key] = value
+        if error:
+            self.errors[key] = error
+        else:
+            self.errors.pop(key, None)
+
+    def _close(self):
+        text = ''.join(self._buf)
+        fields, errors = self.fields, self.errors
+        self._reset()
+        try:
+            json.loads(text)
+        except ValueError:
+            return None
+        if fields:
+            for name in APPOINTMENT_FIELDS:
+                if name not in fields:
+                    errors[name] = "missing"
+        if not fields or errors:
+            return None
+        return {name: fields[name] for name in APPOINTMENT_FIELDS}
@@ -0,0 +1,36 @@
+"""Synthetic call history and timing helpers shared by the dashboard benchmarks."""
+
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+
+def synthetic_conversations(count, seed=7):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    conversations = []
+    for i in range(count):
+        status = rng.choices(["completed", "error", "active"], weights=[90, 8, 2])[0]
+        duration = None if status == "active" else rng.randint(20, 900)
+        # Ended calls ended in the past, as the rollups only count ends that happened.
+        start = now - timedelta(seconds=rng.randint(duration or 0, 7 * 24 * 3600))
+        conversations.append({
+            "id": f"CA{i:032d}",
+            "client_phone": f"+1-555-{rng.randint(0, 9999):04d}",
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(seconds=duration)).isoformat() if duration else None,
+            "status": status,
+            "duration": duration,
+            "summary": "",
+            "appointment_details": None,
+        })
+    return conversations
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
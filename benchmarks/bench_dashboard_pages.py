@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Summary view render cost as the call history grows.
+
+For histories of increasing size (up to --calls) held in a
+ConversationStore, times what one rerun of the Summary view costs: list,
+label and render every matching card (as before paging), against the
+dashboard's way, one /conversations page read from the store's indexes at
+a cursor, labelled and rendered. Also renders a long transcript whole and
+as its newest window. Rendering here is the HTML string only; the old view
+also paid 3-5 Streamlit elements per card on top. Run from the repository
+root:
+
+    python benchmarks/bench_dashboard_pages.py [--calls 50000] [--page-size 20]
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_common import synthetic_conversations, timed
+from conversation_store import ConversationStore
+from dashboard_pages import TRANSCRIPT_WINDOW, page_cards, transcript_html, transcript_window
+from dashboard_stats import conversations_frame, time_ago_labels
+
+
+def synthetic_transcript(count):
+    start = datetime.now(timezone.utc)
+    return [{
+        "seq": i + 1,
+        "timestamp": (start + timedelta(seconds=3 * i)).isoformat(),
+        "speaker": "ai" if i % 2 else "client",
+        "message": "I'd like to book an appointment with Dr. Smith next Tuesday morning, please.",
+    } for i in range(count)]
+
+
+def synthetic_store(conversations):
+    store = ConversationStore(max_records=len(conversations), max_age=8 * 24 * 3600)
+    for i, conv in enumerate(sorted(conversations, key=lambda c: c["start_time"])):
+        start = datetime.fromisoformat(conv["start_time"]).timestamp()
+        store.start_call(conv["id"], conv["client_phone"], start_ts=start)
+        if conv["status"] != "active":
+            store.end_call(conv["id"], conv["status"], summary=f"Caller asked about appointment availability (call {i}).")
+    return store
+
+
+def render(conversations):
+    frame = conversations_frame(conversations)
+    return page_cards(conversations, range(len(conversations)),
+                      time_ago_labels(frame, np.arange(len(conversations))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=50000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--transcript", type=int, default=2000)
+    args = parser.parse_args()
+
+    all_conversations = synthetic_conversations(args.calls)
+
+    print(f"{'calls':>8} {'all cards':>12} {'one page':>12}")
+    for size in sorted({1000, 10000, args.calls}):
+        if size > args.calls:
+            continue
+        store = synthetic_store(all_conversations[:size])
+
+        def render_all():
+            records, _ = store.query(status="completed", limit=size)
+            return render([record.to_dict() for record in records])
+
+        # The third page, as reached with Next twice
+        cursor = None
+        for _ in range(2):
+            _, cursor = store.query(status="completed", cursor=cursor, limit=args.page_size)
+
+        def render_page():
+            records, _ = store.query(status="completed", cursor=cursor, limit=args.page_size)
+            return render([record.to_dict() for record in records])
+
+        all_ms, _ = timed(render_all, repeat=3)
+        page_ms, _ = timed(render_page)
+        print(f"{size:>8} {all_ms:>9.1f} ms {page_ms:>9.2f} ms")
+
+    transcript = synthetic_transcript(args.transcript)
+    full_ms, _ = timed(lambda: transcript_html(transcript))
+    window_ms, _ = timed(lambda: transcript_html(transcript_window(transcript, TRANSCRIPT_WINDOW)[0]))
+    print(f"transcript of {args.transcript}: whole {full_ms:.1f} ms, newest {TRANSCRIPT_WINDOW} {window_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
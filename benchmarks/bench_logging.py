@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: event loop latency while logging Realtime events.
+
+A producer task logs response.done-sized events at `--rate` per second
+while a ticker task measures how late its 1 ms sleeps wake up. Output goes
+to a pipe drained by a deliberately slow reader, like a busy terminal or
+log shipper. Three modes are compared:
+
+    print    the old `print(f"Received event: ...", response)`
+    logging  call_logging: queue handler, writer thread, truncated payloads
+    off      no logging at all
+
+Run from the repository root:
+
+    python benchmarks/bench_logging.py [--rate 500] [--seconds 3]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from call_logging import CallLogger, EventLogPolicy, setup_logging, stop_listener
+
+RESPONSE_DONE = {
+    "type": "response.done",
+    "event_id": "event_123",
+    "response": {
+        "id": "resp_123", "status": "completed",
+        "output": [{"id": "item_1", "type": "message", "role": "assistant",
+                    "content": [{"type": "audio", "transcript": "Hello there! " * 300}]}],
+        "usage": {"total_tokens": 1234, "input_tokens": 600, "output_tokens": 634},
+    },
+}
+
+
+def slow_sink(bytes_per_ms=2048):
+    """A line-buffered text stream over a pipe that a background thread drains slowly."""
+    read_fd, write_fd = os.pipe()
+    stop = threading.Event()
+
+    def drain():
+        while not stop.is_set():
+            try:
+                if not os.read(read_fd, bytes_per_ms):
+                    return
+            except OSError:
+                return
+            time.sleep(0.001)
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    stream = os.fdopen(write_fd, 'w', buffering=1)
+
+    def close():
+        stop.set()
+        stream.close()
+        os.close(read_fd)
+    return stream, close
+
+
+async def measure(log_event, rate, seconds):
+    lags = []
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + seconds
+
+    async def ticker():
+        while loop.time() < deadline:
+            before = loop.time()
+            await asyncio.sleep(0.001)
+            lags.append(loop.time() - before - 0.001)
+
+    async def producer():
+        interval = 1 / rate
+        next_at = loop.time()
+        while loop.time() < deadline:
+            log_event(RESPONSE_DONE)
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+
+    await asyncio.gather(ticker(), producer())
+    lags.sort()
+    return {
+        "p50_ms": round(lags[len(lags) // 2] * 1000, 3),
+        "p99_ms": round(lags[int(len(lags) * 0.99)] * 1000, 3),
+        "max_ms": round(lags[-1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rate", type=int, default=500, help="events logged per second")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    results = {}
+
+    stream, close = slow_sink()
+    def print_event(response):
+        print(f"Received event: {response['type']}", response, file=stream)
+    results["print"] = asyncio.run(measure(print_event, args.rate, args.seconds))
+    close()
+
+    stream, close = slow_sink()
+    listener = setup_logging("INFO", "json", 2048, stream=stream)
+    log = CallLogger(logging.getLogger("bench"), {"call_id": "CA123"})
+    policy = EventLogPolicy()
+    results["logging"] = asyncio.run(measure(lambda event: log.event(policy, event), args.rate, args.seconds))
+    stop_listener(listener)
+    close()
+
+    results["off"] = asyncio.run(measure(lambda event: None, args.rate, args.seconds))
+
+    print(f"{args.rate} events/s of {len(json.dumps(RESPONSE_DONE))} bytes, loop lag of a 1 ms ticker:")
+    for mode, lag in results.items():
+        print(f"  {mode:<8} p50 {lag['p50_ms']:7.3f} ms   p99 {lag['p99_ms']:7.3f} ms   max {lag['max_ms']:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
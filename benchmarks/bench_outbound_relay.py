@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-frame cost of relaying a response.audio.delta to Twilio.
+
+Compares the original decode/re-encode + send_json path with the
+pass-through MediaFrameTemplate splice. Run from the repository root:
+
+    python benchmarks/bench_outbound_relay.py
+"""
+
+import base64
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from relay import MediaFrameTemplate
+
+STREAM_SID = "MZ" + "0" * 32
+# Realtime deltas for g711_ulaw are typically a few hundred ms of audio.
+DELTA = base64.b64encode(os.urandom(8 * 200)).decode('ascii')
+UPSTREAM_MESSAGE = json.dumps({
+    "type": "response.audio.delta",
+    "event_id": "event_123",
+    "response_id": "resp_123",
+    "item_id": "item_123",
+    "output_index": 0,
+    "content_index": 0,
+    "delta": DELTA,
+})
+
+
+def legacy_frame(response):
+    """What send_to_twilio did before: round trip the payload, then send_json."""
+    audio_payload = base64.b64encode(base64.b64decode(response['delta'])).decode('utf-8')
+    audio_delta = {
+        "event": "media",
+        "streamSid": STREAM_SID,
+        "media": {
+            "payload": audio_payload
+        }
+    }
+    # Starlette's send_json serializes like this before send_text.
+    return json.dumps(audio_delta, separators=(",", ":"), ensure_ascii=False)
+
+
+def main():
+    number = int(os.getenv('BENCH_NUMBER', 200000))
+    template = MediaFrameTemplate(STREAM_SID)
+    response = json.loads(UPSTREAM_MESSAGE)
+
+    assert json.loads(template.render(response['delta'])) == json.loads(legacy_frame(response))
+
+    cases = {
+        "legacy (frame only)": lambda: legacy_frame(response),
+        "passthrough (frame only)": lambda: template.render(response['delta']),
+        "legacy (loads + frame)": lambda: legacy_frame(json.loads(UPSTREAM_MESSAGE)),
+        "passthrough (loads + frame)": lambda: template.render(json.loads(UPSTREAM_MESSAGE)['delta']),
+    }
+
+    print(f"delta size: {len(DELTA)} chars, {number} frames per case")
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=number, repeat=5))
+        print(f"{name:<30} {best / number * 1e9:8.0f} ns/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dashboard headline metrics from rollups against the call list.
+
+Feeds --calls synthetic calls spread over the last week through
+CallRollups.observe() as status events, checks the week's totals against
+dashboard_stats.compute_metrics() over the same calls, then times both,
+plus a per-hour trend series and a last-hour per-minute query. Run from
+the repository root:
+
+    python benchmarks/bench_rollups.py [--calls 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_common import synthetic_conversations, timed
+from dashboard_stats import compute_metrics, conversations_frame
+from rollups import CallRollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    conversations = synthetic_conversations(args.calls)
+    rollups = CallRollups()
+    started = time.perf_counter()
+    for conv in conversations:
+        rollups.observe(conv["id"], 'status', {**conv, "status": "active", "end_time": None})
+        if conv["status"] != "active":
+            rollups.observe(conv["id"], 'status', conv)
+    feed = time.perf_counter() - started
+
+    now = time.time()
+    frame = conversations_frame(conversations)
+    metrics = compute_metrics(frame)
+    week = rollups.query(now - 7 * 24 * 3600, now)["totals"]
+    assert week["calls"] == metrics["total_calls"], (week, metrics)
+    assert week["completed"] == metrics["completed_calls"] and week["error"] == metrics["error_calls"]
+
+    list_ms, _ = timed(lambda: compute_metrics(conversations_frame(conversations)), repeat=3)
+    frame_ms, _ = timed(lambda: compute_metrics(frame))
+    week_ms, _ = timed(lambda: rollups.query(now - 7 * 24 * 3600, now))
+    series_ms, _ = timed(lambda: rollups.query(now - 7 * 24 * 3600, now, series=True))
+    hour_ms, _ = timed(lambda: rollups.query(now - 3600, now, 'minute'))
+
+    print(f"{args.calls} calls fed in {feed * 1000:.0f} ms ({feed / args.calls * 1e6:.1f} us per call)")
+    print(f"compute_metrics incl. frame build   {list_ms:9.2f} ms")
+    print(f"compute_metrics on a built frame    {frame_ms:9.2f} ms")
+    print(f"rollups: week totals (168 hours)    {week_ms:9.3f} ms")
+    print(f"rollups: week with hourly series    {series_ms:9.3f} ms")
+    print(f"rollups: last hour (60 minutes)     {hour_ms:9.3f} ms")
+    print(week)
+
+
+if __name__ == "__main__":
+    main()
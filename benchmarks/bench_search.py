@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /conversations/search over a large synthetic call history.
+
+Feeds --calls synthetic calls (caller number, ~20 transcript segments,
+an appointment on a third of them) through SearchIndex.observe() the way
+the conversation store's listener does, checks a few queries against a
+brute-force scan, then times common, rare, multi-word, phone and name
+queries. Run from the repository root:
+
+    python benchmarks/bench_search.py [--calls 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex, parse_query, words
+
+VOCABULARY = ("appointment booking doctor morning afternoon tuesday thursday friday monday cough fever "
+              "headache prescription refill checkup insurance cancel reschedule clinic results blood "
+              "test allergy dentist pain back knee vaccine flu covid referral specialist available "
+              "earlier later week next today tomorrow please thanks address parking hours").split()
+NAMES = "smith jones patel garcia nguyen brown wilson taylor anderson thomas moore martin".split()
+FIRST = "john mary priya carlos linh james sarah david emma olivia liam noah".split()
+QUERIES = ["appointment", "refill", "prescription refill", "cough fever tuesday",
+           "555-01", "0123", "garcia", "pa", "john refill", "zzz"]
+
+
+def synthetic_calls(count, seed=11):
+    rng = random.Random(seed)
+    for i in range(count):
+        phone = f"+1-{rng.randint(200, 999)}-555-{rng.randint(0, 9999):04d}"
+        segments = []
+        for _ in range(rng.randint(8, 30)):
+            segments.append(' '.join(rng.choice(VOCABULARY) if rng.random() < 0.6 else rng.choice(["the", "i", "to", "you"])
+                                     for _ in range(rng.randint(4, 18))))
+        appointment = None
+        if rng.random() < 0.33:
+            appointment = {"name": f"{rng.choice(FIRST).title()} {rng.choice(NAMES).title()}",
+                           "docname": rng.choice(NAMES).title()}
+        yield f"CA{i:032d}", phone, segments, appointment
+
+
+def brute_force(calls, query):
+    matched = []
+    for call_id, phone, segments, appointment in calls:
+        said = set(w for s in segments for w in words(s))
+        digits = ''.join(ch for ch in phone if ch.isdigit())
+        names = ' '.join(appointment.values()).lower().split() if appointment else []
+        ok = True
+        for kind, text in parse_query(query):
+            in_field = (digits.startswith(text) if len(text) == 2 else text in digits) or \
+                any(n.startswith(text) if len(text) == 2 else text in n for n in names)
+            if not (in_field or (kind == 'word' and text in said)):
+                ok = False
+                break
+        if ok:
+            matched.append(call_id)
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    calls = list(synthetic_calls(args.calls))
+    index = SearchIndex()
+    started = time.perf_counter()
+    for call_id, phone, segments, appointment in calls:
+        index.observe(call_id, 'status', {"client_phone": phone, "status": "active"})
+        for segment in segments:
+            index.observe(call_id, 'transcript', {"message": segment})
+        if appointment:
+            index.observe(call_id, 'appointment', appointment)
+        index.observe(call_id, 'status', {"client_phone": phone, "status": "completed"})
+    build = time.perf_counter() - started
+    print(f"{args.calls} calls indexed in {build:.1f} s ({build / args.calls * 1e6:.0f} us per call)")
+    print(index.stats())
+
+    sample = calls[:5000]
+    small = SearchIndex()
+    for call_id, phone, segments, appointment in sample:
+        small.observe(call_id, 'status', {"client_phone": phone, "status": "active"})
+        for segment in segments:
+            small.observe(call_id, 'transcript', {"message": segment})
+        if appointment:
+            small.observe(call_id, 'appointment', appointment)
+    for query in QUERIES:
+        hits, total = small.search(query, limit=len(sample))
+        assert sorted(call_id for call_id, _ in hits) == sorted(brute_force(sample, query)), query
+
+    print(f"{'query':<24} {'matches':>8} {'best of 20':>12}")
+    for query in QUERIES:
+        best = float("inf")
+        for _ in range(20):
+            started = time.perf_counter()
+            hits, total = index.search(query, limit=20)
+            best = min(best, time.perf_counter() - started)
+        print(f"{query!r:<24} {total:>8} {best * 1000:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
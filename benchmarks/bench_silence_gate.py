@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark: upstream traffic with and without the inbound silence gate.
+
+Builds a synthetic caller leg of 20 ms mu-law frames: speech bursts at about
+-20 dBFS separated by pauses of line noise at about -60 dBFS, with
+`--silence` of the call spent in pauses. Every frame goes through the same
+path as receive_from_twilio (silence gate, then InboundAudioBatcher), and
+the input_audio_buffer.append messages and bytes that would reach the
+Realtime API are counted. It also checks the two things server_vad needs:
+every burst is followed by at least --vad-silence-ms of forwarded silence,
+and no burst loses its first frame.
+
+Run from the repository root:
+
+    python benchmarks/bench_silence_gate.py [--minutes 5] [--silence 0.6]
+"""
+
+import argparse
+import base64
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from relay import InboundAudioBatcher
+from silence_gate import FRAME_MS, SilenceGate, frame_dbfs
+
+SAMPLES_PER_FRAME = 8 * FRAME_MS
+
+
+def ulaw_encode(samples):
+    """16-bit linear PCM -> G.711 mu-law bytes."""
+    samples = np.clip(samples.astype(np.int32), -32635, 32635)
+    sign = np.where(samples < 0, 0x80, 0)
+    magnitude = np.abs(samples) + 0x84
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 7
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8).tobytes()
+
+
+def synthetic_call(minutes, silence_share, seed=7):
+    """Return (payloads, is_speech) for a call of alternating bursts and pauses."""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60_000 / FRAME_MS)
+    payloads, is_speech = [], []
+    speaking = False
+    while len(payloads) < total:
+        seconds = rng.uniform(1.5, 4.0)
+        if not speaking:
+            seconds *= silence_share / (1 - silence_share)
+        frames = max(1, int(seconds * 1000 / FRAME_MS))
+        level = 3200 if speaking else 32
+        for _ in range(min(frames, total - len(payloads))):
+            samples = rng.normal(0, level, SAMPLES_PER_FRAME)
+            payloads.append(base64.b64encode(ulaw_encode(samples)).decode('ascii'))
+            is_speech.append(speaking)
+        speaking = not speaking
+    return payloads, is_speech
+
+
+def relay(payloads, gate, batch_ms):
+    batcher = InboundAudioBatcher(batch_ms)
+    messages = upstream_bytes = 0
+    forwarded = []  # per input frame: payloads it released
+
+    def send(message):
+        nonlocal messages, upstream_bytes
+        if message:
+            messages += 1
+            upstream_bytes += len(message)
+
+    started = time.perf_counter()
+    for payload in payloads:
+        released = gate.process(payload) if gate else [payload]
+        if not released:
+            send(batcher.flush())
+        for item in released:
+            send(batcher.add(item))
+        forwarded.append(released)
+    send(batcher.flush())
+    elapsed = time.perf_counter() - started
+    return {"messages": messages, "bytes": upstream_bytes, "seconds": elapsed}, forwarded
+
+
+def check_vad(forwarded, is_speech, vad_silence_frames):
+    """Count bursts whose trailing silence or first frame didn't reach the upstream."""
+    short_tails = clipped_onsets = 0
+    for i in range(1, len(is_speech)):
+        if is_speech[i] and not is_speech[i - 1] and not forwarded[i]:
+            clipped_onsets += 1
+        if is_speech[i - 1] and not is_speech[i]:
+            tail = forwarded[i:i + vad_silence_frames]
+            if len(tail) == vad_silence_frames and not all(tail):
+                short_tails += 1
+    return short_tails, clipped_onsets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--minutes", type=float, default=5.0)
+    parser.add_argument("--silence", type=float, default=0.6, help="share of the call spent in pauses")
+    parser.add_argument("--batch-ms", type=int, default=60)
+    parser.add_argument("--threshold", type=float, default=-45.0)
+    parser.add_argument("--hangover-ms", type=int, default=800)
+    parser.add_argument("--keepalive-ms", type=int, default=1000)
+    parser.add_argument("--vad-silence-ms", type=int, default=500)
+    args = parser.parse_args()
+
+    payloads, is_speech = synthetic_call(args.minutes, args.silence)
+    speech_db = np.mean([frame_dbfs(base64.b64decode(p)) for p, s in zip(payloads, is_speech) if s])
+    pause_db = np.mean([frame_dbfs(base64.b64decode(p)) for p, s in zip(payloads, is_speech) if not s])
+    print(f"{len(payloads)} frames ({args.minutes:g} min), {1 - np.mean(is_speech):.0%} pauses; "
+          f"speech {speech_db:.1f} dBFS, pauses {pause_db:.1f} dBFS")
+
+    plain, _ = relay(payloads, None, args.batch_ms)
+    gate = SilenceGate(args.threshold, args.hangover_ms, keepalive_ms=args.keepalive_ms)
+    gated, forwarded = relay(payloads, gate, args.batch_ms)
+    short_tails, clipped = check_vad(forwarded, is_speech, args.vad_silence_ms // FRAME_MS)
+
+    for name, result in (("no gate", plain), ("gate", gated)):
+        print(f"  {name:<8} {result['messages']:6d} messages  {result['bytes'] / 1024:8.1f} KiB  "
+              f"{result['seconds'] / len(payloads) * 1e6:6.2f} us/frame")
+    print(f"  reduction: {1 - gated['messages'] / plain['messages']:.0%} of messages, "
+          f"{1 - gated['bytes'] / plain['bytes']:.0%} of bytes")
+    print(f"  gate: {gate.stats()}")
+    print(f"  bursts with < {args.vad_silence_ms} ms of trailing silence: {short_tails}, clipped onsets: {clipped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /incoming-call with and without the TwiML cache.
+
+Measures the TwiML step on its own (build a VoiceResponse and serialize it,
+against render a cached template), then whole webhook requests through the
+ASGI app, with the cache on and off. Calls come from a handful of caller
+numbers to the dialled numbers in call_profiles.example.json plus one
+without a profile. Run from the repository root:
+
+    python benchmarks/bench_twiml.py [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ.update(UPSTREAM_POOL_MAX="0", CALL_JOURNAL_DIR="", LOG_LEVEL="WARNING",
+                  CALL_PROFILES_PATH=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                  "call_profiles.example.json"))
+
+import httpx
+
+import app
+from twiml_cache import PLACEHOLDER
+
+
+def calls(count):
+    for i in range(count):
+        yield {"CallSid": f"CA{i:032d}", "From": f"+1555{i % 97:07d}", "To": f"+155512300{i % 3:02d}"}
+
+
+def bench_render(count):
+    params = list(calls(count))
+    started = time.perf_counter()
+    for p in params:
+        profile = app.profile_registry.get(p["To"])
+        app.incoming_call_twiml("example.ngrok.app", profile).replace(PLACEHOLDER, p["From"]).encode()
+    build = time.perf_counter() - started
+    started = time.perf_counter()
+    for p in params:
+        profile = app.profile_registry.get(p["To"])
+        app.twiml_cache.get(("connect", "example.ngrok.app", profile.key),
+                            lambda: app.incoming_call_twiml("example.ngrok.app", profile)).render(p["From"])
+    cached = time.perf_counter() - started
+    return build / count * 1e6, cached / count * 1e6
+
+
+async def bench_webhook(count, cache_size):
+    app.twiml_cache.max_entries = cache_size
+    app.twiml_cache.invalidate()
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://example.ngrok.app") as client:
+        started = time.perf_counter()
+        for p in calls(count):
+            response = await client.post("/incoming-call", data=p)
+            assert response.status_code == 200 and b"<Stream" in response.content
+        elapsed = time.perf_counter() - started
+    app.session_manager._reserved.clear()
+    return elapsed / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    app.profile_registry.load()
+
+    build_us, cached_us = bench_render(args.requests)
+    print(f"TwiML per call:   build {build_us:7.1f} us   cached {cached_us:7.2f} us   ({build_us / cached_us:.0f}x)")
+    off = asyncio.run(bench_webhook(args.requests, 0))
+    on = asyncio.run(bench_webhook(args.requests, 256))
+    print(f"webhook request:  no cache {off:7.1f} us   cache {on:7.1f} us   ({1 - on / off:.0%} less time)")
+    print(f"cache: {app.twiml_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
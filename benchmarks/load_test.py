@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Load test: how many simultaneous calls handle_media_stream sustains.
+
+Starts the mock Realtime server and `python app.py`, then runs rounds of N
+concurrent synthetic Twilio callers. Each caller streams paced 20 ms
+mu-law frames between start and stop, and echoes marks once the audio
+before them would have finished playing. Every `--turn-ms` of caller audio
+the mock ends a speech turn, so the caller can time the round trip from
+the last frame of the turn to the first response frame.
+
+Each round reports:
+- p50/p99 round-trip latency;
+- the app's CPU per frame relayed (inbound plus outbound) and per call;
+- the callers' own pacing lag, which makes a result invalid once it is
+  large.
+
+The concurrency ceiling is the largest N that stays within `--max-p99-ms`
+without failed calls. Results go to stdout, and to `--output` if given, as
+JSON for regression tracking. Run from the repository root:
+
+    python benchmarks/load_test.py [--levels 5,10,20,40] [--seconds 10] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+
+from load_workers import metric_value, process_tree_cpu, wait_for_http
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRAME_MS = 20
+FRAME_BYTES = 160  # 20 ms of 8 kHz mu-law
+SILENCE = base64.b64encode(b"\xff" * FRAME_BYTES).decode()
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SyntheticCaller:
+    """One simulated Twilio Media Streams connection."""
+
+    def __init__(self, port, call_sid, seconds, turn_ms):
+        self.port = port
+        self.call_sid = call_sid
+        self.stream_sid = "MZ" + call_sid[2:]
+        self.frames = seconds * 1000 // FRAME_MS
+        self.turn_frames = max(1, turn_ms // FRAME_MS)
+        self.latencies = []
+        self.lag = []
+        self.media_in = 0
+        self.clears = 0
+        self.error = None
+        self._turn_ended = None
+        self._played_until = 0.0
+        self._marks = set()
+
+    async def run(self):
+        try:
+            await asyncio.to_thread(self._incoming_call)
+            async with websockets.connect(f"ws://127.0.0.1:{self.port}/media-stream") as ws:
+                await ws.send(json.dumps({"event": "connected", "protocol": "Call", "version": "1.0.0"}))
+                await ws.send(json.dumps({"event": "start", "sequenceNumber": "1", "start": {
+                    "streamSid": self.stream_sid, "callSid": self.call_sid,
+                    "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": 8000, "channels": 1},
+                    "customParameters": {"caller": "+15550100"}}, "streamSid": self.stream_sid}))
+                receiver = asyncio.create_task(self._receive(ws))
+                await self._send_media(ws)
+                await ws.send(json.dumps({"event": "stop", "streamSid": self.stream_sid,
+                                          "stop": {"callSid": self.call_sid}}))
+                receiver.cancel()
+                for mark in self._marks:
+                    mark.cancel()
+        except Exception as e:
+            self.error = repr(e)
+
+    def _incoming_call(self):
+        body = f"CallSid={self.call_sid}&From=%2B15550100&To=%2B15550199".encode()
+        urllib.request.urlopen(f"http://127.0.0.1:{self.port}/incoming-call", data=body, timeout=10).read()
+
+    async def _send_media(self, ws):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for i in range(self.frames):
+            due = started + i * FRAME_MS / 1000
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.lag.append(-delay)
+            await ws.send('{"event":"media","streamSid":"%s","media":{"track":"inbound","chunk":"%d",'
+                          '"timestamp":"%d","payload":"%s"}}' % (self.stream_sid, i + 1, i * FRAME_MS, SILENCE))
+            if (i + 1) % self.turn_frames == 0:
+                self._turn_ended = loop.time()
+
+    async def _receive(self, ws):
+        loop = asyncio.get_running_loop()
+        async for message in ws:
+            data = json.loads(message)
+            event = data.get("event")
+            now = loop.time()
+            if event == "media":
+                self.media_in += 1
+                if self._turn_ended is not None:
+                    self.latencies.append(now - self._turn_ended)
+                    self._turn_ended = None
+                audio_ms = len(base64.b64decode(data["media"]["payload"])) / 8
+                self._played_until = max(self._played_until, now) + audio_ms / 1000
+            elif event == "mark":
+                # Twilio echoes a mark once everything queued before it has played.
+                self._echo_at(ws, self._played_until, data["mark"])
+            elif event == "clear":
+                self.clears += 1
+                self._played_until = now
+
+    def _echo_at(self, ws, when, mark):
+        async def echo():
+            await asyncio.sleep(max(0.0, when - asyncio.get_running_loop().time()))
+            await ws.send(json.dumps({"event": "mark", "streamSid": self.stream_sid, "mark": mark}))
+            self._marks.discard(task)
+        task = asyncio.create_task(echo())
+        self._marks.add(task)
+
+
+def caller_process(port, call_sids, seconds, turn_ms):
+    """Run a share of the callers in this process and return their raw results."""
+    async def main():
+        callers = [SyntheticCaller(port, sid, seconds, turn_ms) for sid in call_sids]
+        await asyncio.gather(*(caller.run() for caller in callers))
+        return callers
+    callers = asyncio.run(main())
+    return [{"latencies": c.latencies, "lag": c.lag, "media_in": c.media_in,
+             "clears": c.clears, "error": c.error} for c in callers]
+
+
+def scrape(port):
+    text = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=10).read().decode()
+    return {name: metric_value(text, name) or 0.0
+            for name in ("relay_inbound_frames_total", "relay_outbound_frames_total", "calls_started_total")}
+
+
+def run_level(port, server_pid, level, calls, seconds, turn_ms, pool):
+    processes = min(calls, os.cpu_count() or 1)
+    sids = [f"CA{level:03d}{i:06d}" for i in range(calls)]
+    shares = [sids[p::processes] for p in range(processes)]
+    before, cpu_before = scrape(port), process_tree_cpu(server_pid)
+    started = time.perf_counter()
+    results = [r for share in pool.starmap(caller_process, [(port, share, seconds, turn_ms) for share in shares])
+               for r in share]
+    elapsed = time.perf_counter() - started
+    time.sleep(0.5)  # let the server finish tearing the calls down
+    after, cpu = scrape(port), process_tree_cpu(server_pid) - cpu_before
+
+    latencies = [x for r in results for x in r["latencies"]]
+    lag = [x for r in results for x in r["lag"]]
+    frames = ((after["relay_inbound_frames_total"] - before["relay_inbound_frames_total"])
+              + (after["relay_outbound_frames_total"] - before["relay_outbound_frames_total"]))
+    return {
+        "calls": calls,
+        "failed": sum(1 for r in results if r["error"]),
+        "errors": sorted({r["error"] for r in results if r["error"]})[:3],
+        "elapsed_s": round(elapsed, 2),
+        "turns": len(latencies),
+        "rtt_p50_ms": round(percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+        "rtt_p99_ms": round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+        "frames_relayed": int(frames),
+        "relay_us_per_frame": round(cpu / frames * 1e6, 1) if frames else None,
+        "cpu_per_call_pct": round(cpu / (calls * seconds) * 100, 2),
+        "app_cpu_s": round(cpu, 2),
+        "clears": sum(r["clears"] for r in results),
+        "caller_lag_p99_ms": round(percentile(lag, 0.99) * 1000, 1) if lag else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--levels", default="5,10,20,40", help="comma-separated concurrent call counts")
+    parser.add_argument("--seconds", type=int, default=10, help="call length")
+    parser.add_argument("--turn-ms", type=int, default=2000, help="caller audio per speech turn")
+    parser.add_argument("--response-ms", type=int, default=1000, help="mock response audio length")
+    parser.add_argument("--max-p99-ms", type=float, default=300.0, help="round-trip budget for the ceiling")
+    parser.add_argument("--max-lag-ms", type=float, default=50.0, help="caller pacing lag that invalidates a round")
+    parser.add_argument("--port", type=int, default=5080)
+    parser.add_argument("--mock-port", type=int, default=8768)
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PORT=str(args.port), OPENAI_API_KEY="bench", CALL_JOURNAL_DIR="",
+               OPENAI_API_ENDPOINT=f"ws://127.0.0.1:{args.mock_port}")
+    mock = subprocess.Popen([sys.executable, "benchmarks/mock_realtime.py", "--port", str(args.mock_port),
+                             "--turn-ms", str(args.turn_ms), "--response-ms", str(args.response_ms)],
+                            cwd=ROOT, stdout=subprocess.DEVNULL)
+    server = subprocess.Popen([sys.executable, "app.py"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    rounds = []
+    ceiling = 0
+    try:
+        wait_for_http(f"http://127.0.0.1:{args.port}/")
+        with multiprocessing.Pool(os.cpu_count() or 1) as pool:
+            for level, calls in enumerate(int(n) for n in args.levels.split(",")):
+                result = run_level(args.port, server.pid, level, calls, args.seconds, args.turn_ms, pool)
+                result["client_bound"] = result["caller_lag_p99_ms"] > args.max_lag_ms
+                result["within_budget"] = (not result["failed"] and result["rtt_p99_ms"] is not None
+                                           and result["rtt_p99_ms"] <= args.max_p99_ms)
+                rounds.append(result)
+                print(json.dumps(result), file=sys.stderr)
+                if result["client_bound"] or not result["within_budget"]:
+                    break
+                ceiling = calls
+    finally:
+        server.terminate()
+        server.wait()
+        mock.terminate()
+        mock.wait()
+
+    report = {
+        "benchmark": "load_test",
+        "cores": os.cpu_count(),
+        "config": {"seconds": args.seconds, "turn_ms": args.turn_ms, "response_ms": args.response_ms,
+                   "max_p99_ms": args.max_p99_ms},
+        "rounds": rounds,
+        # A ceiling set by the callers or the mock rather than the app is only a lower bound.
+        "concurrency_ceiling": ceiling,
+        "ceiling_is_lower_bound": bool(rounds) and (rounds[-1]["client_bound"] or rounds[-1]["within_budget"]),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
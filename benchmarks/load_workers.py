@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Load test: media-stream throughput with one and several app.py workers.
+
+For each worker count, starts the mock Realtime server and `python app.py`
+with WORKERS=n, then pushes `--calls` concurrent synthetic Twilio streams
+through it as fast as the server accepts them (client processes are spread
+over the available cores). Reports inbound frames per second, the same as
+real-time call equivalents (50 frames/s per call), the app's CPU time
+during the run (Linux /proc) and calls per core. It also checks that /conversations and /metrics on a
+single worker account for the calls served by every worker. Run from the
+repository root:
+
+    python benchmarks/load_workers.py [--workers 1,2,4] [--calls 40] [--frames 1500]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import websockets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRAMES_PER_SECOND = 50  # Twilio sends a 20 ms frame every 20 ms
+MEDIA = json.dumps({"event": "media", "media": {"timestamp": "0",
+                                                "payload": base64.b64encode(b"\x7f" * 160).decode()}})
+
+
+async def run_call(port, call_sid, frames):
+    async with websockets.connect(f"ws://127.0.0.1:{port}/media-stream", max_queue=None) as ws:
+        await ws.send(json.dumps({"event": "connected"}))
+        await ws.send(json.dumps({"event": "start", "start": {
+            "streamSid": f"MZ{call_sid}", "callSid": call_sid, "customParameters": {"caller": "+15550100"}}}))
+
+        async def drain():
+            async for message in ws:
+                if '"mark"' in message:
+                    await ws.send(message)
+
+        drainer = asyncio.create_task(drain())
+        for i in range(frames):
+            await ws.send(MEDIA)
+            if i % 25 == 0:
+                await asyncio.sleep(0)
+        await ws.send(json.dumps({"event": "stop"}))
+        drainer.cancel()
+
+
+def client_process(port, call_sids, frames):
+    async def main():
+        await asyncio.gather(*(run_call(port, sid, frames) for sid in call_sids))
+    asyncio.run(main())
+
+
+def wait_for_http(url, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return urllib.request.urlopen(url, timeout=2).read()
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def process_tree_cpu(pid):
+    """CPU seconds used so far by `pid` and its direct children (the uvicorn workers), from /proc."""
+    pids = [pid]
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            if int(fields[1]) == pid:
+                pids.append(int(entry))
+    ticks = 0
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        ticks += int(fields[11]) + int(fields[12])
+    return ticks / os.sysconf("SC_CLK_TCK")
+
+
+def get_json(url):
+    return json.loads(urllib.request.urlopen(url, timeout=5).read())
+
+
+def metric_value(text, name):
+    for line in text.splitlines():
+        if line.startswith(name + ' '):
+            return float(line.split()[1])
+    return None
+
+
+def run(workers, calls, frames, port, mock_port):
+    env = dict(os.environ, WORKERS=str(workers), PORT=str(port), OPENAI_API_KEY="bench",
+               OPENAI_API_ENDPOINT=f"ws://127.0.0.1:{mock_port}", UPSTREAM_POOL_MIN="0",
+               SHARED_STATE_PATH=os.path.join(tempfile.mkdtemp(), "shared_state.db"))
+    mock = subprocess.Popen([sys.executable, "benchmarks/mock_realtime.py", "--port", str(mock_port),
+                             "--turn-ms", "600000"], cwd=ROOT, stdout=subprocess.DEVNULL)
+    server = subprocess.Popen([sys.executable, "app.py"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_http(f"http://127.0.0.1:{port}/")
+        time.sleep(1)  # let every worker finish its lifespan startup
+
+        clients = min(calls, os.cpu_count() or 1)
+        shares = [[f"CA{workers}x{i:05d}" for i in range(c, calls, clients)] for c in range(clients)]
+        cpu_before = process_tree_cpu(server.pid)
+        started = time.perf_counter()
+        procs = [multiprocessing.Process(target=client_process, args=(port, share, frames)) for share in shares]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        elapsed = time.perf_counter() - started
+        cpu = process_tree_cpu(server.pid) - cpu_before
+
+        # Any one worker should see every call once the shared log has been applied.
+        deadline = time.monotonic() + 15
+        completed = 0
+        while time.monotonic() < deadline:
+            completed = len([c for c in get_json(f"http://127.0.0.1:{port}/conversations?limit=500")
+                             if c["status"] != "active"])
+            if completed >= calls:
+                break
+            time.sleep(0.5)
+        time.sleep(2.5)  # next metrics snapshot from each worker
+        started_total = metric_value(urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode(),
+                                     "calls_started_total")
+    finally:
+        server.terminate()
+        server.wait()
+    mock.terminate()
+    mock.wait()
+
+    fps = calls * frames / elapsed
+    return {
+        "workers": workers,
+        "calls": calls,
+        "elapsed_s": round(elapsed, 2),
+        "frames_per_s": round(fps),
+        "realtime_calls": round(fps / FRAMES_PER_SECOND, 1),
+        "app_cpu_s": round(cpu, 2),
+        "calls_per_core": round(calls * frames / FRAMES_PER_SECOND / cpu, 1) if cpu else None,
+        "conversations_seen": completed,
+        "calls_started_metric": started_total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--frames", type=int, default=1500)
+    parser.add_argument("--port", type=int, default=5070)
+    parser.add_argument("--mock-port", type=int, default=8766)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores, {args.calls} calls x {args.frames} frames")
+    for workers in (int(w) for w in args.workers.split(",")):
+        result = run(workers, args.calls, args.frames, args.port, args.mock_port)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
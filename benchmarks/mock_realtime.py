@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Local mock of the Realtime WebSocket API for exercising app.py without Azure.
+
+Answers session.update, conversation.item.create and response.create with
+the same event shapes as the real service and streams scripted g711_ulaw
+audio deltas back, followed by rate_limits.updated after each response. Point the app at it with:
+
+    python benchmarks/mock_realtime.py --port 8765
+    OPENAI_API_ENDPOINT=ws://localhost:8765 python app.py
+
+--drop-after-ms cuts a connection (no close frame) once it has received
+that much caller audio, to exercise upstream reconnects; --outage-ms then
+refuses new handshakes for a while, and --max-drops bounds how many
+connections are cut.
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+
+import websockets
+
+_ids = itertools.count(1)
+
+
+def event(type_, **fields):
+    return json.dumps({"type": type_, "event_id": f"event_{next(_ids)}", **fields})
+
+
+class MockRealtimeServer:
+    """Scripted Realtime endpoint.
+
+    Every `turn_ms` of appended caller audio is treated as one spoken turn:
+    speech_started/speech_stopped are emitted around it and answered with a
+    response of `response_ms` audio split into `delta_ms` deltas. The reply
+    to caller turn `appointment_turn` is the appointment JSON the system
+    prompt asks for.
+    """
+
+    RESPONSE_TEXT = "Hello there! I am Jane from Medical Centre. How can I assist you today?"
+    CALLER_TEXT = "Hi, I would like to schedule an appointment."
+    APPOINTMENT_TEXT = json.dumps({"docname": "Smith", "name": "Jane Doe", "phone": "+1-555-0100",
+                                   "appointment_datetime": "Tuesday 3:00 PM"}, indent=2)
+
+    def __init__(self, response_ms=1000, delta_ms=100, turn_ms=2000, pace=True, appointment_turn=2,
+                 drop_after_ms=0, outage_ms=0, max_drops=1):
+        self.response_ms = response_ms
+        self.delta_ms = delta_ms
+        self.turn_ms = turn_ms
+        self.pace = pace
+        self.appointment_turn = appointment_turn
+        self.drop_after_ms = drop_after_ms
+        self.outage_ms = outage_ms
+        self.max_drops = max_drops
+        self.drops = 0
+        self.refused = 0
+        self._unavailable_until = 0.0
+        self.connections = 0
+        self.messages_in = 0
+        self.audio_bytes_in = 0
+
+    async def handler(self, ws):
+        self.connections += 1
+        session = {"id": f"sess_{next(_ids)}"}
+        await ws.send(event("session.created", session=session))
+        state = {"buffered_ms": 0.0, "speaking": False, "responding": None, "turns": 0, "audio_ms": 0.0}
+        try:
+            async for message in ws:
+                self.messages_in += 1
+                await self.on_message(ws, json.loads(message), session, state)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            if state["responding"]:
+                state["responding"].cancel()
+
+    async def on_message(self, ws, data, session, state):
+        kind = data.get("type")
+        if kind == "session.update":
+            session.update(data.get("session", {}))
+            await ws.send(event("session.updated", session=session))
+        elif kind == "conversation.item.create":
+            item = dict(data.get("item", {}), id=f"item_{next(_ids)}")
+            await ws.send(event("conversation.item.created", item=item))
+        elif kind == "response.create":
+            self.start_response(ws, state)
+        elif kind == "input_audio_buffer.append":
+            chunk = base64.b64decode(data["audio"])
+            self.audio_bytes_in += len(chunk)
+            state["buffered_ms"] += len(chunk) / 8
+            state["audio_ms"] += len(chunk) / 8
+            if self.drop_after_ms and state["audio_ms"] >= self.drop_after_ms and self.drops < self.max_drops:
+                self.drops += 1
+                self._unavailable_until = asyncio.get_running_loop().time() + self.outage_ms / 1000
+                ws.transport.abort()
+                return
+            if not state["speaking"] and state["buffered_ms"] >= self.turn_ms / 4:
+                state["speaking"] = True
+                await ws.send(event("input_audio_buffer.speech_started", audio_start_ms=0, item_id=f"item_{next(_ids)}"))
+            if state["speaking"] and state["buffered_ms"] >= self.turn_ms:
+                state["speaking"] = False
+                state["buffered_ms"] = 0.0
+                await ws.send(event("input_audio_buffer.speech_stopped", audio_end_ms=self.turn_ms))
+                item_id = f"item_{next(_ids)}"
+                await ws.send(event("input_audio_buffer.committed", item_id=item_id))
+                await ws.send(event("conversation.item.input_audio_transcription.completed",
+                                    item_id=item_id, content_index=0, transcript=self.CALLER_TEXT))
+                state["turns"] += 1
+                self.start_response(ws, state,
+                                    self.APPOINTMENT_TEXT if state["turns"] == self.appointment_turn else None)
+        elif kind == "conversation.item.truncate":
+            await ws.send(event("conversation.item.truncated", item_id=data.get("item_id"),
+                                content_index=0, audio_end_ms=data.get("audio_end_ms")))
+
+    def start_response(self, ws, state, text=None):
+        if state["responding"]:
+            state["responding"].cancel()
+        state["responding"] = asyncio.create_task(self.respond(ws, text or self.RESPONSE_TEXT))
+
+    async def respond(self, ws, text):
+        response_id = f"resp_{next(_ids)}"
+        item_id = f"item_{next(_ids)}"
+        delta = base64.b64encode(b"\xff" * int(self.delta_ms * 8)).decode("ascii")
+        await ws.send(event("response.created", response={"id": response_id}))
+        deltas = max(1, self.response_ms // self.delta_ms)
+        words = text.split(" ")
+        for i in range(deltas):
+            await ws.send(event("response.audio.delta", response_id=response_id, item_id=item_id,
+                                output_index=0, content_index=0, delta=delta))
+            text = " ".join(words[i * len(words) // deltas:(i + 1) * len(words) // deltas])
+            if text:
+                await ws.send(event("response.audio_transcript.delta", response_id=response_id, item_id=item_id,
+                                    output_index=0, content_index=0, delta=text + " "))
+            if self.pace:
+                await asyncio.sleep(self.delta_ms / 1000)
+        await ws.send(event("response.audio.done", response_id=response_id, item_id=item_id))
+        await ws.send(event("response.audio_transcript.done", response_id=response_id, item_id=item_id,
+                            output_index=0, content_index=0, transcript=text))
+        await ws.send(event("response.done", response={"id": response_id, "status": "completed"}))
+        await ws.send(event("rate_limits.updated", rate_limits=[
+            {"name": "requests", "limit": 1000, "remaining": 999, "reset_seconds": 60},
+            {"name": "tokens", "limit": 100000, "remaining": 99500, "reset_seconds": 60},
+        ]))
+
+    def process_request(self, connection, request):
+        if asyncio.get_running_loop().time() < self._unavailable_until:
+            self.refused += 1
+            return connection.respond(503, "Service unavailable\n")
+        return None
+
+    async def serve(self, host, port):
+        return await websockets.serve(self.handler, host, port, process_request=self.process_request)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--response-ms", type=int, default=1000)
+    parser.add_argument("--turn-ms", type=int, default=2000)
+    parser.add_argument("--drop-after-ms", type=int, default=0, help="cut connections after this much caller audio")
+    parser.add_argument("--outage-ms", type=int, default=0, help="refuse handshakes this long after a cut")
+    parser.add_argument("--max-drops", type=int, default=1)
+    args = parser.parse_args()
+
+    server = MockRealtimeServer(response_ms=args.response_ms, turn_ms=args.turn_ms,
+                                drop_after_ms=args.drop_after_ms, outage_ms=args.outage_ms,
+                                max_drops=args.max_drops)
+    async with await server.serve(args.host, args.port):
+        print(f"Mock Realtime server listening on ws://{args.host}:{args.port}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,234 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = 'journal-'
+SEGMENT_SUFFIX = '.jsonl'
+
+
+def segment_paths(directory):
+    """Journal segments in `directory`, oldest first (names start with a millisecond timestamp)."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name) for name in sorted(names)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)]
+
+
+def read_segment(path):
+    """Yield (ts, call_id, event, data) from one segment.
+
+    A line that doesn't parse (the torn tail of a segment that was being
+    written during a crash) is skipped.
+    """
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                yield entry['t'], entry['call'], entry['event'], entry.get('data')
+            except (ValueError, KeyError):
+                continue
+
+
+def read_journal(directory):
+    """Yield (ts, call_id, event, data) from every segment, oldest first."""
+    for path in segment_paths(directory):
+        yield from read_segment(path)
+
+
+class CallJournal:
+    """Append-only per-call event journal in JSONL segments.
+
+    `append()` only puts onto a queue; a writer thread serializes batches,
+    writes them and fsyncs at most every `fsync_interval` seconds, so no disk
+    I/O happens on the event loop. A segment is closed once it reaches
+    `segment_bytes` and segments older than `max_age` seconds are deleted on
+    rotation. An empty `directory` disables the journal.
+    """
+
+    def __init__(self, directory, fsync_interval=1.0, segment_bytes=64 * 1024 * 1024,
+                 max_age=7 * 24 * 3600, batch_size=1000):
+        self.directory = directory
+        self.enabled = bool(directory)
+        self.fsync_interval = fsync_interval
+        self.segment_bytes = segment_bytes
+        self.max_age = max_age
+        self.batch_size = batch_size
+        # Set while restore() replays, so the replayed changes aren't journaled again.
+        self.restoring = False
+        self.appended = 0
+        self.written = 0
+        self.fsyncs = 0
+        self.segments = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._file = None
+        self._size = 0
+
+    def start(self):
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='call-journal-writer', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Write and fsync everything queued, then stop the writer."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def append(self, call_id, event, data=None):
+        if self.enabled:
+            self.appended += 1
+            self._queue.put((time.time(), call_id, event, data))
+
+    def load(self):
+        """Yield the record and transcript entries restore() needs, one list per segment.
+
+        Blocking; have a thread pull each segment so only one is in memory at a time.
+        """
+        if not self.enabled:
+            return
+        for path in segment_paths(self.directory):
+            try:
+                yield [entry for entry in read_segment(path) if entry[2] in ('record', 'transcript')]
+            except FileNotFoundError:
+                continue
+
+    def restore(self, store, segments):
+        """Rebuild conversation records and transcripts into `store` from load()'s segments.
+
+        Calls that were still active when the journal stops (the process
+        died mid-call) are closed out as errors. Returns the number of calls.
+        """
+        last_seen = {}
+        for entries in segments:
+            self.replay(store, entries, last_seen)
+        return self.close_interrupted(store, last_seen)
+
+    def replay(self, store, entries, last_seen):
+        """Apply one segment's entries to `store`, noting each call's last timestamp in `last_seen`."""
+        self.restoring = True
+        try:
+            for ts, call_id, event, data in entries:
+                if event == 'record':
+                    store.replicate(call_id, data)
+                elif event == 'transcript':
+                    store.add_transcript(call_id, data['speaker'], data['message'],
+                                         datetime.fromisoformat(data['timestamp']).timestamp())
+                last_seen[call_id] = ts
+        finally:
+            self.restoring = False
+
+    def close_interrupted(self, store, last_seen):
+        """Close out calls still active at their last journal entry; returns the number of calls seen."""
+        self.restoring = True
+        try:
+            for call_id, ts in last_seen.items():
+                record = store.get(call_id)
+                if record is not None and record.status == 'active':
+                    store.update(call_id, status='error', end_ts=ts, summary="Call interrupted by a restart.")
+        finally:
+            self.restoring = False
+        return len(last_seen)
+
+    def stats(self):
+        return {
+            "appended": self.appended,
+            "written": self.written,
+            "pending": self._queue.qsize(),
+            "fsyncs": self.fsyncs,
+            "segments": self.segments,
+        }
+
+    def _run(self):
+        last_sync = time.monotonic()
+        dirty = False
+        try:
+            while True:
+                try:
+                    batch = [self._queue.get(timeout=self.fsync_interval)]
+                except queue.Empty:
+                    batch = []
+                while batch and len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in batch
+                entries = [entry for entry in batch if entry is not None]
+                if entries:
+                    self._write(entries)
+                    dirty = True
+                if dirty and (stop or time.monotonic() - last_sync >= self.fsync_interval):
+                    self._sync()
+                    dirty = False
+                    last_sync = time.monotonic()
+                if stop:
+                    return
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write(self, entries):
+        data = ''.join(
+            json.dumps({"t": ts, "call": call_id, "event": event, "data": data},
+                       separators=(',', ':'), default=str) + '\n'
+            for ts, call_id, event, data in entries
+        ).encode()
+        try:
+            if self._file is None or self._size >= self.segment_bytes:
+                self._rotate()
+            self._file.write(data)
+        except (OSError, ValueError) as e:
+            logger.warning("Call journal write failed: %s", e)
+            return
+        self._size += len(data)
+        self.written += len(entries)
+
+    def _sync(self):
+        if self._file is None:
+            return
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.fsyncs += 1
+        except (OSError, ValueError) as e:
+            logger.warning("Call journal fsync failed: %s", e)
+
+    def _rotate(self):
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            # Until the next segment opens there is no file; a failed open is retried on the next write.
+            self._file = None
+        name = f"{SEGMENT_PREFIX}{int(time.time() * 1000):013d}-{os.getpid()}{SEGMENT_SUFFIX}"
+        self._file = open(os.path.join(self.directory, name), 'ab')
+        self._size = 0
+        self.segments += 1
+        # Make the new directory entry durable too.
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._prune()
+
+    def _prune(self):
+        horizon = time.time() - self.max_age
+        for path in segment_paths(self.directory)[:-1]:
+            try:
+                if os.path.getmtime(path) < horizon:
+                    os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,166 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+# Fields added to records through `extra=` that the formatters know how to print.
+CALL_FIELDS = ('call_id', 'stream_sid', 'event_type', 'payload')
+
+
+def truncate(value, limit):
+    """JSON text of `value`, cut to `limit` characters with a note of how much was dropped."""
+    text = value if isinstance(value, str) else json.dumps(value, separators=(',', ':'), default=str)
+    if limit and len(text) > limit:
+        return f"{text[:limit]}...(+{len(text) - limit} chars)"
+    return text
+
+
+def parse_overrides(spec, convert):
+    """'a=1,b=2' -> {'a': convert('1'), 'b': convert('2')}; malformed entries are skipped."""
+    overrides = {}
+    for item in (spec or '').split(','):
+        name, sep, value = item.partition('=')
+        if sep and name.strip():
+            try:
+                overrides[name.strip()] = convert(value.strip())
+            except ValueError:
+                continue
+    return overrides
+
+
+def parse_level(name):
+    level = logging.getLevelName(name.upper())
+    if not isinstance(level, int):
+        raise ValueError(name)
+    return level
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread.
+
+    The stock prepare() renders the message (and here a payload) on the
+    calling thread, which is the event loop; records are only copied here.
+    """
+
+    dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredFormatter(logging.Formatter):
+    """One line per record: JSON objects, or `text` lines with key=value call fields."""
+
+    def __init__(self, fmt='json', max_payload=2048):
+        super().__init__()
+        self.fmt = fmt
+        self.max_payload = max_payload
+
+    def format(self, record):
+        fields = {name: getattr(record, name) for name in CALL_FIELDS if getattr(record, name, None) is not None}
+        if 'payload' in fields:
+            fields['payload'] = truncate(fields['payload'], self.max_payload)
+        message = record.getMessage()
+        if record.exc_info:
+            message = f"{message}\n{self.formatException(record.exc_info)}"
+        if self.fmt == 'json':
+            return json.dumps({
+                "ts": round(record.created, 3),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": message,
+                **fields,
+            }, default=str)
+        stamp = time.strftime('%H:%M:%S', time.localtime(record.created))
+        extras = ' '.join(f"{name}={value}" for name, value in fields.items())
+        return f"{stamp} {record.levelname:<7} {record.name}: {message}" + (f" {extras}" if extras else '')
+
+
+class EventLogPolicy:
+    """Per event type log level and sampling rate for Realtime events.
+
+    Sampling is deterministic: a rate of 0.1 logs exactly every tenth event
+    of that type, with no random number per event.
+    """
+
+    def __init__(self, levels=None, rates=None, default_level=logging.INFO, default_rate=1.0):
+        self.levels = levels or {}
+        self.rates = rates or {}
+        self.default_level = default_level
+        self.default_rate = default_rate
+        self._credit = {}
+        self.sampled_out = 0
+
+    def level(self, event_type):
+        return self.levels.get(event_type, self.default_level)
+
+    def sample(self, event_type):
+        rate = self.rates.get(event_type, self.default_rate)
+        if rate >= 1:
+            return True
+        credit = self._credit.get(event_type, 0.0) + rate
+        if credit >= 1:
+            self._credit[event_type] = credit - 1
+            return True
+        self._credit[event_type] = credit
+        self.sampled_out += 1
+        return False
+
+
+class CallLogger(logging.LoggerAdapter):
+    """Logger adapter that stamps every record with the call's fields."""
+
+    def process(self, msg, kwargs):
+        kwargs['extra'] = {**self.extra, **kwargs['extra']} if 'extra' in kwargs else self.extra
+        return msg, kwargs
+
+    def bind(self, **fields):
+        self.extra = {**self.extra, **fields}
+
+    def event(self, policy, event):
+        """Log a Realtime event if its level is enabled and the sampler lets it through."""
+        event_type = event.get('type')
+        level = policy.level(event_type)
+        if self.isEnabledFor(level) and policy.sample(event_type):
+            self.log(level, "Received event", extra={"event_type": event_type, "payload": event})
+
+
+def setup_logging(level='INFO', fmt='text', max_payload=2048, stream=None, queue_size=10000):
+    """Route the root logger through a bounded queue to a writer thread.
+
+    Returns the QueueListener. When the queue is full, records are dropped
+    rather than blocking the event loop. Calling it again replaces the
+    handler and listener of the previous call; handlers installed by anyone
+    else are left in place.
+    """
+    log_queue = queue.Queue(maxsize=queue_size)
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(StructuredFormatter(fmt, max_payload))
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    handler = DeferredQueueHandler(log_queue)
+    handler.listener = listener
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if isinstance(existing, DeferredQueueHandler):
+            root.removeHandler(existing)
+            stop_listener(existing.listener)
+    root.addHandler(handler)
+    root.setLevel(parse_level(level) if isinstance(level, str) else level)
+    listener.start()
+    atexit.register(stop_listener, listener)
+    return listener
+
+
+def stop_listener(listener):
+    """Flush and stop `listener`; safe to call more than once."""
+    if listener._thread is not None:
+        listener.stop()
@@ -0,0 +1,245 @@
+import time
+from bisect import bisect_left
+
+# Fixed bucket bounds in seconds, shared by the latency histograms.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SEND_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+QUEUE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+RATE_BUCKETS = (5, 10, 20, 30, 40, 50, 60, 80, 100)
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    __slots__ = ('name', 'help', 'value')
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+    def render(self, others=()):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter",
+                f"{self.name} {_format(self.value + sum(others))}"]
+
+
+class Gauge:
+    """A value read from `fn()` at scrape time; `type='counter'` for monotonic callbacks."""
+
+    __slots__ = ('name', 'help', 'fn', 'type')
+
+    def __init__(self, name, help, fn, type='gauge'):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.type = type
+
+    def snapshot(self):
+        return self.fn()
+
+    def render(self, others=()):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}",
+                f"{self.name} {_format(self.fn() + sum(others))}"]
+
+
+class Histogram:
+    """Fixed-bucket histogram: an observation is one bisect and two adds."""
+
+    __slots__ = ('name', 'help', 'buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        return [self.counts, self.sum]
+
+    def render(self, others=()):
+        counts, total = list(self.counts), self.sum
+        for other_counts, other_sum in others:
+            if len(other_counts) == len(counts):
+                counts = [a + b for a, b in zip(counts, other_counts)]
+                total += other_sum
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {sum(counts)}')
+        lines.append(f"{self.name}_sum {_format(total)}")
+        lines.append(f"{self.name}_count {sum(counts)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text exposition format.
+
+    `snapshot()` captures every value as plain JSON; passing other processes'
+    snapshots to `render()` adds them in, so any worker can serve the totals.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name, help):
+        return self._register(Counter(name, help))
+
+    def gauge(self, name, help, fn, type='gauge'):
+        return self._register(Gauge(name, help, fn, type))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help, buckets))
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def render(self, snapshots=()):
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.extend(metric.render([snapshot[name] for snapshot in snapshots if name in snapshot]))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+CALLS_STARTED = REGISTRY.counter('calls_started_total', 'Media streams that reached the Twilio start event.')
+UPSTREAM_SETUP = REGISTRY.histogram(
+    'call_upstream_setup_seconds', 'Upstream connect (or pool acquire) plus session setup per call.')
+RESPONSE_LATENCY = REGISTRY.histogram(
+    'call_response_latency_seconds', 'Time from input_audio_buffer.speech_stopped to the first response.audio.delta.')
+FIRST_AUDIO = REGISTRY.histogram(
+    'call_first_audio_seconds', 'Time from the Twilio start event to the first assistant audio frame sent to the caller.')
+BARGE_IN = REGISTRY.histogram(
+    'call_barge_in_seconds', 'Time from input_audio_buffer.speech_started to the Twilio clear being sent.')
+INBOUND_FRAME_RATE = REGISTRY.histogram(
+    'call_inbound_frames_per_second', 'Average Twilio media frames received per second, per call.', RATE_BUCKETS)
+OUTBOUND_FRAME_RATE = REGISTRY.histogram(
+    'call_outbound_frames_per_second', 'Average audio frames relayed to Twilio per second, per call.', RATE_BUCKETS)
+TWILIO_SEND = REGISTRY.histogram(
+    'relay_twilio_send_seconds', 'Time spent awaiting a send to the Twilio websocket.', SEND_BUCKETS)
+UPSTREAM_SEND = REGISTRY.histogram(
+    'relay_upstream_send_seconds', 'Time spent awaiting a send to the Realtime websocket.', SEND_BUCKETS)
+INBOUND_FRAMES = REGISTRY.counter('relay_inbound_frames_total', 'Twilio media frames received.')
+OUTBOUND_FRAMES = REGISTRY.counter('relay_outbound_frames_total', 'Audio frames relayed to Twilio.')
+UPSTREAM_QUEUE_WAIT = REGISTRY.histogram(
+    'relay_upstream_queue_wait_seconds', 'Time messages spend queued before being sent to the Realtime websocket.', QUEUE_BUCKETS)
+TWILIO_QUEUE_WAIT = REGISTRY.histogram(
+    'relay_twilio_queue_wait_seconds', 'Time messages spend queued before being sent to the Twilio websocket.', QUEUE_BUCKETS)
+INBOUND_DROPPED = REGISTRY.counter(
+    'relay_inbound_dropped_total', 'Caller audio messages dropped because the upstream queue was full.')
+UPSTREAM_RECONNECTS = REGISTRY.counter(
+    'upstream_reconnects_total', 'Calls whose Realtime connection dropped and was re-established.')
+UPSTREAM_RECONNECT_FAILURES = REGISTRY.counter(
+    'upstream_reconnect_failures_total', 'Realtime connection drops that could not be recovered within the budget.')
+UPSTREAM_OUTAGE = REGISTRY.histogram(
+    'upstream_outage_seconds', 'Time from losing the Realtime connection to resuming the call on a new one.', LATENCY_BUCKETS)
+INBOUND_SUPPRESSED = REGISTRY.counter(
+    'relay_inbound_suppressed_frames_total', 'Silent Twilio media frames held back by the silence gate.')
+
+
+class CallMetrics:
+    """Latency bookkeeping for one call.
+
+    Feeds the shared histograms as events happen and keeps just enough
+    per-call state (counts, sums and maxima) for `summary()`.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.upstream_setup = None
+        self.first_audio = None
+        self.inbound_frames = 0
+        self.outbound_frames = 0
+        self._speech_stopped_at = None
+        self._speech_started_at = None
+        self._latency = {}  # name -> [count, sum, max]
+
+    def _record(self, name, histogram, value):
+        histogram.observe(value)
+        stats = self._latency.get(name)
+        if stats is None:
+            self._latency[name] = [1, value, value]
+        else:
+            stats[0] += 1
+            stats[1] += value
+            if value > stats[2]:
+                stats[2] = value
+
+    def upstream_ready(self, since):
+        self.upstream_setup = time.monotonic() - since
+        UPSTREAM_SETUP.observe(self.upstream_setup)
+
+    def inbound_frame(self):
+        self.inbound_frames += 1
+        INBOUND_FRAMES.inc()
+
+    def outbound_frame(self):
+        self.outbound_frames += 1
+        OUTBOUND_FRAMES.inc()
+        if self.first_audio is None:
+            self.first_audio = time.monotonic() - self.started
+            FIRST_AUDIO.observe(self.first_audio)
+        if self._speech_stopped_at is not None:
+            self._record('response_latency', RESPONSE_LATENCY, time.monotonic() - self._speech_stopped_at)
+            self._speech_stopped_at = None
+
+    def speech_started(self):
+        self._speech_started_at = time.monotonic()
+
+    def speech_stopped(self):
+        self._speech_stopped_at = time.monotonic()
+
+    def cleared(self):
+        if self._speech_started_at is not None:
+            self._record('barge_in', BARGE_IN, time.monotonic() - self._speech_started_at)
+            self._speech_started_at = None
+
+    def twilio_send(self, since):
+        self._record('twilio_send', TWILIO_SEND, time.perf_counter() - since)
+
+    def upstream_send(self, since):
+        self._record('upstream_send', UPSTREAM_SEND, time.perf_counter() - since)
+
+    def finish(self):
+        """Observe the per-call frame rates and return the summary."""
+        elapsed = max(time.monotonic() - self.started, 1e-3)
+        INBOUND_FRAME_RATE.observe(self.inbound_frames / elapsed)
+        OUTBOUND_FRAME_RATE.observe(self.outbound_frames / elapsed)
+        return self.summary()
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.started, 1e-3)
+        summary = {
+            "upstream_setup_ms": round(self.upstream_setup * 1000, 1) if self.upstream_setup is not None else None,
+            "first_audio_ms": round(self.first_audio * 1000, 1) if self.first_audio is not None else None,
+            "inbound_frames": self.inbound_frames,
+            "outbound_frames": self.outbound_frames,
+            "inbound_fps": round(self.inbound_frames / elapsed, 1),
+            "outbound_fps": round(self.outbound_frames / elapsed, 1),
+        }
+        for name, (count, total, peak) in self._latency.items():
+            summary[f"{name}_count"] = count
+            summary[f"{name}_avg_ms"] = round(total / count * 1000, 2)
+            summary[f"{name}_max_ms"] = round(peak * 1000, 2)
+        return summary
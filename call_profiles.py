@@ -0,0 +1,162 @@
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEY = 'default'
+PROFILE_FIELDS = ('name', 'instructions', 'voice', 'temperature', 'greeting', 'hold_message')
+
+
+class CallProfile:
+    """One clinic's settings, with its upstream messages serialized once.
+
+    `session_update`, `greeting_item` and `greeting_response` are the JSON
+    text frames sent as they are on every call. They are str, not bytes,
+    because the Realtime API only accepts text frames.
+    """
+
+    __slots__ = ('key', 'name', 'hold_message', 'settings', 'session_update', 'greeting_item', 'greeting_response')
+
+    def __init__(self, key, settings):
+        self.key = key
+        self.settings = settings
+        self.name = settings.get('name', key)
+        self.hold_message = settings['hold_message']
+        self.session_update = json.dumps({
+            "type": "session.update",
+            "session": {
+                "turn_detection": {"type": "server_vad"},
+                "input_audio_format": "g711_ulaw",
+                "output_audio_format": "g711_ulaw",
+                "voice": settings['voice'],
+                "instructions": settings['instructions'],
+                "modalities": ["text", "audio"],
+                "temperature": settings['temperature'],
+                "input_audio_transcription": {"model": "whisper-1"},
+            }
+        })
+        self.greeting_item = json.dumps({
+            "type": "conversation.item.create",
+            "item": {
+                "type": "message",
+                "role": "user",
+                "content": [{"type": "input_text", "text": settings['greeting']}],
+            }
+        })
+        self.greeting_response = json.dumps({"type": "response.create"})
+
+
+def build_profiles(config, defaults):
+    """{key: CallProfile} from a config mapping of dialled number (or 'default') to settings.
+
+    Every profile starts from `defaults`, then the file's 'default' entry,
+    then its own settings. Raises ValueError on a malformed config.
+    """
+    if not isinstance(config, dict):
+        raise ValueError("profile config must be a JSON object")
+    for key, settings in config.items():
+        if not isinstance(settings, dict):
+            raise ValueError(f"profile {key!r} must be a JSON object")
+        unknown = set(settings) - set(PROFILE_FIELDS)
+        if unknown:
+            raise ValueError(f"profile {key!r} has unknown fields: {', '.join(sorted(unknown))}")
+    base = {**defaults, **config.get(DEFAULT_KEY, {})}
+    profiles = {DEFAULT_KEY: CallProfile(DEFAULT_KEY, base)}
+    for key, settings in config.items():
+        if key != DEFAULT_KEY:
+            profiles[key] = CallProfile(key, {**base, **settings})
+    return profiles
+
+
+class ProfileRegistry:
+    """Call profiles keyed by dialled number, hot-reloaded from a JSON file.
+
+    Lookups are a dict get on the current mapping. A background task checks
+    the file's mtime every `poll_interval` seconds. On a change it reads
+    and builds the new profiles off the event loop, then swaps the whole
+    mapping in one assignment, so a call sees either the old or the new
+    profiles and never a mix. A file that fails to load keeps the previous
+    profiles. Without a file, only the default profile (from `defaults`)
+    exists. `on_reload()` runs after every swap.
+    """
+
+    def __init__(self, path, defaults, poll_interval=5.0, on_reload=None):
+        self.path = path
+        self.defaults = defaults
+        self.poll_interval = poll_interval
+        self.on_reload = on_reload
+        self.reloads = 0
+        self.errors = 0
+        self._mtime = None
+        self._profiles = build_profiles({}, defaults)
+        self._task = None
+
+    @property
+    def default(self):
+        return self._profiles[DEFAULT_KEY]
+
+    def get(self, key):
+        """Profile for a dialled number or profile key; the default when there is none."""
+        return self._profiles.get(key) or self._profiles[DEFAULT_KEY]
+
+    def keys(self):
+        return list(self._profiles)
+
+    def load(self):
+        """Reload the file now if it changed; True if the profiles were replaced. Blocking."""
+        return self._apply(*self._read())
+
+    def _read(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns if self.path else None
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return mtime, None
+        try:
+            if mtime is None:
+                return mtime, build_profiles({}, self.defaults)
+            with open(self.path, encoding='utf-8') as f:
+                return mtime, build_profiles(json.load(f), self.defaults)
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            logger.error("Keeping the current call profiles; %s failed to load: %s", self.path, e)
+            self._mtime = mtime
+            return mtime, None
+
+    def _apply(self, mtime, profiles):
+        if profiles is None:
+            return False
+        self._profiles = profiles
+        self._mtime = mtime
+        self.reloads += 1
+        logger.info("Loaded call profiles: %s", ', '.join(profiles))
+        if self.on_reload is not None:
+            self.on_reload()
+        return True
+
+    def start(self):
+        if self.path and self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime != self._mtime:
+                # Parse and build off the loop; swap on it, so on_reload() never races a lookup.
+                self._apply(*await asyncio.to_thread(self._read))
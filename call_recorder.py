@@ -0,0 +1,259 @@
+import base64
+import logging
+import mmap
+import os
+import queue
+import re
+import struct
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Call ids come from the unauthenticated Twilio start message and name the file;
+# Twilio's are 'CA' / 'MZ' plus 32 hex digits, so nothing path-like is ever needed.
+SAFE_CALL_ID = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+SAMPLE_RATE = 8000
+SAMPLES_PER_MS = SAMPLE_RATE // 1000
+ULAW_SILENCE = 0xFF
+WAVE_FORMAT_MULAW = 7
+# RIFF header, 18-byte fmt chunk, fact chunk (required for non-PCM), data chunk header.
+HEADER_SIZE = 12 + 26 + 12 + 8
+CALLER, ASSISTANT = 0, 1
+
+
+def wav_header(frames):
+    """Header of a stereo 8 kHz mu-law WAV file holding `frames` sample frames."""
+    data_size = frames * 2
+    return (
+        b'RIFF' + struct.pack('<I', HEADER_SIZE - 8 + data_size) + b'WAVE'
+        + b'fmt ' + struct.pack('<IHHIIHHH', 18, WAVE_FORMAT_MULAW, 2, SAMPLE_RATE, SAMPLE_RATE * 2, 2, 8, 0)
+        + b'fact' + struct.pack('<II', 4, frames)
+        + b'data' + struct.pack('<I', data_size)
+    )
+
+
+class _Track:
+    """One call's recording: a sparse file preallocated for `max_frames` and mapped into memory.
+
+    Sample frames are written straight into the mapping at their timeline
+    position (left channel caller, right channel assistant), so memory use
+    is page cache the kernel can write back, not heap that grows with the
+    call.
+    """
+
+    def __init__(self, path, max_frames):
+        self.path = path
+        self.max_frames = max_frames
+        self.file = open(path + '.part', 'w+b')
+        try:
+            self.file.truncate(HEADER_SIZE + max_frames * 2)
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        except (OSError, ValueError):
+            self.file.close()
+            raise
+        self.frames = np.frombuffer(self.map, dtype=np.uint8, offset=HEADER_SIZE).reshape(-1, 2)
+        self.ends = [0, 0]  # per channel: everything before this frame has been written
+
+    def write(self, channel, position, samples):
+        """Write samples at `position` (in sample frames); returns the frame after the last one kept."""
+        end = min(position + len(samples), self.max_frames)
+        if position >= end:
+            return position
+        if position > self.ends[channel]:
+            self.frames[self.ends[channel]:position, channel] = ULAW_SILENCE
+        self.frames[position:end, channel] = samples[:end - position]
+        self.ends[channel] = max(self.ends[channel], end)
+        return end
+
+    def cut(self, channel, position):
+        """Silence `channel` from `position` on."""
+        if position < self.ends[channel]:
+            self.frames[position:self.ends[channel], channel] = ULAW_SILENCE
+            self.ends[channel] = position
+
+    def finish(self):
+        length = max(self.ends)
+        for channel, end in enumerate(self.ends):
+            self.frames[end:length, channel] = ULAW_SILENCE
+        self.map[:HEADER_SIZE] = wav_header(length)
+        self.map.flush()
+        self._unmap()
+        self.file.truncate(HEADER_SIZE + length * 2)
+        self.file.close()
+        os.replace(self.path + '.part', self.path)
+        return length
+
+    def close(self):
+        """Release the mapping and the file without finishing; safe to call more than once."""
+        self._unmap()
+        self.file.close()
+
+    def _unmap(self):
+        self.frames = None
+        try:
+            self.map.close()
+        except BufferError:
+            # Something still holds a view of the mapping; it is unmapped once that goes.
+            pass
+
+
+class CallRecorder:
+    """Opt-in stereo recordings of both call legs as mu-law WAV files.
+
+    The relay only enqueues the base64 payloads it already holds, along with
+    the Twilio media timestamp they belong to. A writer thread decodes them
+    and places them on the call's timeline: caller audio at its own
+    timestamp, assistant audio from the moment it was sent (or right after
+    the audio before it), cut off where a barge-in cleared it. While more
+    than `max_pending` messages are waiting, audio is dropped and counted
+    rather than queued. An empty `directory` disables recording.
+    """
+
+    def __init__(self, directory, max_seconds=3600, max_pending=20000):
+        self.directory = directory
+        self.enabled = bool(directory)
+        self.max_frames = int(max_seconds * SAMPLE_RATE)
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.recorded = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._tracks = {}  # call_id -> _Track
+        self._cursors = {}  # call_id -> frame where the next assistant audio may start
+
+    def start(self):
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='call-recorder', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Write out everything queued and finish open recordings, then stop the writer."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def start_call(self, call_id):
+        if not self.enabled:
+            return
+        if not SAFE_CALL_ID.fullmatch(call_id or ''):
+            logger.warning("Not recording call with unsafe id %r", call_id)
+            return
+        self._queue.put(('start', call_id))
+
+    def end_call(self, call_id):
+        if self.enabled:
+            self._queue.put(('end', call_id))
+
+    def inbound(self, call_id, timestamp, payload):
+        """Caller audio received at Twilio media `timestamp` (ms)."""
+        self._audio(('in', call_id, timestamp, payload))
+
+    def outbound(self, call_id, timestamp, payload):
+        """Assistant audio sent when the caller leg was at `timestamp` (ms)."""
+        self._audio(('out', call_id, timestamp, payload))
+
+    def truncate(self, call_id, timestamp):
+        """Assistant audio after `timestamp` (ms) was cleared by a barge-in."""
+        if self.enabled:
+            self._queue.put(('cut', call_id, timestamp))
+
+    def stats(self):
+        return {
+            "recorded": self.recorded,
+            "active": len(self._tracks),
+            "pending": self._queue.qsize(),
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _audio(self, item):
+        if not self.enabled:
+            return
+        if self._queue.qsize() >= self.max_pending:
+            self.dropped += 1
+            return
+        self._queue.put(item)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._handle(item)
+            except (OSError, ValueError) as e:
+                self.failed += 1
+                logger.warning("Call recording of %s failed: %s", item[1], e)
+                self._discard(item[1])
+        for call_id in list(self._tracks):
+            self._finish(call_id)
+
+    def _handle(self, item):
+        kind, call_id = item[0], item[1]
+        if kind == 'start':
+            directory = os.path.realpath(self.directory)
+            path = os.path.realpath(os.path.join(directory, f"{call_id}.wav"))
+            if os.path.dirname(path) != directory:
+                raise ValueError(f"recording path {path} is outside {directory}")
+            # A repeated start would otherwise leak the open track's file and mapping.
+            self._finish(call_id)
+            self._tracks[call_id] = _Track(path, self.max_frames)
+            self._cursors[call_id] = 0
+            return
+        if kind == 'end':
+            self._finish(call_id)
+            return
+        track = self._tracks.get(call_id)
+        if track is None:
+            return
+        position = item[2] * SAMPLES_PER_MS
+        if kind == 'in':
+            track.write(CALLER, position, np.frombuffer(base64.b64decode(item[3]), dtype=np.uint8))
+        elif kind == 'out':
+            # Twilio plays assistant audio back to back, starting no earlier than it was sent.
+            start = max(self._cursors[call_id], position)
+            samples = np.frombuffer(base64.b64decode(item[3]), dtype=np.uint8)
+            self._cursors[call_id] = track.write(ASSISTANT, start, samples)
+        elif kind == 'cut':
+            track.cut(ASSISTANT, position)
+            self._cursors[call_id] = min(self._cursors[call_id], position)
+
+    def _finish(self, call_id):
+        track = self._tracks.pop(call_id, None)
+        self._cursors.pop(call_id, None)
+        if track is None:
+            return
+        try:
+            frames = track.finish()
+        except (OSError, ValueError) as e:
+            self.failed += 1
+            logger.warning("Call recording of %s failed: %s", call_id, e)
+            self._close(track)
+            return
+        self.recorded += 1
+        logger.info("Recorded %s (%.1f s)", track.path, frames / SAMPLE_RATE)
+
+    def _discard(self, call_id):
+        track = self._tracks.pop(call_id, None)
+        self._cursors.pop(call_id, None)
+        if track is None:
+            return
+        self._close(track)
+        try:
+            os.remove(track.path + '.part')
+        except OSError:
+            pass
+
+    @staticmethod
+    def _close(track):
+        try:
+            track.close()
+        except OSError as e:
+            logger.warning("Closing the recording %s failed: %s", track.path, e)
@@ -0,0 +1,362 @@
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from itertools import islice
+
+STATUSES = ('active', 'completed', 'error')
+
+
+def phone_key(phone):
+    """Digits-only form of a phone number, so '+1-555-0123' and '1555' share a prefix."""
+    return ''.join(ch for ch in phone or '' if ch.isdigit())
+
+
+def isoformat(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+
+
+class CallRecord:
+    """Compact per-call record; transcripts and metrics live alongside, not in here."""
+
+    __slots__ = ('id', 'seq', 'client_phone', 'phone_key', 'start_ts', 'end_ts',
+                 'status', 'summary', 'appointment_details', 'metrics', 'version')
+
+    def __init__(self, id, seq, client_phone, start_ts, status='active', summary=''):
+        self.id = id
+        self.seq = seq
+        self.client_phone = client_phone
+        self.phone_key = phone_key(client_phone)
+        self.start_ts = start_ts
+        self.end_ts = None
+        self.status = status
+        self.summary = summary
+        self.appointment_details = None
+        self.metrics = None
+        self.version = 0
+
+    @property
+    def duration(self):
+        # Unknown until the call ends, which keeps to_dict() a pure function of `version`.
+        return int(self.end_ts - self.start_ts) if self.end_ts is not None else None
+
+    def state(self):
+        """Raw field values, enough for ConversationStore.replicate() to rebuild the record."""
+        return {
+            "client_phone": self.client_phone,
+            "start_ts": self.start_ts,
+            "end_ts": self.end_ts,
+            "status": self.status,
+            "summary": self.summary,
+            "appointment_details": self.appointment_details,
+            "metrics": self.metrics,
+        }
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "client_phone": self.client_phone,
+            "start_time": isoformat(self.start_ts),
+            "end_time": isoformat(self.end_ts),
+            "status": self.status,
+            "duration": self.duration,
+            "summary": self.summary,
+            "appointment_details": self.appointment_details,
+            "metrics": self.metrics,
+        }
+
+
+class TranscriptBuffer:
+    """Bounded, append-only transcript segments for one call.
+
+    Each finished message gets a monotonic `seq`, so readers can ask for
+    everything after the last segment they saw. Streaming deltas are held
+    per item until the message is done; only the newest `max_segments`
+    segments are retained.
+    """
+
+    __slots__ = ('segments', 'next_seq', '_pending')
+
+    def __init__(self, max_segments=500):
+        self.segments = deque(maxlen=max_segments)  # (seq, ts, speaker, message)
+        self.next_seq = 1
+        self._pending = {}
+
+    def add_delta(self, item_id, delta):
+        self._pending.setdefault(item_id, []).append(delta)
+
+    def finish(self, item_id, speaker, text=None, ts=None):
+        """Close out the message for `item_id`; `text` wins over accumulated deltas."""
+        parts = self._pending.pop(item_id, None)
+        if text is None:
+            text = ''.join(parts or ())
+        if not text.strip():
+            return None
+        return self.append(speaker, text.strip(), ts)
+
+    def append(self, speaker, message, ts=None):
+        segment = (self.next_seq, time.time() if ts is None else ts, speaker, message)
+        self.segments.append(segment)
+        self.next_seq += 1
+        return segment
+
+    def after(self, seq=0):
+        """Return retained segments with a sequence number greater than `seq`."""
+        if not self.segments:
+            return []
+        start = max(0, seq - self.segments[0][0] + 1)
+        return list(islice(self.segments, start, None))
+
+    @staticmethod
+    def segment_dict(segment):
+        seq, ts, speaker, message = segment
+        return {
+            "id": f"msg_{seq}",
+            "seq": seq,
+            "timestamp": isoformat(ts),
+            "speaker": speaker,
+            "message": message,
+        }
+
+
+class ConversationStore:
+    """In-memory call records with secondary indexes and cursor pagination.
+
+    Records are numbered by a monotonic `seq`; every index is a sorted list
+    of seqs (or (key, seq) pairs) so listing, filtering and paging are
+    bisections plus a short scan, newest first. Retention is bounded by
+    `max_records` and `max_age` seconds; active calls are never evicted.
+    It is enforced when a call starts and on every read through `query()`
+    or `changed_since()`, so aged records go even while no calls arrive.
+    `listener(conversation_id, type, data)` is told about every change and
+    `on_remove(conversation_id)` about every record retention drops.
+    """
+
+    def __init__(self, max_records=20000, max_age=7 * 24 * 3600, tombstones=1024,
+                 max_transcript_segments=500, listener=None, on_remove=None):
+        self.listener = listener
+        self.on_remove = on_remove
+        self.max_records = max_records
+        self.max_age = max_age
+        self.max_transcript_segments = max_transcript_segments
+        self.version = 0
+        self._next_seq = 0
+        self._records = {}
+        self._transcripts = {}
+        self._by_seq = {}
+        self._all = []
+        self._by_status = {status: [] for status in STATUSES}
+        self._by_start = []  # (start_ts, seq)
+        self._by_phone = []  # (phone_key, seq)
+        self._changes = OrderedDict()  # id -> version of last change, oldest first
+        self._removed = deque(maxlen=tombstones)  # (version, id)
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, call_id):
+        return self._records.get(call_id)
+
+    def transcript(self, call_id):
+        return self._transcripts.get(call_id)
+
+    def transcript_delta(self, call_id, item_id, delta):
+        buffer = self._transcripts.get(call_id)
+        if buffer is not None:
+            buffer.add_delta(item_id, delta)
+
+    def finish_transcript(self, call_id, item_id, speaker, text=None):
+        """Append the finished message for `item_id`; returns the segment or None."""
+        buffer = self._transcripts.get(call_id)
+        if buffer is None:
+            return None
+        segment = buffer.finish(item_id, speaker, text)
+        if segment is not None:
+            self._transcript_added(call_id, segment)
+        return segment
+
+    def add_transcript(self, call_id, speaker, message, ts=None):
+        """Append an already finished message; returns the segment or None."""
+        buffer = self._transcripts.get(call_id)
+        if buffer is None:
+            return None
+        segment = buffer.append(speaker, message, ts)
+        self._transcript_added(call_id, segment)
+        return segment
+
+    def start_call(self, call_id, client_phone, start_ts=None, summary='Call in progress.'):
+        """Create (or return the existing) record for a call that just connected."""
+        record = self._records.get(call_id)
+        if record is not None:
+            return record
+        self._next_seq += 1
+        record = CallRecord(call_id, self._next_seq, client_phone,
+                            time.time() if start_ts is None else start_ts, summary=summary)
+        self._add(record)
+        self._touch(record)
+        self._emit(call_id, 'status', record.to_dict())
+        self._enforce_retention()
+        return record
+
+    def update(self, call_id, **fields):
+        """Change fields on a record, keeping the status index in step."""
+        record = self._records.get(call_id)
+        if record is None:
+            return None
+        status = fields.pop('status', None)
+        status_changed = status is not None and status != record.status
+        if status_changed:
+            self._unindex(self._by_status[record.status], record.seq)
+            record.status = status
+            insort(self._by_status[status], record.seq)
+        for name, value in fields.items():
+            setattr(record, name, value)
+        self._touch(record)
+        if 'appointment_details' in fields:
+            self._emit(call_id, 'appointment', record.appointment_details)
+        if status_changed:
+            self._emit(call_id, 'status', record.to_dict())
+        elif 'summary' in fields:
+            self._emit(call_id, 'summary', record.summary)
+        return record
+
+    def replicate(self, call_id, state):
+        """Create or update a record from a `CallRecord.state()` taken in another process."""
+        record = self._records.get(call_id)
+        if record is None:
+            record = self.start_call(call_id, state['client_phone'], state['start_ts'], state['summary'])
+        fields = {name: value for name, value in state.items()
+                  if name not in ('client_phone', 'start_ts') and getattr(record, name) != value}
+        return self.update(call_id, **fields) if fields else record
+
+    def end_call(self, call_id, status='completed', summary=None, **fields):
+        record = self._records.get(call_id)
+        if record is None or record.status != 'active':
+            return record
+        fields.update(status=status, end_ts=time.time())
+        if summary is not None:
+            fields["summary"] = summary
+        return self.update(call_id, **fields)
+
+    def count(self, status):
+        return len(self._by_status.get(status, ()))
+
+    def query(self, status=None, phone_prefix=None, started_after=None, started_before=None,
+              cursor=None, limit=50):
+        """Return (records, next_cursor), newest first.
+
+        `cursor` is the opaque value returned by the previous page. The
+        narrowest index drives the scan and the other filters are checked
+        per record, so cost is bounded by the page size, not the store size.
+        """
+        self._enforce_retention()
+        prefix = phone_key(phone_prefix) if phone_prefix else None
+        candidates = [self._all]
+        if status is not None:
+            candidates.append(self._by_status.get(status, []))
+        ranges = []
+        if prefix:
+            lo = bisect_left(self._by_phone, (prefix,))
+            hi = bisect_left(self._by_phone, (prefix + '\x7f',))
+            ranges.append((hi - lo, self._by_phone, lo, hi))
+        if started_after is not None or started_before is not None:
+            lo = bisect_left(self._by_start, (started_after,)) if started_after is not None else 0
+            hi = bisect_right(self._by_start, (started_before, float('inf'))) if started_before is not None else len(self._by_start)
+            ranges.append((hi - lo, self._by_start, lo, hi))
+        seqs = min(candidates, key=len)
+        for size, index, lo, hi in ranges:
+            if size < len(seqs):
+                seqs = sorted(seq for _, seq in index[lo:hi])
+
+        end = len(seqs) if cursor is None else bisect_left(seqs, int(cursor))
+        page = []
+        for i in range(end - 1, -1, -1):
+            record = self._by_seq[seqs[i]]
+            if status is not None and record.status != status:
+                continue
+            if prefix and not record.phone_key.startswith(prefix):
+                continue
+            if started_after is not None and record.start_ts < started_after:
+                continue
+            if started_before is not None and record.start_ts > started_before:
+                continue
+            page.append(record)
+            if len(page) == limit:
+                return page, str(record.seq) if i > 0 else None
+        return page, None
+
+    def changed_since(self, version):
+        """Return (records changed after `version`, ids removed after it).
+
+        Returns (None, None) when `version` predates the tombstone history, in
+        which case the caller has to resynchronize from a full listing.
+        """
+        self._enforce_retention()
+        if self._removed and len(self._removed) == self._removed.maxlen and self._removed[0][0] > version:
+            return None, None
+        changed = []
+        for call_id in reversed(self._changes):
+            record = self._records[call_id]
+            if record.version <= version:
+                break
+            changed.append(record)
+        removed = [call_id for removed_version, call_id in self._removed if removed_version > version]
+        return changed, removed
+
+    def _emit(self, call_id, type, data):
+        if self.listener is not None:
+            self.listener(call_id, type, data)
+
+    def _transcript_added(self, call_id, segment):
+        self._touch(self._records[call_id])
+        self._emit(call_id, 'transcript', TranscriptBuffer.segment_dict(segment))
+
+    def _touch(self, record):
+        self.version += 1
+        record.version = self.version
+        self._changes[record.id] = record.version
+        self._changes.move_to_end(record.id)
+
+    def _add(self, record):
+        self._records[record.id] = record
+        self._transcripts[record.id] = TranscriptBuffer(self.max_transcript_segments)
+        self._by_seq[record.seq] = record
+        insort(self._all, record.seq)
+        insort(self._by_status[record.status], record.seq)
+        insort(self._by_start, (record.start_ts, record.seq))
+        insort(self._by_phone, (record.phone_key, record.seq))
+
+    def _remove(self, record):
+        del self._records[record.id]
+        del self._transcripts[record.id]
+        del self._by_seq[record.seq]
+        self._changes.pop(record.id, None)
+        self._unindex(self._all, record.seq)
+        self._unindex(self._by_status[record.status], record.seq)
+        self._unindex(self._by_start, (record.start_ts, record.seq))
+        self._unindex(self._by_phone, (record.phone_key, record.seq))
+        self.version += 1
+        self._removed.append((self.version, record.id))
+        if self.on_remove is not None:
+            self.on_remove(record.id)
+
+    @staticmethod
+    def _unindex(index, key):
+        i = bisect_left(index, key)
+        if i < len(index) and index[i] == key:
+            del index[i]
+
+    def _enforce_retention(self):
+        horizon = time.time() - self.max_age
+        excess = len(self._records) - self.max_records
+        if excess <= 0 and (not self._by_start or self._by_start[0][0] >= horizon):
+            return
+        evict = []
+        for seq in self._all:
+            record = self._by_seq[seq]
+            if excess <= len(evict) and record.start_ts >= horizon:
+                break
+            if record.status != 'active':
+                evict.append(record)
+        for record in evict:
+            self._remove(record)
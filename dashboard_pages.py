@@ -0,0 +1,79 @@
+"""
+HTML fragments for the Streamlit dashboard.
+
+The Summary view renders one page of cards (fetched a page at a time from
+the backend's cursor API) and the Detailed view one window of transcript
+messages, each as a single HTML string, so the number of Streamlit
+elements per rerun is bounded by the page and window sizes rather than by
+the call history.
+"""
+
+from datetime import datetime
+from html import escape
+from typing import Dict, Iterable, List, Tuple
+
+PAGE_SIZES = [10, 20, 50]
+TRANSCRIPT_WINDOW = 50
+STATUS_EMOJI = {"active": "🟢", "completed": "✅", "error": "❌"}
+# What card_html() shows; other changes (transcript segments, metrics) leave a card as it was
+CARD_FIELDS = ("client_phone", "start_time", "status", "duration", "summary", "appointment_details")
+
+
+def _clock(timestamp: str) -> str:
+    return datetime.fromisoformat(timestamp.replace('Z', '+00:00').replace('+00:00', '')).strftime('%H:%M:%S')
+
+
+def card_html(conv: Dict, time_ago: str) -> str:
+    """One conversation card of the Summary view"""
+    parts = [
+        f'<div class="conversation-card {conv["status"]}-call">'
+        '<div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.5rem;">'
+        f'<strong>📞 {escape(conv["client_phone"] or "")}</strong>'
+        f'<span>{STATUS_EMOJI[conv["status"]]} {conv["status"].title()}</span></div>'
+        f'<small>🕒 {time_ago}</small>'
+    ]
+    if conv["duration"]:
+        parts.append(f'<br><small>⏱️ Duration: {conv["duration"] // 60}m {conv["duration"] % 60}s</small>')
+    if conv.get("summary"):
+        parts.append(f'<p>{escape(conv["summary"])}</p>')
+    apt = conv.get("appointment_details")
+    if apt:
+        parts.append(
+            '<div class="appointment-info"><strong>📅 Appointment Scheduled:</strong><ul>'
+            f'<li><strong>Patient:</strong> {escape(str(apt["name"]))}</li>'
+            f'<li><strong>Doctor:</strong> Dr. {escape(str(apt["docname"]))}</li>'
+            f'<li><strong>Time:</strong> {escape(str(apt["appointment_datetime"]))}</li>'
+            f'<li><strong>Phone:</strong> {escape(str(apt["phone"]))}</li></ul></div>'
+        )
+    parts.append('</div>')
+    return ''.join(parts)
+
+
+def page_cards(conversations: List[Dict], positions: Iterable[int], time_ago: Dict[str, str]) -> List[Tuple[str, str]]:
+    """(conversation id, card HTML) for the rows at `positions`"""
+    cards = []
+    for i in positions:
+        conv = conversations[i]
+        cards.append((conv["id"], card_html(conv, time_ago[conv["id"]])))
+    return cards
+
+
+def transcript_window(segments: List[Dict], shown: int) -> Tuple[List[Dict], int]:
+    """The newest `shown` segments, and how many earlier ones are left out"""
+    hidden = max(0, len(segments) - shown)
+    return segments[hidden:], hidden
+
+
+def transcript_html(segments: List[Dict]) -> str:
+    """Transcript messages as one HTML block, oldest first"""
+    parts = []
+    for msg in segments:
+        if msg["speaker"] == "ai":
+            css, who = "transcript-ai", "🤖 AI Assistant"
+        else:
+            css, who = "transcript-client", "👤 Client"
+        confidence = (f'<br><small>Confidence: {msg["confidence"] * 100:.1f}%</small>'
+                      if msg.get("confidence") else '')
+        parts.append(f'<div class="{css}"><strong>{who}</strong> <small>({_clock(msg["timestamp"])})</small><br>'
+                     f'{escape(msg["message"])}{confidence}</div>')
+    return ''.join(parts)
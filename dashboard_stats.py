@@ -0,0 +1,110 @@
+"""
+Vectorized statistics for the Streamlit dashboard.
+
+Conversations are normalized once into a typed DataFrame (parsed UTC
+datetimes, categorical status, float durations) and every metric is a
+column operation over it, so the cost per rerun does not grow with Python
+loops over the call list. Against a live backend the headline metrics come
+from the /stats rollups instead (rollup_metrics()); compute_metrics() covers
+the mock data and is what benchmarks/bench_rollups.py checks the rollups
+against.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+STATUSES = ["active", "completed", "error"]
+FRAME_COLUMNS = ["id", "client_phone", "start_time", "status", "duration"]
+LOCAL_TZ = datetime.now().astimezone().tzinfo
+
+
+def parse_timestamps(raw: pd.Series) -> pd.Series:
+    """Parse ISO strings to UTC; naive values (mock data) are taken as local time"""
+    raw = raw.astype("string")
+    # "...+00:00" / "...Z" carry an offset; the backend always sends one
+    offset = raw.str[-6]
+    aware = (offset.isin(["+", "-"]) | raw.str.endswith("Z")).fillna(False).to_numpy(dtype=bool)
+    naive = ~aware & raw.notna().to_numpy()
+    if not naive.any():
+        return pd.to_datetime(raw, utc=True, format="ISO8601")
+    parsed = pd.Series(pd.NaT, index=raw.index, dtype="datetime64[ns, UTC]")
+    if aware.any():
+        parsed[aware] = pd.to_datetime(raw[aware], utc=True, format="ISO8601")
+    parsed[naive] = (pd.to_datetime(raw[naive], format="ISO8601")
+                     .dt.tz_localize(LOCAL_TZ).dt.tz_convert("UTC"))
+    return parsed
+
+
+def conversations_frame(conversations: List[Dict]) -> pd.DataFrame:
+    """Normalize a conversation list into a typed frame, one row per conversation, same order"""
+    frame = pd.DataFrame.from_records(conversations, columns=FRAME_COLUMNS)
+    frame["start_time"] = parse_timestamps(frame["start_time"])
+    frame["status"] = pd.Categorical(frame["status"], categories=STATUSES)
+    frame["duration"] = pd.to_numeric(frame["duration"], errors="coerce")
+    frame["client_phone"] = frame["client_phone"].fillna("").astype("string")
+    return frame
+
+
+def compute_metrics(frame: pd.DataFrame, now: Optional[pd.Timestamp] = None) -> Dict:
+    """Dashboard headline numbers from one pass of vectorized column operations"""
+    now = pd.Timestamp.now(tz="UTC") if now is None else now
+    counts = frame["status"].value_counts()
+    durations = frame["duration"]
+    durations = durations[durations > 0]
+    total = len(frame)
+    completed = int(counts.get("completed", 0))
+    return {
+        "total_calls": total,
+        "active_calls": int(counts.get("active", 0)),
+        "completed_calls": completed,
+        "error_calls": int(counts.get("error", 0)),
+        "avg_duration": float(durations.mean()) if len(durations) else 0.0,
+        "last_hour_calls": int((frame["start_time"] > now - pd.Timedelta(hours=1)).sum()),
+        "success_rate": completed / total * 100 if total else 0.0,
+    }
+
+
+def rollup_metrics(week: Dict, last_hour: Dict) -> Dict:
+    """compute_metrics() figures from two backend /stats responses, so their cost is per bucket"""
+    totals = week["totals"]
+    return {
+        "total_calls": totals["calls"],
+        "active_calls": week["active"],
+        "completed_calls": totals["completed"],
+        "error_calls": totals["error"],
+        "avg_duration": totals["avg_duration"] or 0.0,
+        "last_hour_calls": last_hour["totals"]["calls"],
+        "success_rate": totals["success_rate"] or 0.0,
+    }
+
+
+def rollup_series_frame(series: List[Dict]) -> pd.DataFrame:
+    """Per-bucket /stats points as a frame indexed by bucket start (local time), for charts"""
+    frame = pd.DataFrame.from_records(series, columns=["time", "calls", "completed", "error", "booked"])
+    frame["time"] = parse_timestamps(frame["time"]).dt.tz_convert(LOCAL_TZ)
+    return frame.set_index("time")
+
+
+def time_ago_labels(frame: pd.DataFrame, positions: np.ndarray, now: Optional[pd.Timestamp] = None) -> Dict[str, str]:
+    """'N minutes ago' / 'N hours ago' for the rows at `positions`, keyed by conversation id"""
+    now = pd.Timestamp.now(tz="UTC") if now is None else now
+    rows = frame.iloc[positions]
+    seconds = (now - rows["start_time"]).dt.total_seconds().fillna(0).to_numpy()
+    return {
+        conversation_id: f"{int(s // 60)} minutes ago" if s < 3600 else f"{int(s // 3600)} hours ago"
+        for conversation_id, s in zip(rows["id"], seconds)
+    }
+
+
+def filter_positions(frame: pd.DataFrame, status: Optional[str] = None, phone: Optional[str] = None) -> np.ndarray:
+    """Row positions matching the sidebar filters, in frame order"""
+    mask = np.ones(len(frame), dtype=bool)
+    if status:
+        mask &= (frame["status"] == status.lower()).to_numpy()
+    if phone:
+        mask &= frame["client_phone"].str.contains(phone, regex=False).fillna(False).to_numpy(dtype=bool)
+    return np.flatnonzero(mask)
+
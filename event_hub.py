@@ -0,0 +1,124 @@
+import asyncio
+import json
+from collections import deque
+from datetime import datetime
+
+
+class Subscriber:
+    """One dashboard connection: a bounded queue of (seq, encoded event) pairs."""
+
+    __slots__ = ('queue', 'dropped', 'closed')
+
+    def __init__(self, queue_size):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+
+    async def get(self):
+        """Next (seq, text) pair, or None once the hub has cut this subscriber off."""
+        if self.closed and self.queue.empty():
+            return None
+        return await self.queue.get()
+
+
+class EventHub:
+    """Fan-out of conversation updates to dashboard subscribers.
+
+    Every event is JSON-encoded once on publish and the same text is handed
+    to each subscriber, so the cost of a viewer is a queue put. A ring of
+    recent events backs `since` resume. A subscriber whose queue is full
+    either loses its oldest events (`slow_policy='drop'`) or is disconnected
+    (`'disconnect'`) and has to resume from its last seen sequence number.
+    """
+
+    def __init__(self, history=2000, queue_size=256, slow_policy='disconnect'):
+        self.seq = 0
+        self.queue_size = queue_size
+        self.slow_policy = slow_policy
+        self._history = deque(maxlen=history)  # (seq, text)
+        self._subscribers = set()
+        self.published = 0
+        self.disconnected = 0
+
+    def publish(self, conversation_id, type, data):
+        self.seq += 1
+        text = json.dumps({
+            "seq": self.seq,
+            "conversationId": conversation_id,
+            "type": type,
+            "data": data,
+            "timestamp": datetime.now().isoformat(),
+        })
+        event = (self.seq, text)
+        self._history.append(event)
+        self.published += 1
+        for subscriber in list(self._subscribers):
+            self._offer(subscriber, event)
+        return self.seq
+
+    def since(self, seq):
+        """(seq, text) events after `seq`, prefixed with a resync marker if some were lost."""
+        if seq > self.seq:
+            # From before a restart: this hub's numbering starts over, so follow it from the head.
+            return [self._resync_event(self.seq)]
+        if not self._history or seq >= self._history[-1][0]:
+            return []
+        events = [event for event in self._history if event[0] > seq]
+        if seq < self._history[0][0] - 1:
+            events.insert(0, self._resync_event(self._history[0][0] - 1))
+        return events
+
+    def subscribe(self, since=None):
+        subscriber = Subscriber(self.queue_size)
+        if since is not None:
+            events = self.since(since)
+            if len(events) > self.queue_size:
+                # The replay alone would overflow the queue and, under 'disconnect', cut the
+                # subscriber off on every retry; tell it to refetch and follow from the head.
+                events = [self._resync_event(self.seq)]
+            for event in events:
+                self._offer(subscriber, event)
+        if not subscriber.closed:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+
+    def stats(self):
+        return {
+            "seq": self.seq,
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "disconnected": self.disconnected,
+            "dropped": sum(s.dropped for s in self._subscribers),
+        }
+
+    def _offer(self, subscriber, event):
+        try:
+            subscriber.queue.put_nowait(event)
+            return
+        except asyncio.QueueFull:
+            pass
+        subscriber.dropped += 1
+        if self.slow_policy == 'drop':
+            subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(event)
+            return
+        # Cut the subscriber off; it resumes with `since` once it reconnects.
+        self._subscribers.discard(subscriber)
+        self.disconnected += 1
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.closed = True
+        subscriber.queue.put_nowait(None)
+
+    def _resync_event(self, seq):
+        """Marker telling a client it missed events and has to refetch; it resumes after `seq`."""
+        return seq, json.dumps({
+            "seq": seq,
+            "conversationId": None,
+            "type": "resync",
+            "data": None,
+            "timestamp": datetime.now().isoformat(),
+        })
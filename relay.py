@@ -0,0 +1,288 @@
+import asyncio
+import base64
+import json
+import time
+from collections import deque
+
+# g711_ulaw at 8 kHz: one byte per sample.
+ULAW_BYTES_PER_MS = 8
+
+
+class MediaFrameTemplate:
+    """Pre-serialized Twilio `media` frame for one stream.
+
+    The Realtime API already hands us base64 g711_ulaw, which is exactly what
+    Twilio expects, so the payload is spliced between a fixed prefix and suffix
+    instead of being decoded, re-encoded and dumped through a fresh dict.
+    """
+
+    __slots__ = ('stream_sid', 'prefix', 'suffix')
+
+    def __init__(self, stream_sid):
+        self.stream_sid = stream_sid
+        self.prefix = '{"event":"media","streamSid":%s,"media":{"payload":"' % json.dumps(stream_sid)
+        self.suffix = '"}}'
+
+    def render(self, payload):
+        """Return the JSON text of a media frame carrying `payload` untouched."""
+        return self.prefix + payload + self.suffix
+
+
+class InboundAudioBatcher:
+    """Coalesce Twilio 20 ms media frames into fewer input_audio_buffer.append messages.
+
+    Frames are buffered until `window_ms` of audio or `max_bytes` have been
+    collected; callers flush early on stop, mark and speech boundaries.
+    A window of 20 ms or less disables batching and forwards payloads as-is.
+    """
+
+    PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+    SUFFIX = '"}'
+
+    def __init__(self, window_ms=60, max_bytes=3200):
+        self.window_ms = window_ms
+        self.max_bytes = max_bytes
+        self.flush_bytes = min(max_bytes, window_ms * ULAW_BYTES_PER_MS)
+        self.enabled = window_ms > 20
+        self._chunks = []
+        self._pending = 0
+        self.frames_in = 0
+        self.sends = 0
+
+    def add(self, payload):
+        """Buffer one base64 frame; return an append message once the batch is full."""
+        self.frames_in += 1
+        if not self.enabled:
+            self.sends += 1
+            return self.PREFIX + payload + self.SUFFIX
+        chunk = base64.b64decode(payload)
+        self._chunks.append(chunk)
+        self._pending += len(chunk)
+        if self._pending >= self.flush_bytes:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """Return an append message for everything buffered, or None if empty."""
+        if not self._chunks:
+            return None
+        audio = base64.b64encode(b''.join(self._chunks)).decode('ascii')
+        self._chunks.clear()
+        self._pending = 0
+        self.sends += 1
+        return self.PREFIX + audio + self.SUFFIX
+
+    @property
+    def frames_per_send(self):
+        return self.frames_in / self.sends if self.sends else 0.0
+
+    def stats(self):
+        return {
+            "window_ms": self.window_ms,
+            "max_bytes": self.max_bytes,
+            "frames_in": self.frames_in,
+            "sends": self.sends,
+            "frames_per_send": round(self.frames_per_send, 2),
+        }
+
+
+def payload_bytes(payload):
+    """Decoded size of a base64 payload, without decoding it."""
+    padding = 2 if payload.endswith('==') else 1 if payload.endswith('=') else 0
+    return len(payload) * 3 // 4 - padding
+
+
+class PlaybackTracker:
+    """Track how much of the current assistant item Twilio has actually played.
+
+    Instead of a mark per audio delta, a mark is sent every `mark_interval_ms`
+    of audio (and at the end of a response). Each mark is named
+    "<seq>:<byte offset>", so its echo from Twilio says exactly how far
+    playback got. Sequence numbers never restart, which lets echoes for
+    audio that was cleared or belonged to an earlier item be ignored.
+    """
+
+    def __init__(self, mark_interval_ms=200):
+        self.mark_interval_bytes = mark_interval_ms * ULAW_BYTES_PER_MS
+        self._pending = deque()  # (seq, offset) awaiting Twilio's echo
+        self._seq = 0
+        self._floor = 0
+        self._unmarked = 0
+        self.sent_bytes = 0
+        self.played_bytes = 0
+        self.marks_sent = 0
+
+    def reset(self):
+        """Start a new item (or forget a cleared one); in-flight echoes become stale."""
+        self._pending.clear()
+        self._floor = self._seq
+        self._unmarked = 0
+        self.sent_bytes = 0
+        self.played_bytes = 0
+
+    def audio_sent(self, payload):
+        """Account for a relayed payload; returns a mark name when one is due."""
+        size = payload_bytes(payload)
+        self.sent_bytes += size
+        self._unmarked += size
+        if self._unmarked >= self.mark_interval_bytes:
+            return self._mark()
+        return None
+
+    def flush(self):
+        """Mark any audio sent since the last mark, e.g. at response.audio.done."""
+        return self._mark() if self._unmarked else None
+
+    def acknowledge(self, name):
+        """Handle a mark echoed by Twilio: everything up to its offset has been played."""
+        try:
+            seq, offset = (int(part) for part in name.split(':'))
+        except (AttributeError, ValueError):
+            return
+        if seq <= self._floor:
+            return
+        while self._pending and self._pending[0][0] <= seq:
+            self._pending.popleft()
+        self.played_bytes = offset
+
+    @property
+    def played_ms(self):
+        return self.played_bytes // ULAW_BYTES_PER_MS
+
+    @property
+    def unplayed(self):
+        """True while Twilio still holds audio of this item that hasn't been confirmed played."""
+        return self.sent_bytes > self.played_bytes
+
+    def _mark(self):
+        self._seq += 1
+        self._pending.append((self._seq, self.sent_bytes))
+        self._unmarked = 0
+        self.marks_sent += 1
+        return f"{self._seq}:{self.sent_bytes}"
+
+
+class ChannelClosed(ConnectionError):
+    """Raised by RelayChannel.put once the channel's writer has stopped."""
+
+
+class RelayChannel:
+    """Bounded queue with its own writer task for one direction of a call.
+
+    Readers hand messages to `put` and move on; the writer awaits `send`.
+    When the queue is full, `policy='drop_oldest'` discards the oldest
+    droppable message (stale audio) to make room, while `policy='pause'`
+    makes `put` wait for space, pushing backpressure onto that call's reader
+    only. Control messages are queued with `droppable=False` and are never
+    dropped. `wait_histogram` and `drop_counter`, if given, receive queueing
+    delays and drops for the shared metrics.
+    """
+
+    def __init__(self, send, maxsize=100, policy='pause', wait_histogram=None, drop_counter=None):
+        if policy not in ('pause', 'drop_oldest'):
+            raise ValueError(f"Unknown relay queue policy: {policy}")
+        self.send = send
+        self.maxsize = maxsize
+        self.policy = policy
+        self.wait_histogram = wait_histogram
+        self.drop_counter = drop_counter
+        self._items = deque()  # (queued_at, message, droppable)
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._task = None
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self.discarded = 0
+        self.paused = 0
+        self.max_depth = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @property
+    def depth(self):
+        return len(self._items)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def put(self, message, droppable=True):
+        while len(self._items) >= self.maxsize:
+            if self.closed:
+                raise ChannelClosed()
+            if self.policy == 'drop_oldest' and droppable and self._drop_oldest():
+                break
+            self.paused += 1
+            self._space.clear()
+            await self._space.wait()
+        if self.closed:
+            raise ChannelClosed()
+        self._items.append((time.perf_counter(), message, droppable))
+        if len(self._items) > self.max_depth:
+            self.max_depth = len(self._items)
+        self._ready.set()
+
+    def discard(self):
+        """Drop every queued droppable message, e.g. audio made stale by a barge-in."""
+        kept = deque(item for item in self._items if not item[2])
+        discarded = len(self._items) - len(kept)
+        self._items = kept
+        self.discarded += discarded
+        self._space.set()
+        return discarded
+
+    async def close(self):
+        """Stop the writer without draining; queued messages are abandoned."""
+        self.closed = True
+        self._space.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def stats(self):
+        return {
+            "policy": self.policy,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "discarded": self.discarded,
+            "paused": self.paused,
+            "max_depth": self.max_depth,
+            "wait_avg_ms": round(self.wait_total / self.sent * 1000, 2) if self.sent else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 2),
+        }
+
+    def _drop_oldest(self):
+        for i, item in enumerate(self._items):
+            if item[2]:
+                del self._items[i]
+                self.dropped += 1
+                if self.drop_counter is not None:
+                    self.drop_counter.inc()
+                return True
+        return False
+
+    async def _run(self):
+        try:
+            while True:
+                while not self._items:
+                    self._ready.clear()
+                    await self._ready.wait()
+                queued_at, message, _ = self._items.popleft()
+                self._space.set()
+                wait = time.perf_counter() - queued_at
+                self.wait_total += wait
+                if wait > self.wait_max:
+                    self.wait_max = wait
+                if self.wait_histogram is not None:
+                    self.wait_histogram.observe(wait)
+                await self.send(message)
+                self.sent += 1
+        finally:
+            # Unblock paused readers; their next put raises ChannelClosed.
+            self.closed = True
+            self._space.set()
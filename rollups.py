@@ -0,0 +1,131 @@
+import time
+from datetime import datetime
+
+import numpy as np
+
+from conversation_store import isoformat
+
+# Per-bucket counters. Calls are counted in the bucket they started in;
+# outcomes, durations, first-audio times and barge-ins in the one they ended in.
+FIELDS = ('started', 'completed', 'error', 'booked', 'duration_sum', 'duration_count',
+          'first_audio_sum', 'first_audio_count', 'barge_ins')
+COLUMN = {name: i for i, name in enumerate(FIELDS)}
+RESOLUTIONS = {'minute': 60, 'hour': 3600}
+
+
+def timestamp(value):
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+class RollupRing:
+    """Fixed-size ring of counter rows, one per `width`-second bucket.
+
+    Each slot remembers the absolute bucket number it holds, so a write to
+    a slot last used a full ring ago clears it first, and reads ignore
+    slots that hold a different bucket. Writes older than the ring are
+    dropped.
+    """
+
+    def __init__(self, width, slots):
+        self.width = width
+        self.slots = slots
+        self.rows = np.zeros((slots, len(FIELDS)))
+        self.buckets = np.full(slots, -1, dtype=np.int64)
+
+    def add(self, ts, column, amount=1.0):
+        bucket = int(ts // self.width)
+        slot = bucket % self.slots
+        held = self.buckets[slot]
+        if held != bucket:
+            if held > bucket:
+                return
+            self.rows[slot] = 0
+            self.buckets[slot] = bucket
+        self.rows[slot, column] += amount
+
+    def window(self, start, end):
+        """(first bucket, rows) for the buckets covering [start, end], clipped to what the ring keeps."""
+        last = int(end // self.width)
+        first = max(int(start // self.width), last - self.slots + 1)
+        numbers = np.arange(first, last + 1)
+        slots = numbers % self.slots
+        return first, self.rows[slots] * (self.buckets[slots] == numbers)[:, None]
+
+
+class CallRollups:
+    """Per-minute and per-hour call counters, maintained from conversation changes.
+
+    Fed by the conversation store's change events (`observe()`), including
+    records restored from the journal or replicated from other workers, which
+    land in the buckets of their own start and end times. A query reads
+    one ring, so its cost is the number of buckets, not the number of calls.
+    """
+
+    def __init__(self, minute_buckets=1440, hour_buckets=720):
+        self.rings = {'minute': RollupRing(RESOLUTIONS['minute'], minute_buckets),
+                      'hour': RollupRing(RESOLUTIONS['hour'], hour_buckets)}
+        self._active = set()
+
+    def observe(self, call_id, type, data):
+        """ConversationStore listener hook."""
+        if type != 'status':
+            return
+        if data['status'] == 'active':
+            if call_id not in self._active:
+                self._active.add(call_id)
+                self._add(timestamp(data['start_time']), 'started')
+            return
+        if call_id not in self._active:
+            return
+        self._active.discard(call_id)
+        ended = timestamp(data['end_time']) or time.time()
+        self._add(ended, data['status'])
+        if data.get('appointment_details'):
+            self._add(ended, 'booked')
+        if data.get('duration') is not None:
+            self._add(ended, 'duration_sum', data['duration'])
+            self._add(ended, 'duration_count')
+        metrics = data.get('metrics') or {}
+        if metrics.get('first_audio_ms') is not None:
+            self._add(ended, 'first_audio_sum', metrics['first_audio_ms'])
+            self._add(ended, 'first_audio_count')
+        if metrics.get('barge_in_count'):
+            self._add(ended, 'barge_ins', metrics['barge_in_count'])
+
+    def query(self, start, end, resolution='hour', series=False):
+        """Totals (and optionally one point per bucket) for calls between `start` and `end`."""
+        ring = self.rings[resolution]
+        first, rows = ring.window(start, end)
+        result = {
+            "resolution": resolution,
+            "start": isoformat(first * ring.width),
+            "end": isoformat(end),
+            "totals": self._summarize(rows.sum(axis=0)),
+        }
+        if series:
+            result["series"] = [
+                {"time": isoformat((first + i) * ring.width),
+                 **self._summarize(row)}
+                for i, row in enumerate(rows)
+            ]
+        return result
+
+    def _add(self, ts, field, amount=1.0):
+        for ring in self.rings.values():
+            ring.add(ts, COLUMN[field], amount)
+
+    @staticmethod
+    def _summarize(row):
+        started, completed, error, booked, duration_sum, duration_count, \
+            first_audio_sum, first_audio_count, barge_ins = row.tolist()
+        ended = completed + error
+        return {
+            "calls": int(started),
+            "completed": int(completed),
+            "error": int(error),
+            "booked": int(booked),
+            "success_rate": round(completed / ended * 100, 1) if ended else None,
+            "avg_duration": round(duration_sum / duration_count, 1) if duration_count else None,
+            "avg_first_audio_ms": round(first_audio_sum / first_audio_count, 1) if first_audio_count else None,
+            "barge_ins": int(barge_ins),
+        }
@@ -0,0 +1,341 @@
+import math
+import re
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from conversation_store import STATUSES
+
+# Transcript words; an apostrophe suffix stays attached ("don't", "doctor's").
+WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+# A query chunk made only of phone punctuation and at least two digits.
+PHONE = re.compile(r"\+?[\d\-(). ]*\d[\d\-(). ]*\d[\d\-(). ]*")
+STOPWORDS = frozenset("""
+a an and are as at be but by can do for from have i i'm in is it it's me my no not of on or so
+that the this to um uh was we what with yes you your
+""".split())
+# Score for matching a caller number or a name in the appointment details.
+FIELD_BOOST = 5.0
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def words(text):
+    return [w for w in WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def grams(key):
+    """Trigrams of `key`, plus a start-of-key bigram so two-character prefixes can be looked up."""
+    padded = '\x00' + key
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def parse_query(query):
+    """[(kind, text)] with kind 'phone' (digits only) or 'word'."""
+    terms = []
+    for chunk in query.split():
+        if PHONE.fullmatch(chunk):
+            terms.append(('phone', ''.join(ch for ch in chunk if ch.isdigit())))
+        else:
+            terms.extend(('word', w) for w in words(chunk))
+    return terms
+
+
+class _Postings:
+    """Append-only (doc, value) columns for one term."""
+
+    __slots__ = ('docs', 'values')
+
+    def __init__(self, typecode='H'):
+        self.docs = array('I')
+        self.values = array(typecode)
+
+    def add(self, doc, value):
+        self.docs.append(doc)
+        self.values.append(value)
+
+    def arrays(self):
+        return np.frombuffer(self.docs, dtype=np.uint32), np.frombuffer(self.values, dtype=np.uint16)
+
+
+class SearchIndex:
+    """Ranked search over transcripts, caller numbers and appointment names.
+
+    Fed by the conversation store's change events (`observe()`), so it is
+    kept current as transcript segments arrive and records change. While a
+    call is active its word counts are held in a per-call Counter; when it
+    ends they are appended once to the transcript postings, so each term's
+    postings are columnar arrays scored with numpy (BM25). Caller numbers
+    (digits only) and the words of the patient and doctor names are kept
+    in a trigram index, matched as substrings (two-character queries match
+    prefixes). Removed calls are masked out; once they outnumber the live
+    ones, their postings are dropped and the rest renumbered, so the index
+    stays sized to the store's retention. Documents are numbered in arrival
+    order, which breaks score ties newest first. Each document's call status
+    is kept too, so a search can be limited to one status before paging.
+    """
+
+    def __init__(self):
+        self._docs = {}  # call_id -> doc
+        self._ids = []  # doc -> call_id
+        self._keys = []  # doc -> '\x00'-joined phone digits and name words
+        self._alive = np.zeros(1024, dtype=bool)
+        self._lengths = np.zeros(1024, dtype=np.float32)
+        self._status = np.zeros(1024, dtype=np.uint8)  # index into STATUSES
+        self._live = {}  # doc -> Counter of an active call's words
+        self._postings = {}  # word -> _Postings
+        self._grams = {}  # gram -> array('I') of docs
+        self._stale = set()  # docs that lost a key; their gram hits are verified
+        self._total_length = 0
+        self._count = 0
+        self._dead = 0
+        self.queries = 0
+
+    def __len__(self):
+        return self._count
+
+    def observe(self, call_id, type, data):
+        """ConversationStore listener hook."""
+        if type == 'status':
+            doc = self._docs.get(call_id)
+            if doc is None:
+                doc = self._add(call_id, data['client_phone'])
+            self._status[doc] = STATUSES.index(data['status'])
+            if data['status'] != 'active':
+                self._flush(doc)
+        elif type == 'transcript':
+            self.add_text(call_id, data['message'])
+        elif type == 'appointment':
+            self.set_names(call_id, data)
+
+    def add_text(self, call_id, text):
+        doc = self._docs.get(call_id)
+        if doc is None:
+            return
+        found = words(text)
+        self._lengths[doc] += len(found)
+        self._total_length += len(found)
+        counts = self._live.get(doc)
+        if counts is not None:
+            counts.update(found)
+        else:
+            # A segment that arrives after the call ended is appended on its own.
+            for word, tf in Counter(found).items():
+                self._postings.setdefault(word, _Postings()).add(doc, min(tf, 0xFFFF))
+
+    def set_names(self, call_id, details):
+        doc = self._docs.get(call_id)
+        if doc is None:
+            return
+        names = ' '.join(str((details or {}).get(field) or '') for field in ('name', 'docname'))
+        old = self._keys[doc].split('\x00')[1:]
+        keys = old[:1] + WORD.findall(names.lower())
+        self._set_keys(doc, keys)
+        if not set(old) <= set(keys):
+            self._stale.add(doc)
+
+    def remove(self, call_id):
+        doc = self._docs.pop(call_id, None)
+        if doc is None:
+            return
+        self._alive[doc] = False
+        self._live.pop(doc, None)
+        self._stale.discard(doc)
+        self._total_length -= int(self._lengths[doc])
+        self._count -= 1
+        self._dead += 1
+        if self._dead > max(self._count, 1024):
+            self._compact()
+
+    def search(self, query, offset=0, limit=20, status=None, phone=None):
+        """(hits, total): hits are (call_id, score) for one page, best first.
+
+        Every term of `query` must match. `status` and `phone` (digits
+        anywhere in the caller number) filter without scoring, so a search
+        can be just a filter, newest first.
+        """
+        self.queries += 1
+        found = self._match(query, status, phone)
+        if found is None:
+            return [], 0
+        matched, scores = found
+        docs = np.flatnonzero(matched)
+        scores = np.round(scores[docs], 6)
+        pick = self._top(docs, scores, offset + limit)
+        order = pick[np.lexsort((-docs[pick], -scores[pick]))][offset:]
+        return [(self._ids[doc], round(float(scores[i]), 3)) for i, doc in zip(order, docs[order].tolist())], len(docs)
+
+    def matching(self, call_ids, query, phone=None):
+        """The subset of `call_ids` that `query` and `phone` match (status is not checked)."""
+        found = self._match(query, None, phone)
+        if found is None:
+            return set()
+        matched = found[0]
+        return {call_id for call_id in call_ids
+                if (doc := self._docs.get(call_id)) is not None and matched[doc]}
+
+    def _match(self, query, status, phone):
+        """(matched, scores) over all docs, or None if nothing can match."""
+        terms = parse_query(query or '')
+        digits = ''.join(ch for ch in phone or '' if ch.isdigit())
+        if not terms and not digits:
+            return None
+        # Dense per-doc match masks and scores: a term costs O(postings + docs) with no sorting.
+        matched = self._alive[:len(self._ids)].copy()
+        scores = np.zeros(len(self._ids))
+        if status is not None:
+            matched &= self._status[:len(self._ids)] == STATUSES.index(status)
+        if digits:
+            matched &= self._phone_hits(digits)
+        for kind, text in terms:
+            if not matched.any():
+                return None
+            term_matched, term_scores = self._field_hits(text) if kind == 'phone' else self._word_hits(text)
+            matched &= term_matched
+            scores += term_scores
+        return (matched, scores) if matched.any() else None
+
+    @staticmethod
+    def _top(docs, scores, k):
+        """Positions of the k best (score, then newest) without sorting everything."""
+        if k >= len(docs):
+            return np.arange(len(docs))
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)
+        need = k - len(above)
+        if need < len(ties):
+            ties = ties[np.argpartition(docs[ties], len(ties) - need)[len(ties) - need:]]
+        return np.concatenate([above, ties])
+
+    def stats(self):
+        return {
+            "calls": self._count,
+            "active": len(self._live),
+            "words": len(self._postings),
+            "grams": len(self._grams),
+            "removed": self._dead,
+            "queries": self.queries,
+        }
+
+    def _add(self, call_id, phone):
+        doc = len(self._ids)
+        if doc == len(self._alive):
+            self._alive = np.concatenate([self._alive, np.zeros(doc, dtype=bool)])
+            self._lengths = np.concatenate([self._lengths, np.zeros(doc, dtype=np.float32)])
+            self._status = np.concatenate([self._status, np.zeros(doc, dtype=np.uint8)])
+        self._docs[call_id] = doc
+        self._ids.append(call_id)
+        self._keys.append('')
+        self._alive[doc] = True
+        self._live[doc] = Counter()
+        self._count += 1
+        self._set_keys(doc, [''.join(ch for ch in phone or '' if ch.isdigit())])
+        return doc
+
+    def _set_keys(self, doc, keys):
+        old = set().union(*(grams(key) for key in self._keys[doc].split('\x00') if key))
+        for key in keys:
+            for gram in grams(key) - old:
+                self._grams.setdefault(gram, array('I')).append(doc)
+                old.add(gram)
+        self._keys[doc] = '\x00' + '\x00'.join(keys)
+
+    def _flush(self, doc):
+        counts = self._live.pop(doc, None)
+        for word, tf in (counts or {}).items():
+            self._postings.setdefault(word, _Postings()).add(doc, min(tf, 0xFFFF))
+
+    def _word_hits(self, word):
+        """(matched, scores) over all docs for `word` in a transcript or a name."""
+        size = len(self._ids)
+        matched, scores = self._field_hits(word) if len(word) >= 2 else (np.zeros(size, dtype=bool), np.zeros(size))
+        postings = self._postings.get(word)
+        live = [(doc, counts[word]) for doc, counts in self._live.items() if word in counts]
+        df = min((len(postings.docs) if postings is not None else 0) + len(live), self._count)
+        if not df:
+            return matched, scores
+        idf = math.log(1 + (self._count - df + 0.5) / (df + 0.5))
+        average = max(self._total_length / max(self._count, 1), 1.0)
+        parts = [postings.arrays()] if postings is not None else []
+        if live:
+            parts.append((np.array([doc for doc, _ in live], dtype=np.uint32),
+                          np.array([tf for _, tf in live], dtype=np.uint16)))
+        # bincount sums the tfs of a doc that appears twice (a segment after the call ended).
+        tf = sum(np.bincount(docs, weights=tfs, minlength=size) for docs, tfs in parts)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[:size] / average)
+        matched |= tf > 0
+        scores += idf * (BM25_K1 + 1) * tf / (tf + norm)
+        return matched, scores
+
+    def _field_hits(self, text):
+        """(matched, scores) over all docs whose number or a name word contains `text`
+        (starts with it, for two characters)."""
+        size = len(self._ids)
+        matched = np.zeros(size, dtype=bool)
+        if len(text) < 2:
+            return matched, np.zeros(size)
+        needle = '\x00' + text if len(text) == 2 else text
+        wanted = [needle] if len(text) == 2 else list({text[i:i + 3] for i in range(len(text) - 2)})
+        postings = [self._grams.get(gram) for gram in wanted]
+        if all(postings):
+            postings.sort(key=len)
+            matched[np.frombuffer(postings[0], dtype=np.uint32)] = True
+            for gram_docs in postings[1:]:
+                other = np.zeros(size, dtype=bool)
+                other[np.frombuffer(gram_docs, dtype=np.uint32)] = True
+                matched &= other
+            # One gram is an exact match unless the doc lost a key; several can be out of order.
+            check = np.flatnonzero(matched).tolist() if len(wanted) > 1 else [
+                doc for doc in self._stale if matched[doc]]
+            for doc in check:
+                if needle not in self._keys[doc]:
+                    matched[doc] = False
+        return matched, matched * FIELD_BOOST
+
+    def _phone_hits(self, digits):
+        """Docs whose caller number contains `digits`: from the trigram index for three or
+        more, else by scanning the numbers (the trigrams only hold two-digit prefixes)."""
+        if len(digits) >= 3:
+            return self._field_hits(digits)[0]
+        numbers = (key.split('\x00', 2)[1] if key else '' for key in self._keys)
+        return np.fromiter((digits in number for number in numbers), dtype=bool, count=len(self._keys))
+
+    def _compact(self):
+        """Drop removed calls and renumber the rest (keeping their order), so the
+        index and the per-query arrays stay sized to the calls actually kept."""
+        keep = np.flatnonzero(self._alive[:len(self._ids)])
+        remap = np.zeros(len(self._ids), dtype=np.uint32)
+        remap[keep] = np.arange(len(keep), dtype=np.uint32)
+        alive = self._alive
+        for word, postings in list(self._postings.items()):
+            docs, values = postings.arrays()
+            kept = alive[docs]
+            if not kept.any():
+                del self._postings[word]
+                continue
+            postings.docs = array('I', remap[docs[kept]].tobytes())
+            postings.values = array('H', values[kept].tobytes())
+        for gram, gram_docs in list(self._grams.items()):
+            docs = np.frombuffer(gram_docs, dtype=np.uint32)
+            docs = docs[alive[docs]]
+            if len(docs):
+                self._grams[gram] = array('I', remap[docs].tobytes())
+            else:
+                del self._grams[gram]
+        capacity = max(1024, 2 * len(keep))
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:len(keep)] = True
+        lengths = self._lengths[keep]
+        self._lengths = np.zeros(capacity, dtype=np.float32)
+        self._lengths[:len(keep)] = lengths
+        status = self._status[keep]
+        self._status = np.zeros(capacity, dtype=np.uint8)
+        self._status[:len(keep)] = status
+        self._ids = [self._ids[doc] for doc in keep.tolist()]
+        self._keys = [self._keys[doc] for doc in keep.tolist()]
+        self._docs = {call_id: doc for doc, call_id in enumerate(self._ids)}
+        self._live = {int(remap[doc]): counts for doc, counts in self._live.items()}
+        self._stale = {int(remap[doc]) for doc in self._stale}
+        self._dead = 0
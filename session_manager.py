@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    """A media-stream session: its relay tasks and channels, and when Twilio last sent anything."""
+
+    def __init__(self, call_id):
+        self.call_id = call_id
+        self.started = time.monotonic()
+        self.last_activity = self.started
+        self.tasks = ()
+        self.channels = ()
+        # Why the session was ended from outside ('idle', 'max_duration'), if it was.
+        self.reason = None
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    def expire(self, reason):
+        self.reason = reason
+        for task in self.tasks:
+            task.cancel()
+
+
+class SessionManager:
+    """Admission control, stalled-session reaping and drain mode for calls.
+
+    /incoming-call asks `admit()` for a slot, which is held for the CallSid
+    until its media stream opens (or `reservation_ttl` passes). A call is
+    refused once `max_calls` sessions and reservations are in use (0 means
+    no limit) or while draining; calls already admitted still connect and
+    run to the end. A background task expires sessions that have had no
+    Twilio message for `idle_timeout` seconds or have run past
+    `max_duration`, which cancels both of their relay tasks.
+    """
+
+    def __init__(self, max_calls=0, idle_timeout=30.0, max_duration=3600.0,
+                 reservation_ttl=30.0, reap_interval=1.0):
+        self.max_calls = max_calls
+        self.idle_timeout = idle_timeout
+        self.max_duration = max_duration
+        self.reservation_ttl = reservation_ttl
+        self.reap_interval = reap_interval
+        self.sessions = {}  # call_id -> Session
+        self.draining = False
+        self.rejected = 0
+        self.reaped = 0
+        self._reserved = {}  # call_sid -> expiry
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._reap())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def in_use(self):
+        now = time.monotonic()
+        for call_sid in [sid for sid, expiry in self._reserved.items() if expiry <= now]:
+            del self._reserved[call_sid]
+        return len(self.sessions) + len(self._reserved)
+
+    def _has_room(self):
+        return not self.draining and (self.max_calls <= 0 or self.in_use() < self.max_calls)
+
+    def admit(self, call_sid):
+        """Hold a slot for `call_sid`; False if the call should be turned away."""
+        if not self._has_room():
+            self.rejected += 1
+            return False
+        if call_sid:
+            self._reserved[call_sid] = time.monotonic() + self.reservation_ttl
+        return True
+
+    def open(self, call_id, call_sid=None):
+        """Start a session, using the slot admit() held for `call_sid`; None if there is no room."""
+        if self._reserved.pop(call_sid, None) is None and not self._has_room():
+            self.rejected += 1
+            return None
+        session = self.sessions[call_id] = Session(call_id)
+        self._idle.clear()
+        return session
+
+    def close_session(self, session):
+        if self.sessions.get(session.call_id) is session:
+            del self.sessions[session.call_id]
+        if not self.sessions:
+            self._idle.set()
+
+    def drain(self):
+        self.draining = True
+
+    def resume(self):
+        self.draining = False
+
+    async def wait_idle(self, timeout):
+        """Wait up to `timeout` seconds for the last session to end; True if none are left."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return not self.sessions
+
+    def stats(self):
+        return {
+            "draining": self.draining,
+            "active": len(self.sessions),
+            "reserved": self.in_use() - len(self.sessions),
+            "max_calls": self.max_calls,
+            "rejected": self.rejected,
+            "reaped": self.reaped,
+        }
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            now = time.monotonic()
+            for session in list(self.sessions.values()):
+                # Sessions still connecting upstream have no relay tasks to cancel yet.
+                if session.reason is not None or not session.tasks:
+                    continue
+                if now - session.last_activity > self.idle_timeout:
+                    reason = 'idle'
+                elif now - session.started > self.max_duration:
+                    reason = 'max_duration'
+                else:
+                    continue
+                logger.warning("Ending call %s: %s", session.call_id, reason)
+                self.reaped += 1
+                session.expire(reason)
@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    worker TEXT NOT NULL,
+    call_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS worker_metrics (
+    worker TEXT PRIMARY KEY,
+    updated REAL NOT NULL,
+    data TEXT NOT NULL,
+    last_change INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SharedState:
+    """Conversation changes and metric snapshots shared between worker processes.
+
+    Every worker appends its own record and transcript changes to a SQLite
+    log in WAL mode and tails the log for everyone else's, so each worker's
+    ConversationStore ends up holding every call. Writes go through a
+    background thread in batches; the event loop only pays for a queue put.
+    Each worker also keeps one row of metric values, refreshed periodically,
+    that /metrics sums across workers. The row also records how far the
+    worker has read the log: the log is pruned to `max_changes` rows, but
+    never past what a worker refreshed in the last `reader_ttl` seconds
+    has yet to read.
+    """
+
+    def __init__(self, path, worker=None, batch_size=500, max_changes=200000, reader_ttl=60.0):
+        self.path = path
+        self.worker = worker or str(os.getpid())
+        self.batch_size = batch_size
+        self.max_changes = max_changes
+        self.reader_ttl = reader_ttl
+        self.last_change = 0
+        # Set while applying other workers' changes, so they aren't written back.
+        self.applying = False
+        self.written = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._reader = None
+        self._read_lock = threading.Lock()
+
+    @staticmethod
+    def reset(path):
+        """Delete the database and its WAL files, before any worker has started."""
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def start(self):
+        conn = connect(self.path)
+        conn.executescript(SCHEMA)
+        conn.close()
+        self._reader = connect(self.path)
+        self._thread = threading.Thread(target=self._write_loop, name='shared-state-writer', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+        if self._reader is not None:
+            self._reader.close()
+
+    def record(self, call_id, state):
+        self._queue.put(('change', call_id, 'record', json.dumps(state)))
+
+    def transcript(self, call_id, segment):
+        self._queue.put(('change', call_id, 'transcript', json.dumps(segment)))
+
+    def publish_metrics(self, snapshot):
+        self._queue.put(('metrics', json.dumps(snapshot), self.last_change))
+
+    def changes(self, limit=1000):
+        """Other workers' changes after the last ones returned, as (call_id, kind, data)."""
+        with self._read_lock:
+            # One read transaction, so this worker's own rows up to `head` count as read too.
+            self._reader.execute("BEGIN")
+            try:
+                head = self._reader.execute("SELECT COALESCE(MAX(id), 0) FROM changes").fetchone()[0]
+                rows = self._reader.execute(
+                    "SELECT id, call_id, kind, data FROM changes WHERE id > ? AND id <= ? AND worker != ? "
+                    "ORDER BY id LIMIT ?", (self.last_change, head, self.worker, limit)).fetchall()
+            finally:
+                self._reader.execute("COMMIT")
+        if len(rows) == limit:
+            self.last_change = rows[-1][0]
+        else:
+            self.last_change = max(self.last_change, head)
+        return [(call_id, kind, json.loads(data)) for _, call_id, kind, data in rows]
+
+    def worker_metrics(self, max_age=30):
+        """Metric snapshots of the other live workers."""
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT data FROM worker_metrics WHERE worker != ? AND updated > ?",
+                (self.worker, time.time() - max_age)).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def _write_loop(self):
+        conn = connect(self.path)
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                self._write(conn, [item for item in batch if item is not None])
+                if None in batch:
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch):
+        changes = [(self.worker,) + item[1:] for item in batch if item[0] == 'change']
+        metrics = [item[1:] for item in batch if item[0] == 'metrics']
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT INTO changes (worker, call_id, kind, data) VALUES (?, ?, ?, ?)", changes)
+            if metrics:
+                conn.execute("INSERT OR REPLACE INTO worker_metrics (worker, updated, data, last_change) "
+                             "VALUES (?, ?, ?, ?)", (self.worker, time.time()) + metrics[-1])
+            if self.written // self.max_changes != (self.written + len(changes)) // self.max_changes:
+                # Keep the log bounded, but only drop rows every live worker has read.
+                conn.execute(
+                    "DELETE FROM changes WHERE id <= MIN((SELECT MAX(id) FROM changes) - ?, "
+                    "COALESCE((SELECT MIN(last_change) FROM worker_metrics WHERE updated > ?), "
+                    "(SELECT MAX(id) FROM changes)))",
+                    (self.max_changes, time.time() - self.reader_ttl))
+            conn.execute("COMMIT")
+            self.written += len(changes)
+        except sqlite3.Error as e:
+            logger.warning("Shared state write failed: %s", e)
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
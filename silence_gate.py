@@ -0,0 +1,97 @@
+import base64
+import math
+from collections import deque
+
+import numpy as np
+
+FRAME_MS = 20
+# Largest magnitude a G.711 mu-law byte decodes to.
+ULAW_FULL_SCALE = 32124
+
+
+def _ulaw_to_linear():
+    table = np.empty(256, dtype=np.int32)
+    for byte in range(256):
+        u = ~byte & 0xFF
+        magnitude = ((((u & 0x0F) << 3) + 0x84) << ((u >> 4) & 0x07)) - 0x84
+        table[byte] = -magnitude if u & 0x80 else magnitude
+    return table
+
+
+# 256-entry lookup tables: decoded sample and its square, indexed by the mu-law byte.
+ULAW_TO_LINEAR = _ulaw_to_linear()
+ULAW_POWER = ULAW_TO_LINEAR.astype(np.float64) ** 2
+
+
+def frame_dbfs(chunk):
+    """RMS level of a mu-law frame in dBFS, via the power lookup table."""
+    power = ULAW_POWER[np.frombuffer(chunk, dtype=np.uint8)].mean() if chunk else 0.0
+    return 10 * math.log10(power / ULAW_FULL_SCALE ** 2) if power > 0 else -120.0
+
+
+class SilenceGate:
+    """Energy gate that holds back long silent runs of inbound Twilio audio.
+
+    A frame at or above `threshold_dbfs` opens the gate. After the last loud
+    frame, `hangover_ms` of audio is still forwarded, so server_vad hears
+    enough trailing silence to end the turn. While closed, the last
+    `preroll_ms` of audio is kept and sent ahead of the next loud frame, so
+    onsets (and the VAD's prefix padding) aren't clipped. One real frame is
+    forwarded every `keepalive_ms` of suppressed audio as comfort noise.
+    """
+
+    def __init__(self, threshold_dbfs=-45.0, hangover_ms=800, preroll_ms=300, keepalive_ms=1000):
+        self.threshold_dbfs = threshold_dbfs
+        # Compare mean power against a precomputed bound instead of taking a log per frame.
+        self.threshold_power = ULAW_FULL_SCALE ** 2 * 10 ** (threshold_dbfs / 10)
+        self.hangover_frames = max(1, hangover_ms // FRAME_MS)
+        self.keepalive_frames = max(1, keepalive_ms // FRAME_MS) if keepalive_ms else 0
+        self._preroll = deque(maxlen=max(0, preroll_ms // FRAME_MS))
+        self._open_for = 0  # frames left before the gate closes
+        self._silent_run = 0
+        self.frames_in = 0
+        self.frames_forwarded = 0
+        self.keepalives = 0
+        self.openings = 0
+
+    def process(self, payload):
+        """Return the base64 payloads to forward for this frame (possibly none)."""
+        self.frames_in += 1
+        samples = np.frombuffer(base64.b64decode(payload), dtype=np.uint8)
+        loud = samples.size and ULAW_POWER[samples].mean() >= self.threshold_power
+        if loud:
+            if self._open_for == 0:
+                self.openings += 1
+            self._open_for = self.hangover_frames
+            self._silent_run = 0
+            forwarded = list(self._preroll)
+            self._preroll.clear()
+            forwarded.append(payload)
+        elif self._open_for:
+            self._open_for -= 1
+            forwarded = [payload]
+        else:
+            self._silent_run += 1
+            if self.keepalive_frames and self._silent_run % self.keepalive_frames == 0:
+                self.keepalives += 1
+                # Audio held from before the keepalive can't follow it out of order.
+                self._preroll.clear()
+                forwarded = [payload]
+            else:
+                self._preroll.append(payload)
+                forwarded = []
+        self.frames_forwarded += len(forwarded)
+        return forwarded
+
+    @property
+    def frames_suppressed(self):
+        return self.frames_in - self.frames_forwarded
+
+    def stats(self):
+        return {
+            "frames_in": self.frames_in,
+            "frames_forwarded": self.frames_forwarded,
+            "frames_suppressed": self.frames_suppressed,
+            "keepalives": self.keepalives,
+            "openings": self.openings,
+        }
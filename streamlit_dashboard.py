@@ -4,7 +4,18 @@ import json
 import requests
 from datetime import datetime, timedelta
 import time
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from dashboard_stats import (conversations_frame, compute_metrics, time_ago_labels, filter_positions, rollup_metrics,
+                             rollup_series_frame)
+from dashboard_pages import CARD_FIELDS, PAGE_SIZES, TRANSCRIPT_WINDOW, page_cards, transcript_window, transcript_html
+
+# Reruns within this many seconds reuse the viewer's page as-is
+CACHE_TTL_SECONDS = 2
+# Headline metrics and the trend chart cover this many hours of backend rollups,
+# fetched at most once per STATS_TTL_SECONDS for all viewers
+STATS_HOURS = 168
+STATS_TTL_SECONDS = 10
 
 # Page configuration
 st.set_page_config(
@@ -75,12 +86,90 @@ st.markdown("""
         margin: 0.5rem 0;
         border-radius: 5px;
     }
+    
+    .appointment-info {
+        background: #ecfdf5;
+        padding: 0.5rem;
+        margin-top: 0.5rem;
+        border-radius: 5px;
+    }
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """One keep-alive HTTP session shared by every rerun and viewer"""
+    return requests.Session()
+
+class ConversationPage:
+    """One viewer's page of conversations from the backend cursor API, kept current with conditional `since` deltas"""
+    
+    def __init__(self, filters: Dict, cursor: Optional[str]):
+        self.filters = filters
+        self.cursor = cursor
+        self.conversations: List[Dict] = []
+        self.next_cursor: Optional[str] = None
+        self.total: Optional[int] = None
+        self.version: Optional[int] = None
+        self.etag: Optional[str] = None
+        self.fetched_at = 0.0
+    
+    @property
+    def searching(self) -> bool:
+        return bool(self.filters["q"] or self.filters["phone"])
+    
+    @property
+    def path(self) -> str:
+        return "/conversations/search" if self.searching else "/conversations"
+    
+    def params(self) -> Dict:
+        """Query parameters selecting this page's rows; `since` deltas use them too"""
+        params = {"q": self.filters["q"], "phone": self.filters["phone"]} if self.searching else {}
+        return {name: value for name, value in params.items() if value}
+    
+    def merge(self, changed: List[Dict], removed: List[str]) -> bool:
+        """Apply a delta to the shown conversations in place; False if the page has to be fetched again"""
+        if not changed and not removed:
+            return True
+        shown = {c["id"]: c for c in self.conversations}
+        if any(conversation_id in shown for conversation_id in removed):
+            return False
+        first = self.conversations[0]["start_time"] if self.conversations else None
+        last = self.conversations[-1]["start_time"] if self.conversations else None
+        full = len(self.conversations) >= self.filters["limit"]
+        for conversation in changed:
+            existing = shown.get(conversation["id"])
+            matches = self.filters["status"] in (None, conversation["status"])
+            if existing is None:
+                if not matches:
+                    continue
+                # A search delta only carries calls matching the search; one may now rank onto this page
+                if self.searching:
+                    return False
+                # A call that now belongs between this page's first and last rows (a new call, on the first page)
+                if (self.cursor is None or conversation["start_time"] <= first) \
+                        and (not full or conversation["start_time"] >= last):
+                    return False
+                continue
+            if not matches:
+                return False
+            existing.update(conversation)
+        return True
+
+@st.cache_resource(max_entries=32)
+def get_page_cards(fingerprint, labels, _conversations: List[Dict]):
+    """Rendered cards of one page, reused until a field a card shows or a time label changes"""
+    return page_cards(_conversations, range(len(_conversations)), dict(labels))
+
+@st.cache_resource(max_entries=64)
+def get_transcript_html(conversation_id, start, end, _segments: List[Dict]) -> str:
+    """Rendered transcript[start:end]; transcripts only grow, so a range never changes"""
+    return transcript_html(_segments)
+
 class ConversationManager:
     def __init__(self):
         self.api_base_url = "http://localhost:5050"
+        self.session = get_http_session()
         
     def get_mock_conversations(self) -> List[Dict]:
         """Generate mock conversation data for demonstration"""
@@ -195,18 +284,156 @@ class ConversationManager:
         
         return conversations
 
-    def get_conversations(self) -> List[Dict]:
-        """Fetch conversations from API or return mock data"""
+    def get_page(self, filters: Dict, cursor: Optional[str]) -> Optional[ConversationPage]:
+        """The viewer's page for `filters` at `cursor`, or None if the API is unavailable.
+
+        A page is fetched once from /conversations (or /conversations/search)
+        and afterwards kept current with /conversations?since= deltas, which
+        cost a single 304 while nothing changes; it is fetched again only
+        when a delta touches which calls belong on it.
+        """
+        page = st.session_state.get("conversation_page")
+        try:
+            if page is None or page.filters != filters or page.cursor != cursor:
+                page = self._fetch_page(filters, cursor)
+            elif time.time() - page.fetched_at >= CACHE_TTL_SECONDS and not self._refresh_page(page):
+                page = self._fetch_page(filters, cursor)
+        except requests.RequestException:
+            page = None
+            st.session_state.backend_status = "unavailable"
+        st.session_state.conversation_page = page
+        return page
+
+    def _fetch_page(self, filters: Dict, cursor: Optional[str]) -> Optional[ConversationPage]:
+        page = ConversationPage(filters, cursor)
+        params = {"status": filters["status"], "limit": filters["limit"], "cursor": cursor}
+        response = self.session.get(
+            f"{self.api_base_url}{page.path}",
+            params={**page.params(), **{name: value for name, value in params.items() if value}},
+            timeout=5
+        )
+        if response.status_code != 200:
+            st.session_state.backend_status = "error"
+            return None
+        page.conversations = response.json()
+        page.next_cursor = response.headers.get("X-Next-Cursor")
+        total = response.headers.get("X-Total-Count")
+        page.total = int(total) if total else None
+        page.version = int(response.headers["X-Conversations-Version"])
+        page.etag = response.headers.get("ETag")
+        page.fetched_at = time.time()
+        st.session_state.backend_status = "connected"
+        return page
+
+    def _refresh_page(self, page: ConversationPage) -> bool:
+        """Apply the changes since the page was read; False if it has to be fetched again"""
+        response = self.session.get(
+            f"{self.api_base_url}{page.path}",
+            params={**page.params(), "since": page.version},
+            headers={"If-None-Match": page.etag} if page.etag else {},
+            timeout=5
+        )
+        page.fetched_at = time.time()
+        if response.status_code == 304:
+            return True
+        if response.status_code != 200 or response.headers.get("X-Full-Sync"):
+            return False
+        removed = [i for i in response.headers.get("X-Removed", "").split(",") if i]
+        if not page.merge(response.json(), removed):
+            return False
+        page.version = int(response.headers["X-Conversations-Version"])
+        page.etag = response.headers.get("ETag")
+        return True
+
+    def get_mock_page(self, conversations: List[Dict], filters: Dict, cursor: Optional[str]) -> ConversationPage:
+        """A page of the mock conversations, with offsets for cursors"""
+        frame = conversations_frame(conversations)
+        positions = filter_positions(frame, status=filters["status"], phone=filters["phone"])
+        start = int(cursor or 0)
+        end = start + filters["limit"]
+        page = ConversationPage(filters, cursor)
+        page.conversations = [conversations[i] for i in positions[start:end]]
+        page.next_cursor = str(end) if end < len(positions) else None
+        page.total = len(positions)
+        return page
+
+    def page_version(self) -> Optional[int]:
+        """Backend version the viewer's page was last brought up to; None with mock data"""
+        page = st.session_state.get("conversation_page")
+        return page.version if page is not None else None
+
+    def backend_status(self) -> str:
+        """'connected', 'error' or 'unavailable', from the last page fetch rather than a fresh ping"""
+        return st.session_state.get("backend_status", "unavailable")
+
+    def get_stats(self, hours: float, series: bool = False) -> Optional[Dict]:
+        """Backend rollups for the last `hours`, or None if the API is unavailable"""
+        start = datetime.now().astimezone() - timedelta(hours=hours)
+        try:
+            response = self.session.get(
+                f"{self.api_base_url}/stats",
+                params={"start": start.isoformat(), "series": series},
+                timeout=5
+            )
+            if response.status_code == 200:
+                return response.json()
+        except requests.RequestException:
+            pass
+        return None
+
+    def get_transcript(self, conversation_id: str, after: int = 0) -> Optional[List[Dict]]:
+        """Fetch transcript segments newer than `after`, or None if the API is unavailable"""
         try:
-            # Try to fetch from actual API
-            response = requests.get(f"{self.api_base_url}/conversations", timeout=5)
+            response = self.session.get(
+                f"{self.api_base_url}/conversations/{conversation_id}/transcript",
+                params={"after": after},
+                timeout=5
+            )
             if response.status_code == 200:
                 return response.json()
         except:
             pass
-        
-        # Return mock data if API is not available
-        return self.get_mock_conversations()
+        return None
+
+    def get_updates(self, since: int = 0) -> Optional[List[Dict]]:
+        """Fetch pushed conversation events after sequence `since`, or None if the API is unavailable"""
+        try:
+            response = self.session.get(
+                f"{self.api_base_url}/conversations/updates",
+                params={"since": since},
+                timeout=5
+            )
+            if response.status_code == 200:
+                return response.json()
+        except:
+            pass
+        return None
+
+    def get_transcript_incremental(self, conversation: Dict) -> List[Dict]:
+        """Return the full transcript, fetching only segments added since the last rerun"""
+        cache = st.session_state.setdefault("transcripts", {})
+        fetched_at = st.session_state.setdefault("transcript_versions", {})
+        segments = cache.get(conversation["id"], [])
+        version = self.page_version()
+        if version is not None and fetched_at.get(conversation["id"]) == version:
+            # Nothing in the backend changed since the last fetch
+            return segments
+        after = segments[-1]["seq"] if segments else 0
+        new_segments = self.get_transcript(conversation["id"], after)
+        if new_segments is None:
+            # Mock data (or API down): the conversation carries its own transcript
+            return conversation.get("transcript") or segments
+        fetched_at[conversation["id"]] = version
+        if new_segments:
+            segments = segments + new_segments
+            cache[conversation["id"]] = segments
+        return segments
+
+@st.cache_data(ttl=STATS_TTL_SECONDS, show_spinner=False)
+def get_dashboard_stats() -> Tuple[Optional[Dict], Optional[Dict]]:
+    """(/stats over STATS_HOURS with its hourly series, /stats over the last hour), shared by every viewer"""
+    conv_manager = ConversationManager()
+    return conv_manager.get_stats(STATS_HOURS, series=True), conv_manager.get_stats(1)
 
 def main():
     # Initialize conversation manager
@@ -240,31 +467,44 @@ def main():
         )
         
         phone_search = st.text_input("Search by Phone Number")
+        text_search = st.text_input("Search Transcripts & Names")
+        page_size = st.selectbox("Conversations per Page", PAGE_SIZES, index=1)
         
         st.header("📊 Quick Stats")
         
-    # Get conversations
-    conversations = conv_manager.get_conversations()
-    
-    # Apply filters
-    filtered_conversations = conversations.copy()
-    
-    if status_filter != "All":
-        filtered_conversations = [c for c in filtered_conversations if c["status"].lower() == status_filter.lower()]
-    
-    if phone_search:
-        filtered_conversations = [c for c in filtered_conversations if phone_search in c["client_phone"]]
-    
-    # Calculate statistics
-    total_calls = len(conversations)
-    active_calls = len([c for c in conversations if c["status"] == "active"])
-    completed_calls = len([c for c in conversations if c["status"] == "completed"])
-    error_calls = len([c for c in conversations if c["status"] == "error"])
-    
-    avg_duration = 0
-    if conversations:
-        durations = [c["duration"] for c in conversations if c["duration"]]
-        avg_duration = sum(durations) / len(durations) if durations else 0
+    # One page from the backend's cursor API; Previous/Next walk a stack of cursors
+    filters = {
+        "status": status_filter.lower() if status_filter != "All" else None,
+        "phone": phone_search or None,
+        "q": text_search or None,
+        "limit": page_size,
+    }
+    if st.session_state.get("page_filters") != filters:
+        st.session_state.page_filters = filters
+        st.session_state.page_cursors = [None]
+    cursors = st.session_state.page_cursors
+    page = conv_manager.get_page(filters, cursors[-1])
+    mock = None
+    if page is None:
+        # Return mock data if API is not available
+        mock = conv_manager.get_mock_conversations()
+        if text_search:
+            st.sidebar.warning("Transcript search needs the backend API")
+        page = conv_manager.get_mock_page(mock, {**filters, "q": None}, cursors[-1])
+    conversations = page.conversations
+    frame = conversations_frame(conversations)
+    
+    # Calculate statistics: from the backend rollups when connected, else from the mock list
+    week = last_hour = None
+    if mock is None:
+        week, last_hour = get_dashboard_stats()
+    metrics = rollup_metrics(week, last_hour) if week and last_hour else \
+        compute_metrics(conversations_frame(mock) if mock is not None else frame)
+    total_calls = metrics["total_calls"]
+    active_calls = metrics["active_calls"]
+    completed_calls = metrics["completed_calls"]
+    error_calls = metrics["error_calls"]
+    avg_duration = metrics["avg_duration"]
     
     # Display metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -273,7 +513,7 @@ def main():
         st.metric(
             label="📞 Total Calls",
             value=total_calls,
-            delta=f"+{len([c for c in conversations if (datetime.now() - datetime.fromisoformat(c['start_time'].replace('Z', '+00:00').replace('+00:00', ''))).total_seconds() < 3600])}" if conversations else None
+            delta=f"+{metrics['last_hour_calls']}" if total_calls else None
         )
     
     with col2:
@@ -295,106 +535,77 @@ def main():
             value=f"{int(avg_duration//60)}m {int(avg_duration%60)}s" if avg_duration > 0 else "0s"
         )
     
+    if week and week.get("series"):
+        st.subheader("📈 Calls per Hour")
+        st.line_chart(rollup_series_frame(week["series"])[["calls", "completed", "error"]])
+    
     # Update sidebar stats
     with st.sidebar:
         st.metric("Total Conversations", total_calls)
-        st.metric("Success Rate", f"{(completed_calls/total_calls*100):.1f}%" if total_calls > 0 else "0%")
+        st.metric("Success Rate", f"{metrics['success_rate']:.1f}%" if total_calls > 0 else "0%")
         if error_calls > 0:
             st.error(f"⚠️ {error_calls} calls with errors")
     
     # Main content
     st.header("💬 Recent Conversations")
     
-    if not filtered_conversations:
+    if not conversations:
         st.info("No conversations found matching your filters.")
+        if len(cursors) > 1:
+            st.button("◀ Previous", on_click=cursors.pop)
         return
     
+    col_prev, col_caption, col_next = st.columns([1, 4, 1])
+    col_prev.button("◀ Previous", disabled=len(cursors) == 1, on_click=cursors.pop)
+    col_next.button("Next ▶", disabled=not page.next_cursor, on_click=cursors.append, args=(page.next_cursor,))
+    first = (len(cursors) - 1) * page_size
+    of = f" of {page.total}" if page.total is not None else ""
+    col_caption.caption(f"Page {len(cursors)}: showing {first + 1}–{first + len(conversations)}{of} conversations")
+    time_ago = time_ago_labels(frame, np.arange(len(conversations)))
+    fingerprint = tuple((c["id"], *(repr(c.get(field)) for field in CARD_FIELDS)) for c in conversations)
+    cards = get_page_cards(fingerprint, tuple(time_ago.items()), conversations)
+    page_conversations = conversations
+    
     # Conversation tabs
     tab1, tab2 = st.tabs(["📋 Summary View", "📝 Detailed View"])
     
     with tab1:
-        # Display conversations in a grid
-        for i in range(0, len(filtered_conversations), 2):
+        # Display the page's conversations in a grid
+        for i in range(0, len(cards), 2):
             cols = st.columns(2)
             
             for j, col in enumerate(cols):
-                if i + j < len(filtered_conversations):
-                    conv = filtered_conversations[i + j]
+                if i + j < len(cards):
+                    conv_id, html = cards[i + j]
                     
                     with col:
-                        # Status indicator
-                        status_emoji = {
-                            "active": "🟢",
-                            "completed": "✅", 
-                            "error": "❌"
-                        }
-                        
-                        status_color = {
-                            "active": "success",
-                            "completed": "info",
-                            "error": "error"
-                        }
+                        st.markdown(html, unsafe_allow_html=True)
                         
-                        with st.container():
-                            st.markdown(f"""
-                            <div class="conversation-card {conv['status']}-call">
-                                <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.5rem;">
-                                    <strong>📞 {conv['client_phone']}</strong>
-                                    <span>{status_emoji[conv['status']]} {conv['status'].title()}</span>
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            # Time info
-                            start_time = datetime.fromisoformat(conv['start_time'].replace('Z', '+00:00').replace('+00:00', ''))
-                            time_ago = datetime.now() - start_time
-                            
-                            if time_ago.total_seconds() < 3600:
-                                time_str = f"{int(time_ago.total_seconds()//60)} minutes ago"
-                            else:
-                                time_str = f"{int(time_ago.total_seconds()//3600)} hours ago"
-                            
-                            st.caption(f"🕒 {time_str}")
-                            
-                            if conv["duration"]:
-                                st.caption(f"⏱️ Duration: {conv['duration']//60}m {conv['duration']%60}s")
-                            
-                            # Summary
-                            st.write(conv["summary"])
-                            
-                            # Appointment details if available
-                            if conv.get("appointment_details"):
-                                apt = conv["appointment_details"]
-                                st.success(f"""
-                                **📅 Appointment Scheduled:**
-                                - **Patient:** {apt['name']}
-                                - **Doctor:** Dr. {apt['docname']}
-                                - **Time:** {apt['appointment_datetime']}
-                                - **Phone:** {apt['phone']}
-                                """)
-                            
-                            # View details button
-                            if st.button(f"View Details", key=f"details_{conv['id']}"):
-                                st.session_state.selected_conversation = conv['id']
+                        # View details button
+                        if st.button(f"View Details", key=f"details_{conv_id}"):
+                            st.session_state.selected_conversation = conv_id
     
     with tab2:
-        # Conversation selection
-        conv_options = {f"{c['client_phone']} - {c['status']}": c['id'] for c in filtered_conversations}
+        # Conversation selection, from the current page
+        conv_options = {f"{c['client_phone']} - {c['status']}": c['id'] for c in page_conversations}
         
         if conv_options:
+            selected = st.session_state.get("selected_conversation")
+            ids = list(conv_options.values())
             selected_conv_key = st.selectbox(
                 "Select Conversation",
                 options=list(conv_options.keys()),
+                index=ids.index(selected) if selected in ids else 0,
                 key="conv_selector"
             )
             
             selected_conv_id = conv_options[selected_conv_key]
-            selected_conv = next(c for c in filtered_conversations if c['id'] == selected_conv_id)
+            selected_conv = next(c for c in page_conversations if c['id'] == selected_conv_id)
             
             # Display detailed conversation
-            display_conversation_details(selected_conv)
+            display_conversation_details(selected_conv, conv_manager)
 
-def display_conversation_details(conversation: Dict):
+def display_conversation_details(conversation: Dict, conv_manager: ConversationManager):
     """Display detailed view of a conversation"""
     
     # Header
@@ -440,46 +651,71 @@ def display_conversation_details(conversation: Dict):
             """)
     
     # Transcript section
-    if conversation.get("transcript"):
+    transcript = conv_manager.get_transcript_incremental(conversation)
+    if transcript:
         st.markdown("### 💬 Conversation Transcript")
         
-        transcript_container = st.container()
+        # Newest messages first; earlier ones are rendered a window at a time on request
+        windows = st.session_state.setdefault("transcript_windows", {})
+        shown = windows.get(conversation["id"], TRANSCRIPT_WINDOW)
+        window, hidden = transcript_window(transcript, shown)
+        if hidden and st.button(f"Load earlier messages ({hidden} more)", key=f"earlier_{conversation['id']}"):
+            windows[conversation["id"]] = shown + TRANSCRIPT_WINDOW
+            st.rerun()
         
-        with transcript_container:
-            for msg in conversation["transcript"]:
-                timestamp = datetime.fromisoformat(msg['timestamp'].replace('Z', '+00:00').replace('+00:00', ''))
-                time_str = timestamp.strftime('%H:%M:%S')
-                
-                if msg["speaker"] == "ai":
-                    st.markdown(f"""
-                    <div class="transcript-ai">
-                        <strong>🤖 AI Assistant</strong> <small>({time_str})</small><br>
-                        {msg['message']}
-                        {f'<br><small>Confidence: {msg.get("confidence", 0)*100:.1f}%</small>' if msg.get("confidence") else ''}
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    st.markdown(f"""
-                    <div class="transcript-client">
-                        <strong>👤 Client</strong> <small>({time_str})</small><br>
-                        {msg['message']}
-                        {f'<br><small>Confidence: {msg.get("confidence", 0)*100:.1f}%</small>' if msg.get("confidence") else ''}
-                    </div>
-                    """, unsafe_allow_html=True)
+        st.markdown(get_transcript_html(conversation["id"], hidden, len(transcript), window),
+                    unsafe_allow_html=True)
 
-def display_real_time_updates():
+def describe_update(event: Dict) -> Optional[str]:
+    """One-line description of a /conversations/updates event"""
+    data = event.get("data") or {}
+    if event["type"] == "status":
+        if data.get("status") == "active":
+            return f"New call received from {data.get('client_phone') or 'unknown number'}"
+        if data.get("status") == "completed":
+            return "Call completed successfully"
+        return f"Call from {data.get('client_phone') or 'unknown number'} ended with an error"
+    if event["type"] == "appointment":
+        return f"Appointment scheduled for {data.get('name', 'a patient')}"
+    return None
+
+def display_real_time_updates(conv_manager: ConversationManager):
     """Display real-time updates section"""
     st.markdown("### 🔄 Real-time Updates")
     
     # Create placeholder for updates
     updates_placeholder = st.empty()
     
-    # Mock real-time updates
-    updates = [
-        {"time": datetime.now().strftime('%H:%M:%S'), "message": "New call received from +1-555-0999"},
-        {"time": (datetime.now() - timedelta(minutes=2)).strftime('%H:%M:%S'), "message": "Appointment scheduled for Sarah Johnson"},
-        {"time": (datetime.now() - timedelta(minutes=5)).strftime('%H:%M:%S'), "message": "Call completed successfully"},
-    ]
+    # Only events after the last one we saw are fetched, and only when the backend changed
+    since = st.session_state.get("updates_seq", 0)
+    version = conv_manager.page_version()
+    if version is not None and st.session_state.get("updates_version") == version:
+        events = []
+    else:
+        events = conv_manager.get_updates(since)
+        if events is not None:
+            st.session_state.updates_version = version
+    if events is None:
+        # Mock real-time updates
+        updates = [
+            {"time": datetime.now().strftime('%H:%M:%S'), "message": "New call received from +1-555-0999"},
+            {"time": (datetime.now() - timedelta(minutes=2)).strftime('%H:%M:%S'), "message": "Appointment scheduled for Sarah Johnson"},
+            {"time": (datetime.now() - timedelta(minutes=5)).strftime('%H:%M:%S'), "message": "Call completed successfully"},
+        ]
+    else:
+        recent = st.session_state.setdefault("recent_updates", [])
+        for event in events:
+            st.session_state.updates_seq = event["seq"]
+            if event["type"] == "resync":
+                # Events were missed or the backend restarted; what was listed may no longer apply
+                recent.clear()
+                st.session_state.pop("conversation_page", None)
+                continue
+            message = describe_update(event)
+            if message:
+                recent.insert(0, {"time": datetime.fromisoformat(event["timestamp"]).strftime('%H:%M:%S'), "message": message})
+        del recent[10:]
+        updates = recent
     
     with updates_placeholder.container():
         for update in updates:
@@ -499,11 +735,12 @@ def app():
     
     # Main dashboard
     main()
+    conv_manager = ConversationManager()
     
     # Real-time updates in sidebar
     with st.sidebar:
         st.markdown("---")
-        display_real_time_updates()
+        display_real_time_updates(conv_manager)
         
         st.markdown("---")
         st.markdown("### 🔗 Quick Actions")
@@ -517,14 +754,12 @@ def app():
         
         # Connection status
         st.markdown("### 🌐 Connection Status")
-        try:
-            # Try to ping the backend
-            response = requests.get("http://localhost:5050/", timeout=2)
-            if response.status_code == 200:
-                st.success("🟢 Backend Connected")
-            else:
-                st.error("🔴 Backend Error")
-        except:
+        status = conv_manager.backend_status()
+        if status == "connected":
+            st.success("🟢 Backend Connected")
+        elif status == "error":
+            st.error("🔴 Backend Error")
+        else:
             st.warning("🟡 Using Mock Data")
 
 if __name__ == "__main__":
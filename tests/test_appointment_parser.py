@@ -0,0 +1,69 @@
+"""AppointmentParser on streamed output split at arbitrary points."""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from appointment_parser import AppointmentParser, validate_field
+
+APPOINTMENT = {
+    "docname": "Dr. Patel",
+    "name": "Ana \"Annie\" Lopez",
+    "phone": "+1 (555) 010-2030",
+    "appointment_datetime": "2026-10-20T09:30",
+}
+EXPECTED = {**APPOINTMENT, "docname": "Patel"}
+
+
+def feed_all(parser, text, chunk):
+    results = [parser.feed(text[i:i + chunk]) for i in range(0, len(text), chunk)]
+    return [result for result in results if result is not None]
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, 1000])
+def test_appointment_in_prose_at_any_split(chunk):
+    text = "Sure, booking that now. " + json.dumps(APPOINTMENT) + " Anything else?"
+    parser = AppointmentParser()
+    assert feed_all(parser, text, chunk) == [EXPECTED]
+
+
+def test_fields_are_validated_before_the_object_closes():
+    parser = AppointmentParser()
+    text = json.dumps({"name": "Ana", "phone": "12"})
+    assert parser.feed(text[:-1]) is None
+    assert parser.fields == {"name": "Ana", "phone": "12"}
+    assert parser.errors == {"phone": "not a phone number"}
+
+
+def test_nested_values_and_other_keys_are_skipped():
+    payload = {"meta": {"docname": "ignored", "tags": ["a", "}"]}, **APPOINTMENT, "count": 2}
+    parser = AppointmentParser()
+    assert feed_all(parser, json.dumps(payload), 5) == [EXPECTED]
+
+
+def test_incomplete_or_unrelated_objects_return_nothing():
+    parser = AppointmentParser()
+    partial = {key: value for key, value in APPOINTMENT.items() if key != "phone"}
+    assert parser.feed(json.dumps(partial)) is None
+    assert parser.errors == {"phone": "missing"}
+    assert parser.feed('{"status": "ok"}') is None
+    assert parser.feed('{"docname": "Lee", "name": oops}') is None
+    # The parser recovers for the next object.
+    assert parser.feed(json.dumps(APPOINTMENT)) == EXPECTED
+
+
+def test_scalar_values_are_stringified():
+    parser = AppointmentParser()
+    payload = {**APPOINTMENT, "phone": 15550102030}
+    assert parser.feed(json.dumps(payload))["phone"] == "15550102030"
+
+
+def test_validate_field():
+    assert validate_field("docname", "doctor Smith") == ("Smith", None)
+    assert validate_field("name", "  ") == (None, "empty")
+    assert validate_field("name", None) == (None, "missing")
+    assert validate_field("phone", "555-0100")[1] is None
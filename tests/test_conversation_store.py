@@ -0,0 +1,131 @@
+"""ConversationStore filtering, cursor paging, change tracking and retention."""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_store import ConversationStore, TranscriptBuffer, phone_key
+
+
+def make_store(count=10, **kwargs):
+    store = ConversationStore(**kwargs)
+    now = time.time()
+    for i in range(count):
+        store.start_call(f"CA{i}", f"+1-555-01{i:02d}", start_ts=now - (count - i) * 60)
+        if i % 3 == 0:
+            store.end_call(f"CA{i}")
+    return store
+
+
+def ids(records):
+    return [record.id for record in records]
+
+
+def test_phone_key_keeps_digits_only():
+    assert phone_key("+1 (555) 01-23") == "15550123"
+    assert phone_key(None) == ""
+
+
+def test_query_is_newest_first_and_filtered():
+    store = make_store()
+    records, cursor = store.query()
+    assert ids(records) == [f"CA{i}" for i in range(9, -1, -1)]
+    assert cursor is None
+
+    completed, _ = store.query(status="completed")
+    assert ids(completed) == ["CA9", "CA6", "CA3", "CA0"]
+
+    by_phone, _ = store.query(phone_prefix="1555010")
+    assert ids(by_phone) == [f"CA{i}" for i in range(9, -1, -1)]
+    one, _ = store.query(phone_prefix="+1 555 0105")
+    assert ids(one) == ["CA5"]
+
+    start = store.get("CA4").start_ts
+    window, _ = store.query(started_after=start, started_before=start + 120, status="active")
+    assert ids(window) == ["CA5", "CA4"]
+
+
+def test_cursor_pages_cover_every_record_once():
+    store = make_store(25)
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.query(limit=10, cursor=cursor)
+        seen.extend(ids(page))
+        if cursor is None:
+            break
+    assert seen == [f"CA{i}" for i in range(24, -1, -1)]
+
+
+def test_cursor_survives_new_calls():
+    store = make_store(10)
+    first, cursor = store.query(limit=4)
+    store.start_call("CA_new", "+15550199")
+    second, _ = store.query(limit=4, cursor=cursor)
+    assert ids(first) == ["CA9", "CA8", "CA7", "CA6"]
+    assert ids(second) == ["CA5", "CA4", "CA3", "CA2"]
+
+
+def test_changed_since_reports_changes_and_removals():
+    store = make_store(5, max_records=5)
+    version = store.version
+    store.update("CA1", summary="Booked.")
+    store.start_call("CA5", "+15550105")
+    changed, removed = store.changed_since(version)
+    assert ids(changed) == ["CA5", "CA1"]
+    # CA0 is the oldest finished call, so it made room for CA5.
+    assert removed == ["CA0"]
+    assert store.changed_since(store.version) == ([], [])
+
+
+def test_changed_since_asks_for_resync_past_tombstones():
+    store = make_store(5, max_records=1, tombstones=2)
+    assert store.changed_since(0) == (None, None)
+
+
+def test_retention_keeps_active_calls():
+    removed = []
+    store = ConversationStore(max_records=2, on_remove=removed.append)
+    for i in range(4):
+        store.start_call(f"CA{i}", "+15550100")
+    assert len(store) == 4 and not removed
+    store.end_call("CA0")
+    store.end_call("CA2")
+    store.start_call("CA4", "+15550100")
+    assert removed == ["CA0", "CA2"]
+    assert store.get("CA0") is None and store.transcript("CA0") is None
+
+
+def test_age_retention_runs_on_reads():
+    removed = []
+    store = ConversationStore(max_age=60, on_remove=removed.append)
+    store.start_call("old", "+15550100", start_ts=time.time() - 30)
+    store.end_call("old")
+    store.start_call("live", "+15550100", start_ts=time.time() - 30)
+    store.max_age = 10
+    records, _ = store.query()
+    assert ids(records) == ["live"]
+    assert removed == ["old"]
+
+
+def test_replicate_creates_then_updates():
+    source = ConversationStore()
+    record = source.start_call("CA1", "+15550100", start_ts=1000.0)
+    copy = ConversationStore()
+    copy.replicate("CA1", record.state())
+    source.end_call("CA1", summary="Done.")
+    copy.replicate("CA1", record.state())
+    assert copy.get("CA1").to_dict() == record.to_dict()
+
+
+def test_transcript_buffer_after_and_bound():
+    buffer = TranscriptBuffer(max_segments=3)
+    buffer.add_delta("item", "Hel")
+    buffer.add_delta("item", "lo ")
+    assert buffer.finish("item", "assistant")[3] == "Hello"
+    assert buffer.finish("empty", "assistant") is None
+    for i in range(4):
+        buffer.append("caller", f"m{i}")
+    assert [segment[0] for segment in buffer.after()] == [3, 4, 5]
+    assert [segment[3] for segment in buffer.after(4)] == ["m3"]
@@ -0,0 +1,90 @@
+"""EventHub fan-out, `since` resume, resync markers and the slow-subscriber policies."""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_hub import EventHub
+
+
+def types(events):
+    return [json.loads(text)["type"] for _, text in events]
+
+
+def publish(hub, count):
+    for i in range(count):
+        hub.publish(f"CA{i}", "status", {"n": i})
+
+
+def drain(subscriber):
+    events = []
+    while not subscriber.queue.empty():
+        events.append(subscriber.queue.get_nowait())
+    return events
+
+
+def test_since_returns_only_newer_events():
+    hub = EventHub(history=10)
+    publish(hub, 5)
+    assert [seq for seq, _ in hub.since(2)] == [3, 4, 5]
+    assert hub.since(5) == []
+    assert json.loads(hub.since(4)[0][1])["conversationId"] == "CA4"
+
+
+def test_since_past_the_history_prefixes_a_resync():
+    hub = EventHub(history=3)
+    publish(hub, 10)
+    events = hub.since(2)
+    assert types(events) == ["resync", "status", "status", "status"]
+    # The marker resumes right before the oldest retained event.
+    assert events[0][0] == 7
+    assert [seq for seq, _ in events[1:]] == [8, 9, 10]
+    assert types(hub.since(7)) == ["status"] * 3
+
+
+def test_since_from_before_a_restart_resyncs_to_the_head():
+    hub = EventHub()
+    publish(hub, 3)
+    events = hub.since(50)
+    assert types(events) == ["resync"]
+    assert events[0][0] == 3
+
+
+def test_subscribe_replays_and_then_follows():
+    hub = EventHub()
+    publish(hub, 3)
+    subscriber = hub.subscribe(since=1)
+    hub.publish("CA9", "summary", "Booked.")
+    assert [seq for seq, _ in drain(subscriber)] == [2, 3, 4]
+
+
+def test_oversized_replay_becomes_a_resync():
+    hub = EventHub(history=100, queue_size=4)
+    publish(hub, 20)
+    subscriber = hub.subscribe(since=0)
+    events = drain(subscriber)
+    assert types(events) == ["resync"] and events[0][0] == 20
+    assert hub.stats()["subscribers"] == 1
+
+
+def test_slow_subscriber_is_disconnected():
+    async def scenario():
+        hub = EventHub(queue_size=2)
+        subscriber = hub.subscribe()
+        publish(hub, 3)
+        return hub, subscriber, await subscriber.get()
+
+    hub, subscriber, event = asyncio.run(scenario())
+    assert event is None and subscriber.closed
+    assert hub.stats()["subscribers"] == 0 and hub.disconnected == 1
+
+
+def test_drop_policy_keeps_the_newest_events():
+    hub = EventHub(queue_size=2, slow_policy="drop")
+    subscriber = hub.subscribe()
+    publish(hub, 5)
+    assert [seq for seq, _ in drain(subscriber)] == [4, 5]
+    assert subscriber.dropped == 3 and not subscriber.closed
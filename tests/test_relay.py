@@ -0,0 +1,147 @@
+"""PlaybackTracker mark bookkeeping and RelayChannel queueing policies."""
+
+import asyncio
+import base64
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from relay import ChannelClosed, PlaybackTracker, RelayChannel, payload_bytes
+
+
+def audio(ms):
+    return base64.b64encode(b"\xff" * (ms * 8)).decode()
+
+
+def test_payload_bytes_matches_decoded_size():
+    for size in (0, 1, 2, 3, 160, 161):
+        payload = base64.b64encode(b"\x00" * size).decode()
+        assert payload_bytes(payload) == size
+
+
+def test_marks_every_interval_and_on_flush():
+    tracker = PlaybackTracker(mark_interval_ms=100)
+    marks = [tracker.audio_sent(audio(20)) for _ in range(6)]
+    assert marks == [None, None, None, None, "1:800", None]
+    assert tracker.flush() == "2:960"
+    assert tracker.flush() is None
+    assert tracker.marks_sent == 2
+
+
+def test_acknowledge_tracks_played_audio():
+    tracker = PlaybackTracker(mark_interval_ms=100)
+    first = tracker.audio_sent(audio(100))
+    second = tracker.audio_sent(audio(100))
+    tracker.acknowledge(first)
+    assert tracker.played_ms == 100 and tracker.unplayed
+    tracker.acknowledge(second)
+    assert tracker.played_ms == 200 and not tracker.unplayed
+    tracker.acknowledge("not a mark")
+    tracker.acknowledge(None)
+    assert tracker.played_ms == 200
+
+
+def test_echoes_from_before_a_reset_are_ignored():
+    tracker = PlaybackTracker(mark_interval_ms=100)
+    stale = tracker.audio_sent(audio(100))
+    tracker.reset()
+    fresh = tracker.audio_sent(audio(100))
+    tracker.acknowledge(stale)
+    assert tracker.played_bytes == 0 and tracker.unplayed
+    # Sequence numbers carry on across the reset.
+    assert fresh == "2:800"
+    tracker.acknowledge(fresh)
+    assert tracker.played_ms == 100
+
+
+def test_channel_sends_in_order():
+    async def scenario():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        channel = RelayChannel(send).start()
+        for i in range(5):
+            await channel.put(i)
+        await asyncio.sleep(0)
+        await channel.close()
+        return sent, channel.stats()
+
+    sent, stats = asyncio.run(scenario())
+    assert sent == [0, 1, 2, 3, 4]
+    assert stats["sent"] == 5 and stats["dropped"] == 0
+
+
+def test_drop_oldest_keeps_control_messages():
+    async def scenario():
+        channel = RelayChannel(None, maxsize=3, policy="drop_oldest")
+        await channel.put("mark", droppable=False)
+        for i in range(4):
+            await channel.put(f"audio{i}")
+        return [message for _, message, _ in channel._items], channel.dropped
+
+    items, dropped = asyncio.run(scenario())
+    assert items == ["mark", "audio2", "audio3"]
+    assert dropped == 2
+
+
+def test_pause_waits_for_space():
+    async def scenario():
+        release = asyncio.Event()
+        sent = []
+
+        async def send(message):
+            await release.wait()
+            sent.append(message)
+
+        channel = RelayChannel(send, maxsize=2).start()
+        for i in range(3):
+            await channel.put(i)
+        # The writer holds 0; 1 and 2 fill the queue, so the next put has to wait.
+        blocked = asyncio.create_task(channel.put(3))
+        await asyncio.sleep(0.01)
+        waiting = not blocked.done()
+        release.set()
+        await asyncio.wait_for(blocked, 1)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        await channel.close()
+        return waiting, sent, channel.paused
+
+    waiting, sent, paused = asyncio.run(scenario())
+    assert waiting and paused >= 1
+    assert sent == [0, 1, 2, 3]
+
+
+def test_discard_keeps_control_messages():
+    async def scenario():
+        channel = RelayChannel(None, maxsize=10)
+        for message, droppable in (("a", True), ("mark", False), ("b", True)):
+            await channel.put(message, droppable)
+        return channel.discard(), [message for _, message, _ in channel._items]
+
+    assert asyncio.run(scenario()) == (2, ["mark"])
+
+
+def test_put_after_close_raises():
+    async def scenario():
+        async def send(message):
+            raise ConnectionError("gone")
+
+        channel = RelayChannel(send).start()
+        await channel.put("first")
+        await asyncio.sleep(0)
+        with pytest.raises(ChannelClosed):
+            await channel.put("second")
+        await channel.close()
+
+    asyncio.run(scenario())
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        RelayChannel(None, policy="block")
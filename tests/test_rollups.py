@@ -0,0 +1,81 @@
+"""CallRollups bucketing, summaries and ring wraparound."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_store import ConversationStore
+from rollups import COLUMN, CallRollups, RollupRing
+
+# An hour boundary, so minute and hour buckets line up.
+T0 = 1_800_000_000 - 1_800_000_000 % 3600
+
+
+def make_store(**kwargs):
+    rollups = CallRollups(**kwargs)
+    return ConversationStore(listener=rollups.observe, max_age=10 ** 10), rollups
+
+
+def finish(store, call_id, start, seconds, status="completed", **fields):
+    store.start_call(call_id, "+15550100", start_ts=start)
+    store.update(call_id, status=status, end_ts=start + seconds, **fields)
+
+
+def test_counts_land_in_start_and_end_buckets():
+    store, rollups = make_store()
+    finish(store, "CA1", T0 + 10, 90, appointment_details={"name": "Ana"},
+           metrics={"first_audio_ms": 400, "barge_in_count": 2})
+    finish(store, "CA2", T0 + 20, 30, status="error", metrics={"first_audio_ms": 600})
+    store.start_call("CA3", "+15550100", start_ts=T0 + 150)
+
+    result = rollups.query(T0, T0 + 179, "minute", series=True)
+    assert [point["calls"] for point in result["series"]] == [2, 0, 1]
+    assert [point["completed"] for point in result["series"]] == [0, 1, 0]
+    assert [point["error"] for point in result["series"]] == [1, 0, 0]
+    assert result["totals"] == {
+        "calls": 3, "completed": 1, "error": 1, "booked": 1, "success_rate": 50.0,
+        "avg_duration": 60.0, "avg_first_audio_ms": 500.0, "barge_ins": 2,
+    }
+    assert rollups.query(T0, T0 + 179, "hour")["totals"]["calls"] == 3
+
+
+def test_each_call_is_counted_once():
+    store, rollups = make_store()
+    store.start_call("CA1", "+15550100", start_ts=T0)
+    rollups.observe("CA1", "status", store.get("CA1").to_dict())
+    store.update("CA1", status="completed", end_ts=T0 + 60)
+    # Changes after the call ended don't count it again.
+    store.update("CA1", summary="Booked.")
+    store.update("CA1", status="error")
+    totals = rollups.query(T0, T0 + 3599)["totals"]
+    assert (totals["calls"], totals["completed"]) == (1, 1)
+
+
+def test_empty_window_has_no_rates():
+    _, rollups = make_store()
+    totals = rollups.query(T0, T0 + 3599)["totals"]
+    assert totals["calls"] == 0
+    assert totals["success_rate"] is None and totals["avg_duration"] is None
+
+
+def test_ring_clears_reused_slots_and_drops_old_writes():
+    ring = RollupRing(60, 4)
+    ring.add(T0, COLUMN["started"])
+    ring.add(T0 + 4 * 60, COLUMN["started"], 3)
+    ring.add(T0 + 60, COLUMN["started"])
+    # The slot now holds a newer bucket, so a late write for the old one is dropped.
+    ring.add(T0 + 30, COLUMN["started"])
+    first, rows = ring.window(T0, T0 + 4 * 60)
+    assert first * 60 == T0 + 60
+    assert rows[:, COLUMN["started"]].tolist() == [1, 0, 0, 3]
+
+
+def test_query_is_clipped_to_the_ring():
+    store, rollups = make_store(minute_buckets=10)
+    for i in range(20):
+        finish(store, f"CA{i}", T0 + i * 60, 5)
+    result = rollups.query(T0, T0 + 20 * 60 - 1, "minute", series=True)
+    assert len(result["series"]) == 10
+    assert result["totals"]["calls"] == 10
+    assert rollups.query(T0, T0 + 20 * 60 - 1, "hour")["totals"]["calls"] == 20
@@ -0,0 +1,118 @@
+"""SearchIndex ranking, phone and name matching, filters, removal and compaction."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_store import ConversationStore
+from search_index import SearchIndex, parse_query
+
+
+def make_store():
+    index = SearchIndex()
+    store = ConversationStore(listener=index.observe, on_remove=index.remove)
+    return store, index
+
+
+def call(store, call_id, phone, *messages, end=True, appointment=None):
+    store.start_call(call_id, phone)
+    for message in messages:
+        store.add_transcript(call_id, "caller", message)
+    if appointment is not None:
+        store.update(call_id, appointment_details=appointment)
+    if end:
+        store.end_call(call_id)
+
+
+def ids(hits):
+    return [call_id for call_id, _ in hits[0]]
+
+
+def test_parse_query_splits_phone_and_words():
+    assert parse_query("the dentist +1 (555) 0100") == [
+        ("word", "dentist"), ("word", "1"), ("phone", "555"), ("phone", "0100")]
+    assert parse_query("555-0100 Tuesday") == [("phone", "5550100"), ("word", "tuesday")]
+
+
+def test_terms_must_all_match_and_rank_by_bm25():
+    store, index = make_store()
+    call(store, "CA1", "+15550101", "I need a dentist appointment")
+    call(store, "CA2", "+15550102", "dentist dentist, my tooth hurts, dentist please")
+    call(store, "CA3", "+15550103", "Can I book a checkup")
+    assert ids(index.search("dentist")) == ["CA2", "CA1"]
+    assert ids(index.search("dentist appointment")) == ["CA1"]
+    assert index.search("cardiologist") == ([], 0)
+    assert index.search("") == ([], 0)
+
+
+def test_active_calls_are_searchable_and_ties_are_newest_first():
+    store, index = make_store()
+    call(store, "CA1", "+15550101", "reschedule please")
+    call(store, "CA2", "+15550102", "reschedule please", end=False)
+    assert ids(index.search("reschedule")) == ["CA2", "CA1"]
+    store.end_call("CA2")
+    store.add_transcript("CA2", "assistant", "reschedule confirmed")
+    assert ids(index.search("reschedule")) == ["CA2", "CA1"]
+
+
+def test_phone_and_name_matching():
+    store, index = make_store()
+    call(store, "CA1", "+15550101", "hello", appointment={"name": "Maria Lopez", "docname": "Patel"})
+    call(store, "CA2", "+15559876", "hello", appointment={"name": "Mark Chen", "docname": "Okafor"})
+    assert ids(index.search("0101")) == ["CA1"]
+    assert ids(index.search("lopez")) == ["CA1"]
+    # Two characters match name prefixes only.
+    assert ids(index.search("ma")) == ["CA2", "CA1"]
+    assert ids(index.search("ez")) == []
+    store.update("CA1", appointment_details={"name": "Maria Gomez", "docname": "Patel"})
+    assert ids(index.search("lopez")) == []
+    assert ids(index.search("gomez")) == ["CA1"]
+
+
+def test_status_and_phone_filters_page_newest_first():
+    store, index = make_store()
+    for i in range(6):
+        call(store, f"CA{i}", f"+1555010{i}", "hello", end=i % 2 == 0)
+    hits, total = index.search("", status="active", phone="555")
+    assert total == 3 and [call_id for call_id, _ in hits] == ["CA5", "CA3", "CA1"]
+    hits, total = index.search("hello", phone="5", offset=2, limit=2)
+    assert total == 6 and [call_id for call_id, _ in hits] == ["CA3", "CA2"]
+    assert index.matching(["CA1", "CA2", "CA9"], "hello", phone="0102") == {"CA2"}
+
+
+def test_removed_calls_drop_out():
+    store, index = make_store()
+    call(store, "CA1", "+15550101", "billing question")
+    call(store, "CA2", "+15550102", "billing question")
+    index.remove("CA1")
+    assert ids(index.search("billing")) == ["CA2"]
+    assert ids(index.search("0101")) == []
+    assert len(index) == 1
+
+
+def test_compact_renumbers_and_keeps_results():
+    store, index = make_store()
+    store.max_records = 300
+    for i in range(1400):
+        word = "cardiology" if i % 7 == 0 else "dermatology"
+        call(store, f"CA{i}", f"+1555{i:06d}", f"{word} visit {i}",
+             appointment={"name": f"Patient{i}", "docname": "Patel"}, end=i != 1399)
+    # Compaction ran once removals outnumbered the kept calls.
+    assert index.stats()["removed"] < 1024
+    assert len(index._ids) < 1400
+    assert all(index._ids[doc] == call_id for call_id, doc in index._docs.items())
+    assert set(index._docs) == {record.id for record in store.query(limit=1000)[0]}
+
+    kept = [f"CA{i}" for i in range(1399, 1099, -1)]
+    hits, total = index.search("cardiology", limit=1000)
+    assert [call_id for call_id, _ in hits] == [c for c in kept if int(c[2:]) % 7 == 0]
+    assert total == len(hits)
+    assert ids(index.search("patient1234")) == ["CA1234"]
+    assert ids(index.search("5001234")) == ["CA1234"]
+    assert ids(index.search("patient12", limit=1000)) == [c for c in kept if c.startswith("CA12")]
+    # The active call kept its word counts and status through the renumbering.
+    assert ids(index.search("visit", status="active")) == ["CA1399"]
+    store.end_call("CA1399")
+    assert ids(index.search("1399")) == ["CA1399"]
+    assert ids(index.search("visit", status="active")) == []
@@ -0,0 +1,73 @@
+"""TwimlCache hits, LRU eviction and invalidation, and TwimlTemplate escaping."""
+
+import os
+import sys
+from xml.etree import ElementTree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twiml_cache import PLACEHOLDER, TwimlCache, TwimlTemplate
+
+XML = (f'<?xml version="1.0" encoding="UTF-8"?><Response><Connect><Stream url="wss://example.com/media-stream">'
+       f'<Parameter name="callerNumber" value="{PLACEHOLDER}"/></Stream></Connect></Response>')
+
+
+def builder(xml=XML):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return xml
+
+    return build, calls
+
+
+def test_render_escapes_the_value_into_the_attribute():
+    template = TwimlTemplate(XML)
+    for value in ("+15550100", "", 'a "quoted" <b>&amp;\n\tline'):
+        root = ElementTree.fromstring(template.render(value))
+        assert root.find(".//Parameter").get("value") == value
+
+
+def test_template_without_placeholder_renders_as_is():
+    xml = "<Response><Say>Busy.</Say></Response>"
+    assert TwimlTemplate(xml).render("+15550100") == xml.encode()
+
+
+def test_hits_reuse_the_template():
+    cache = TwimlCache()
+    build, calls = builder()
+    first = cache.get(("connect", "example.com", "default"), build)
+    assert cache.get(("connect", "example.com", "default"), build) is first
+    assert len(calls) == 1
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_least_recently_used_is_evicted():
+    cache = TwimlCache(max_entries=2)
+    build, calls = builder()
+    cache.get("a", build)
+    cache.get("b", build)
+    cache.get("a", build)
+    cache.get("c", build)
+    assert cache.evictions == 1
+    cache.get("a", build)
+    assert len(calls) == 3
+    cache.get("b", build)
+    assert len(calls) == 4
+
+
+def test_invalidate_rebuilds():
+    cache = TwimlCache()
+    build, calls = builder()
+    cache.get("a", build)
+    cache.invalidate()
+    cache.get("a", build)
+    assert len(calls) == 2 and cache.stats()["entries"] == 1
+
+
+def test_zero_entries_disables_caching():
+    cache = TwimlCache(max_entries=0)
+    build, calls = builder()
+    assert cache.get("a", build).render("+15550100") == cache.get("a", build).render("+15550100")
+    assert len(calls) == 2 and cache.stats()["entries"] == 0
@@ -0,0 +1,214 @@
+"""UpstreamPool arrival counting, reservation expiry, eviction and disabled mode, with fake connections."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+from websockets.protocol import State
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import upstream_pool
+from upstream_pool import UpstreamPool
+
+
+class FakeWS:
+    def __init__(self):
+        self.state = State.OPEN
+
+    async def close(self):
+        self.state = State.CLOSED
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(upstream_pool, "time", clock)
+    return clock
+
+
+def make_pool(**kwargs):
+    connected = []
+
+    async def connect():
+        ws = FakeWS()
+        connected.append(ws)
+        return ws
+
+    async def prepare(ws):
+        pass
+
+    pool = UpstreamPool(connect, prepare, **kwargs)
+    pool.connected = connected
+    return pool
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_reserved_call_counts_one_arrival(clock):
+    async def scenario():
+        pool = make_pool()
+        pool._idle.append((FakeWS(), clock.now))
+        pool.reserve("CA1")
+        ws = await pool.acquire("CA1")
+        return pool, ws
+
+    pool, ws = run(scenario())
+    assert pool.stats()["arrivals"] == 1
+    assert (pool.hits, pool.misses) == (1, 0)
+    assert not pool.connected and ws.state is State.OPEN
+
+
+def test_reservation_miss_counts_one_arrival(clock):
+    async def scenario():
+        pool = make_pool()
+        pool.reserve("CA1")
+        await pool.acquire("CA1")
+        return pool
+
+    pool = run(scenario())
+    assert pool.stats()["arrivals"] == 1
+    assert (pool.hits, pool.misses) == (0, 1)
+    assert not pool._arrived
+
+
+def test_repeated_reserve_and_unreserved_acquire(clock):
+    async def scenario():
+        pool = make_pool()
+        pool.reserve("CA1")
+        pool.reserve("CA1")
+        await pool.acquire("CA1")
+        await pool.acquire("CA2")
+        await pool.acquire()
+        pool.reserve(None)
+        return pool
+
+    assert run(scenario()).stats()["arrivals"] == 4
+
+
+def test_reacquire_does_not_count_an_arrival(clock):
+    async def scenario():
+        pool = make_pool()
+        await pool.acquire("CA1")
+        await pool.reacquire()
+        return pool
+
+    pool = run(scenario())
+    assert pool.stats()["arrivals"] == 1
+    assert pool.misses == 2
+
+
+def test_arrivals_age_out_of_the_window(clock):
+    pool = make_pool(arrival_window=60.0, max_size=8)
+    for _ in range(30):
+        pool.reserve(None)
+    assert pool.target_size() > pool.min_size
+    clock.now += 61
+    assert pool.target_size() == pool.min_size
+    assert pool.stats()["arrivals"] == 0
+
+
+def test_expired_reservation_returns_to_idle_in_age_order(clock):
+    async def scenario():
+        pool = make_pool(reservation_ttl=30.0, max_idle=240.0, max_size=8)
+        old, newer = FakeWS(), FakeWS()
+        pool._idle.append((old, clock.now))
+        pool.reserve("CA1")
+        clock.now += 10
+        pool._idle.append((newer, clock.now))
+        # The media stream for CA1 never arrives.
+        clock.now += 31
+        pool._expire()
+        return pool, old, newer
+
+    pool, old, newer = run(scenario())
+    assert not pool._reserved and "CA1" not in pool._arrived
+    assert [ws for ws, _ in pool._idle] == [old, newer]
+
+
+def test_expired_reservation_is_evicted_after_max_idle(clock):
+    async def scenario():
+        pool = make_pool(reservation_ttl=30.0, max_idle=60.0, max_size=8)
+        stale = FakeWS()
+        pool._idle.append((stale, clock.now))
+        pool.reserve("CA1")
+        clock.now += 50
+        fresh = FakeWS()
+        pool._idle.append((fresh, clock.now))
+        clock.now += 15
+        pool._expire()
+        await asyncio.sleep(0)
+        return pool, stale, fresh
+
+    pool, stale, fresh = run(scenario())
+    assert [ws for ws, _ in pool._idle] == [fresh]
+    assert stale.state is State.CLOSED
+    assert pool.evictions == 1
+
+
+def test_closed_reservation_falls_back_to_idle(clock):
+    async def scenario():
+        pool = make_pool()
+        reserved, idle = FakeWS(), FakeWS()
+        pool._idle.append((idle, clock.now - 1))
+        pool._idle.append((reserved, clock.now))
+        pool.reserve("CA1")
+        reserved.state = State.CLOSED
+        return pool, await pool.acquire("CA1"), idle
+
+    pool, ws, idle = run(scenario())
+    assert ws is idle
+    assert pool.stats()["arrivals"] == 1
+
+
+def test_disabled_pool_keeps_no_per_call_state(clock):
+    async def scenario():
+        pool = make_pool(max_size=0)
+        pool.start()
+        for i in range(5):
+            pool.reserve(f"CA{i}")
+        await pool.acquire("CA0")
+        await pool.acquire()
+        return pool
+
+    pool = run(scenario())
+    assert not pool.enabled and pool._task is None
+    assert not pool._arrived and not pool._reserved and not pool._arrivals
+    assert pool.misses == 2
+
+
+def test_close_cancels_warming_connections(clock):
+    started = []
+
+    async def scenario():
+        async def connect():
+            started.append(1)
+            await asyncio.sleep(60)
+
+        async def prepare(ws):
+            pass
+
+        pool = UpstreamPool(connect, prepare, min_size=2)
+        pool.start()
+        pool._wakeup.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        warming = set(pool._warm_tasks)
+        await pool.close()
+        return pool, warming
+
+    pool, warming = run(asyncio.wait_for(scenario(), 5))
+    assert len(started) == 2 and len(warming) == 2
+    assert all(task.cancelled() for task in warming)
+    assert not pool._warm_tasks and pool._warming == 0
@@ -0,0 +1,102 @@
+"""
+Upstream reconnects against benchmarks/mock_realtime.py --drop-after-ms.
+
+The mock cuts the call's connection once it has received 500 ms of caller
+audio. ResilientUpstream has to take a replacement from the pool, replay
+the conversation and flush the audio buffered meanwhile, and the pool must
+still count the call as a single arrival. Run from the repository root:
+
+    python -m pytest tests
+"""
+
+import asyncio
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+import websockets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from relay import InboundAudioBatcher
+from upstream_pool import UpstreamPool, wait_for_event
+from upstream_session import RECONNECTED, ResilientUpstream
+
+DROP_AFTER_MS = 500
+FRAME = InboundAudioBatcher.PREFIX + base64.b64encode(b"\xff" * 160).decode() + InboundAudioBatcher.SUFFIX
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def mock_url():
+    port = free_port()
+    mock = subprocess.Popen([sys.executable, "benchmarks/mock_realtime.py", "--port", str(port),
+                             "--turn-ms", "600000", "--drop-after-ms", str(DROP_AFTER_MS)],
+                            cwd=ROOT, stdout=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                if mock.poll() is not None:
+                    pytest.fail("mock_realtime.py exited")
+                time.sleep(0.05)
+        yield f"ws://127.0.0.1:{port}"
+    finally:
+        mock.terminate()
+        mock.wait()
+
+
+async def drive_reconnect(url):
+    async def prepare(ws):
+        await ws.send(json.dumps({"type": "session.update", "session": {"voice": "alloy"}}))
+        await wait_for_event(ws, 'session.updated', 5.0)
+
+    replayed = []
+
+    async def replay(ws, responding):
+        replayed.append(responding)
+        await ws.send(json.dumps({"type": "conversation.item.create", "item": {"type": "message"}}))
+
+    pool = UpstreamPool(lambda: websockets.connect(url), prepare)
+    link = ResilientUpstream(None, pool.reacquire, replay, reconnect_seconds=5.0)
+    try:
+        link.ws = await pool.acquire("CA1")
+        # 40 frames of 20 ms: the mock cuts the connection halfway through.
+        for _ in range(40):
+            await link.send(FRAME)
+        events = link.events()
+        reconnected = False
+        async for event in events:
+            if event["type"] == RECONNECTED:
+                reconnected = True
+            elif reconnected and event["type"] == "conversation.item.created":
+                break
+        await link.send(FRAME)
+        await events.aclose()
+        return link.stats(), pool.stats(), replayed
+    finally:
+        await link.close()
+        await pool.close()
+
+
+def test_reconnect_replays_and_counts_one_arrival(mock_url):
+    link, pool, replayed = asyncio.run(asyncio.wait_for(drive_reconnect(mock_url), 20))
+
+    assert link["reconnects"] == 1
+    assert link["failures"] == 0
+    assert replayed == [False]
+    assert pool["arrivals"] == 1
+    assert pool["misses"] == 2
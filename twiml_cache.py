@@ -0,0 +1,66 @@
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+
+# Stands in for the one per-call value while a response is serialized.
+PLACEHOLDER = '__TWIML_VALUE__'
+ATTRIBUTE_ENTITIES = {'"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#09;'}
+
+
+class TwimlTemplate:
+    """Serialized TwiML split around PLACEHOLDER, so a response is two byte joins."""
+
+    __slots__ = ('head', 'tail')
+
+    def __init__(self, xml):
+        head, found, tail = xml.partition(PLACEHOLDER)
+        self.head = head.encode()
+        self.tail = tail.encode() if found else None
+
+    def render(self, value=''):
+        """Response bytes with `value` escaped into the placeholder's attribute."""
+        if self.tail is None:
+            return self.head
+        return b''.join((self.head, escape(value, ATTRIBUTE_ENTITIES).encode(), self.tail))
+
+
+class TwimlCache:
+    """LRU of TwiML templates keyed by whatever a response depends on (host, profile, ...).
+
+    `build()` is only called on a miss and must return the XML with
+    PLACEHOLDER where the per-call value goes. `invalidate()` drops every
+    template, for when the configuration they were built from changes.
+    A `max_entries` of 0 disables caching.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._templates = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, build):
+        template = self._templates.get(key)
+        if template is not None:
+            self._templates.move_to_end(key)
+            self.hits += 1
+            return template
+        self.misses += 1
+        template = TwimlTemplate(build())
+        if self.max_entries > 0:
+            self._templates[key] = template
+            if len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+                self.evictions += 1
+        return template
+
+    def invalidate(self):
+        self._templates.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._templates),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
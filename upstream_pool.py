@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import deque
+
+from websockets.protocol import State
+
+logger = logging.getLogger(__name__)
+
+
+def is_open(ws):
+    return ws.state is State.OPEN
+
+
+async def wait_for_event(ws, event_type, timeout):
+    """Read and discard upstream events until `event_type` arrives."""
+    async def _wait():
+        async for message in ws:
+            if json.loads(message).get('type') == event_type:
+                return
+        raise ConnectionError(f"Upstream closed before {event_type}")
+    await asyncio.wait_for(_wait(), timeout)
+
+
+class UpstreamPool:
+    """Background-managed pool of idle Realtime connections with session.update applied.
+
+    `connect` opens a websocket and `prepare` configures it. Warm connections
+    are kept in `idle` until a call acquires one; /incoming-call can reserve a
+    connection by CallSid so the media stream picks it up without waiting.
+    The pool is sized from the recent call arrival rate times the observed
+    time it takes to warm a connection, clamped to [min_size, max_size].
+    A call counts as one arrival, whether it is seen by `reserve()`,
+    `acquire()` or both; `reacquire()` replaces the connection of a call
+    already counted.
+    """
+
+    def __init__(self, connect, prepare, min_size=1, max_size=4, max_idle=240.0,
+                 reservation_ttl=30.0, health_interval=5.0, arrival_window=60.0,
+                 settle_timeout=5.0):
+        self._connect = connect
+        self._prepare = prepare
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.reservation_ttl = reservation_ttl
+        self.health_interval = health_interval
+        self.arrival_window = arrival_window
+        self.settle_timeout = settle_timeout
+        self._idle = deque()  # (ws, warmed_at), oldest first
+        self._reserved = {}  # call_sid -> (ws, warmed_at, reserved_at)
+        self._arrivals = deque()
+        self._arrived = {}  # call_sid -> when reserve() counted its arrival
+        self._warming = 0
+        self._warm_tasks = set()
+        self._warm_seconds = 1.0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.failures = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in self._warm_tasks:
+            task.cancel()
+        await asyncio.gather(*self._warm_tasks, return_exceptions=True)
+        connections = [ws for ws, _ in self._idle]
+        connections += [ws for ws, _, _ in self._reserved.values()]
+        self._idle.clear()
+        self._reserved.clear()
+        self._arrived.clear()
+        await asyncio.gather(*(ws.close() for ws in connections), return_exceptions=True)
+
+    def reserve(self, call_sid):
+        """Set aside a warm connection for `call_sid`, if one is available."""
+        if not self.enabled:
+            # Nothing runs _expire() or sizes the pool, so keep no per-call state.
+            return
+        if not call_sid:
+            self._record_arrival()
+        elif call_sid not in self._arrived:
+            self._arrived[call_sid] = self._record_arrival()
+        if call_sid and call_sid not in self._reserved:
+            entry = self._pop_idle()
+            if entry:
+                self._reserved[call_sid] = (entry[0], entry[1], time.monotonic())
+        self._wakeup.set()
+
+    async def acquire(self, call_sid=None):
+        """Return a configured upstream connection for a new call."""
+        entry = self._reserved.pop(call_sid, None) if call_sid else None
+        if entry and not is_open(entry[0]):
+            entry = None
+        if self.enabled and (self._arrived.pop(call_sid, None) if call_sid else None) is None:
+            self._record_arrival()
+        return await self._take(entry)
+
+    async def reacquire(self):
+        """Return a configured upstream connection for a call whose connection dropped."""
+        return await self._take(None)
+
+    async def _take(self, entry):
+        if entry is None:
+            entry = self._pop_idle()
+        self._wakeup.set()
+        if entry:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        ws = await self._connect()
+        try:
+            await self._prepare(ws)
+        except BaseException:
+            await ws.close()
+            raise
+        return ws
+
+    def target_size(self, now=None):
+        now = time.monotonic() if now is None else now
+        self._trim_arrivals(now)
+        rate = len(self._arrivals) / self.arrival_window
+        target = self.min_size + math.ceil(rate * self._warm_seconds * 2)
+        return min(target, self.max_size)
+
+    def stats(self):
+        return {
+            "idle": len(self._idle),
+            "reserved": len(self._reserved),
+            "warming": self._warming,
+            "target": self.target_size(),
+            "arrivals": len(self._arrivals),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "failures": self.failures,
+            "warm_seconds": round(self._warm_seconds, 3),
+        }
+
+    def _record_arrival(self):
+        now = time.monotonic()
+        self._arrivals.append(now)
+        return now
+
+    def _trim_arrivals(self, now):
+        horizon = now - self.arrival_window
+        while self._arrivals and self._arrivals[0] < horizon:
+            self._arrivals.popleft()
+
+    def _pop_idle(self):
+        # Newest first: the oldest connections are the next to be evicted anyway.
+        while self._idle:
+            ws, warmed_at = self._idle.pop()
+            if is_open(ws):
+                return ws, warmed_at
+            self.evictions += 1
+        return None
+
+    async def _maintain(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.health_interval)
+            except asyncio.TimeoutError:
+                await self._health_check()
+            self._wakeup.clear()
+            self._expire()
+            missing = self.target_size() - len(self._idle) - len(self._reserved) - self._warming
+            for _ in range(max(missing, 0)):
+                self._warming += 1
+                task = asyncio.create_task(self._warm())
+                self._warm_tasks.add(task)
+                task.add_done_callback(self._warm_tasks.discard)
+
+    def _expire(self):
+        now = time.monotonic()
+        for call_sid, (ws, warmed_at, reserved_at) in list(self._reserved.items()):
+            if now - reserved_at > self.reservation_ttl:
+                # The media stream never showed up; hand the connection back.
+                del self._reserved[call_sid]
+                self._return_idle(ws, warmed_at)
+        for call_sid, arrived_at in list(self._arrived.items()):
+            if now - arrived_at > self.reservation_ttl:
+                del self._arrived[call_sid]
+        while self._idle and (now - self._idle[0][1] > self.max_idle or not is_open(self._idle[0][0])):
+            ws, _ = self._idle.popleft()
+            self.evictions += 1
+            asyncio.create_task(ws.close())
+        while len(self._idle) > self.target_size(now):
+            ws, _ = self._idle.popleft()
+            self.evictions += 1
+            asyncio.create_task(ws.close())
+
+    def _return_idle(self, ws, warmed_at):
+        """Put a connection back in `_idle`, which stays oldest first so eviction only checks the head."""
+        i = len(self._idle)
+        while i and self._idle[i - 1][1] > warmed_at:
+            i -= 1
+        self._idle.insert(i, (ws, warmed_at))
+
+    async def _health_check(self):
+        for entry in list(self._idle):
+            ws = entry[0]
+            try:
+                pong = await ws.ping()
+                await asyncio.wait_for(pong, self.settle_timeout)
+            except Exception:
+                self.evictions += 1
+                # It may have been acquired while we were waiting on the pong.
+                if entry in self._idle:
+                    self._idle.remove(entry)
+                asyncio.create_task(ws.close())
+
+    async def _warm(self):
+        started = time.monotonic()
+        ws = None
+        try:
+            ws = await self._connect()
+            await self._prepare(ws)
+            await wait_for_event(ws, 'session.updated', self.settle_timeout)
+            elapsed = time.monotonic() - started
+            self._warm_seconds = 0.8 * self._warm_seconds + 0.2 * elapsed
+            self._idle.append((ws, time.monotonic()))
+        except Exception as e:
+            self.failures += 1
+            logger.warning("Failed to warm upstream connection: %s", e)
+            if ws is not None:
+                await ws.close()
+        except asyncio.CancelledError:
+            # close() is shutting the pool down; don't leave a half-warmed connection open.
+            if ws is not None:
+                await ws.close()
+            raise
+        finally:
+            self._warming -= 1
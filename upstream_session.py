@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+
+import websockets
+
+from relay import InboundAudioBatcher
+from upstream_pool import is_open
+
+logger = logging.getLogger(__name__)
+
+APPEND_PREFIX = InboundAudioBatcher.PREFIX
+APPEND_OVERHEAD = len(InboundAudioBatcher.PREFIX) + len(InboundAudioBatcher.SUFFIX)
+# Yielded by ResilientUpstream.events() after a new connection has taken over.
+RECONNECTED = 'upstream.reconnected'
+RECONNECT_ERRORS = (OSError, asyncio.TimeoutError, websockets.ConnectionClosed, websockets.InvalidHandshake)
+
+
+def conversation_items(segments, max_chars=4000):
+    """conversation.item.create events rebuilding the newest transcript segments.
+
+    Consecutive messages from the same speaker are merged, and only as many
+    of the newest messages as fit in `max_chars` are kept.
+    """
+    turns = []
+    for _, _, speaker, message in segments:
+        if turns and turns[-1][0] == speaker:
+            turns[-1][1].append(message)
+        else:
+            turns.append((speaker, [message]))
+    items, used = [], 0
+    for speaker, messages in reversed(turns):
+        text = ' '.join(messages)
+        if used + len(text) > max_chars:
+            if items:
+                break
+            text = text[-max_chars:]
+        used += len(text)
+        role, content_type = ('assistant', 'text') if speaker == 'ai' else ('user', 'input_text')
+        items.append({
+            "type": "conversation.item.create",
+            "item": {"type": "message", "role": role, "content": [{"type": content_type, "text": text}]},
+        })
+    items.reverse()
+    return items
+
+
+class ResilientUpstream:
+    """The Realtime leg of one call, reconnected transparently when it drops.
+
+    `send()` is the upstream RelayChannel's send function. While the socket
+    is down, caller audio appends go into a ring holding the newest
+    `buffer_ms` of audio, and everything else is dropped, because it refers
+    to items of the lost session. `events()` yields parsed upstream events.
+    When the socket closes before `close()` is called, it reconnects with
+    exponential backoff for up to `reconnect_seconds`. `acquire()` must
+    return a connection with session.update applied. `replay(ws, responding)`
+    rebuilds the conversation, and `responding` says whether a response was
+    cut off. Only then are the buffered appends flushed and the new socket
+    used for sends, and RECONNECTED yielded.
+    """
+
+    def __init__(self, ws, acquire, replay, buffer_ms=5000, reconnect_seconds=10.0,
+                 backoff=0.1, max_backoff=2.0, reconnect_counter=None, failure_counter=None,
+                 outage_histogram=None, log=None):
+        self.ws = ws
+        self.log = log or logger
+        self._acquire = acquire
+        self._replay = replay
+        self.buffer_ms = buffer_ms
+        self.reconnect_seconds = reconnect_seconds
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.reconnect_counter = reconnect_counter
+        self.failure_counter = failure_counter
+        self.outage_histogram = outage_histogram
+        self.closed = False
+        self.reconnects = 0
+        self.failures = 0
+        self.outage_total = 0.0
+        self.outage_max = 0.0
+        self.buffered_max_ms = 0.0
+        self.buffer_dropped_ms = 0.0
+        self.discarded = 0
+        self._buffer = deque()  # (message, ms)
+        self._buffered_ms = 0.0
+        self._responding = False
+
+    async def send(self, message):
+        if is_open(self.ws):
+            try:
+                await self.ws.send(message)
+                return
+            except websockets.ConnectionClosed:
+                pass
+        if not message.startswith(APPEND_PREFIX):
+            self.discarded += 1
+            return
+        # 4 base64 characters carry 3 mu-law bytes; 8 bytes per ms.
+        ms = (len(message) - APPEND_OVERHEAD) * 3 / 32
+        self._buffer.append((message, ms))
+        self._buffered_ms += ms
+        while self._buffered_ms > self.buffer_ms and len(self._buffer) > 1:
+            _, dropped = self._buffer.popleft()
+            self._buffered_ms -= dropped
+            self.buffer_dropped_ms += dropped
+        self.buffered_max_ms = max(self.buffered_max_ms, self._buffered_ms)
+
+    async def events(self):
+        while True:
+            try:
+                async for message in self.ws:
+                    event = json.loads(message)
+                    if event.get('type') == 'response.created':
+                        self._responding = True
+                    elif event.get('type') == 'response.done':
+                        self._responding = False
+                    yield event
+            except websockets.ConnectionClosed:
+                pass
+            if self.closed or self.reconnect_seconds <= 0 or not await self._reconnect():
+                return
+            yield {"type": RECONNECTED}
+
+    async def close(self):
+        self.closed = True
+        if self.ws is not None:
+            await self.ws.close()
+
+    def stats(self):
+        return {
+            "reconnects": self.reconnects,
+            "failures": self.failures,
+            "outage_total_ms": round(self.outage_total * 1000),
+            "outage_max_ms": round(self.outage_max * 1000),
+            "buffered_max_ms": round(self.buffered_max_ms),
+            "buffer_dropped_ms": round(self.buffer_dropped_ms),
+            "discarded": self.discarded,
+        }
+
+    async def _reconnect(self):
+        started = time.monotonic()
+        deadline = started + self.reconnect_seconds
+        delay = self.backoff
+        self.log.warning("Upstream connection lost; reconnecting")
+        while not self.closed:
+            try:
+                ws = await asyncio.wait_for(self._acquire(), max(0.0, deadline - time.monotonic()))
+                try:
+                    await self._replay(ws, self._responding)
+                    while self._buffer:
+                        message, ms = self._buffer.popleft()
+                        self._buffered_ms -= ms
+                        await ws.send(message)
+                except BaseException:
+                    await ws.close()
+                    raise
+            except RECONNECT_ERRORS as e:
+                if time.monotonic() + delay >= deadline:
+                    self.failures += 1
+                    if self.failure_counter is not None:
+                        self.failure_counter.inc()
+                    self.log.error("Upstream reconnect gave up after %.1fs: %s", time.monotonic() - started, e)
+                    return False
+                self.log.warning("Upstream reconnect failed (%s); retrying in %.1fs", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            if self.closed:
+                await ws.close()
+                return False
+            self.ws = ws
+            self._responding = False
+            outage = time.monotonic() - started
+            self.reconnects += 1
+            self.outage_total += outage
+            self.outage_max = max(self.outage_max, outage)
+            if self.reconnect_counter is not None:
+                self.reconnect_counter.inc()
+            if self.outage_histogram is not None:
+                self.outage_histogram.observe(outage)
+            self.log.info("Upstream reconnected after %.0f ms", outage * 1000)
+            return True
+        return False